@@ -15,6 +15,9 @@ else:
     parent_classes = [ 'BaseGameObject' ]
 %>from joueur.${underscore(parent_classes[0])} import ${parent_classes[0]}
 % endif
+% if obj_key == "Game" and 'TiledGame' in game['serverParentClasses']:
+import joueur.pathfinding
+% endif
 
 % if obj_key == "Game":
 # import game objects
@@ -52,6 +55,15 @@ class ${obj_key}(${", ".join(parent_classes)}):
 %>            '${game_obj_key}': ${game_obj_key}${',' if c != 0 else ''}
 % endfor
         }
+% if 'TiledGame' in game['serverParentClasses']:
+
+        # client side caches for the tile utility functions, made when first
+        # used
+        self._distance_fields = None
+        self._board_arrays = None
+        self._pathable_mask = None
+        self._cluster_graph = None
+% endif
 
 % endif
 % for attr_name in obj['attribute_names']:
@@ -102,6 +114,112 @@ class ${obj_key}(${", ".join(parent_classes)}):
             return None
 
         return self.tiles[x + y * self.map_width]
+
+    def tile_index(self, tile):
+        """Gets the integer index of a Tile, which is its position in tiles
+        Args:
+            tile (games.${underscore(game_name)}.tile.Tile): the Tile to get the index of
+        Returns:
+            int: the index, tile.x + tile.y * map_width
+        """
+        return tile.x + tile.y * self.map_width
+
+    def tile_at_idx(self, i):
+        """Gets the Tile at an integer index
+        Args:
+            i (int): an index from tile_index or neighbors_idx
+        Returns:
+            games.${underscore(game_name)}.tile.Tile: the Tile at that index
+        """
+        return self.tiles[i]
+
+    def neighbors_idx(self, i):
+        """Gets the indexes of the neighbors of the Tile at an integer index,
+        from an adjacency table built once per map size, so graph searches
+        never need to touch Tiles
+        Args:
+            i (int): the index of the Tile
+        Returns:
+            array.array: the indexes of its north, east, south and west
+            neighbors that are on the map, in that order
+        """
+        offsets, neighbors = joueur.pathfinding.grid_adjacency(
+            self.map_width, self.map_height)
+        return neighbors[offsets[i]:offsets[i + 1]]
+
+    def pathable_mask(self):
+        """Gets Tile.is_pathable() of every Tile by index, only re-asking the
+        Tiles that deltas have changed since it was last used
+        Returns:
+            bytearray: 1 where the Tile at that index is pathable, else 0
+        """
+        if self._pathable_mask is None:
+            from joueur.passability import PathableMask
+            self._pathable_mask = PathableMask(self)
+        return self._pathable_mask.refresh()
+
+    def cluster_graph(self):
+        """Gets the HPA* cluster graph of the map, made when first used and
+        only rebuilt around Tiles whose passability has changed since
+        Returns:
+            joueur.hierarchical.ClusterGraph: the graph, whose find_path is
+            what find_path(..., algorithm="hpa") uses
+        """
+        if self._cluster_graph is None:
+            from joueur.hierarchical import ClusterGraph
+            self._cluster_graph = ClusterGraph(self)
+        self._cluster_graph.refresh()
+        return self._cluster_graph
+
+    def distance_field(self, sources, passable=None):
+        """Gets how many steps every Tile is from the nearest of some source
+        Tiles, found for the whole map in one search and cached until a
+        delta changes a Tile
+        Args:
+            sources (list[games.${underscore(game_name)}.tile.Tile]): the Tiles to measure from
+            passable (function): optional, takes a Tile and returns if paths
+                may go through it, Tile.is_pathable by default. Pass the same
+                function each time so the cached field can be reused
+        Returns:
+            numpy.ndarray: a read only (map_height, map_width) array of
+            distances, inf where no source can be reached
+        """
+        distance, _ = self._distance_field_cache().field(sources, passable)
+        return distance.reshape(self.map_height, self.map_width)
+
+    def nearest_sources(self, tiles, sources, passable=None):
+        """Gets the nearest of some source Tiles to each of some Tiles, all
+        from the same cached search as distance_field
+        Args:
+            tiles (list[games.${underscore(game_name)}.tile.Tile]): the Tiles to find sources for
+            sources (list[games.${underscore(game_name)}.tile.Tile]): the Tiles to choose from
+            passable (function): optional, as for distance_field
+        Returns:
+            list[games.${underscore(game_name)}.tile.Tile]: the nearest source to each Tile, or None
+            where none can be reached
+        """
+        _, nearest = self._distance_field_cache().field(sources, passable)
+        found = [nearest[self.tile_index(tile)] for tile in tiles]
+        return [self.tiles[i] if i >= 0 else None for i in found]
+
+    def board_arrays(self):
+        """Gets NumPy arrays of every Tile's type, passability, owner, unit
+        and numbers, indexed [y, x] and kept up to date from the deltas so
+        only changed Tiles are re-read
+        Returns:
+            joueur.board_arrays.BoardArrays: the arrays, as attributes or by
+            name, e.g. board_arrays()["passable"]
+        """
+        if self._board_arrays is None:
+            from joueur.board_arrays import BoardArrays
+            self._board_arrays = BoardArrays(self)
+        return self._board_arrays.refresh()
+
+    def _distance_field_cache(self):
+        if self._distance_fields is None:
+            from joueur.distance_fields import DistanceFields
+            self._distance_fields = DistanceFields(self)
+        return self._distance_fields
 % elif obj_key == 'Tile':
     directions = ["North", "East", "South", "West"]
     """int: The valid directions that tiles can be in, "North", "East", "South", or "West"
@@ -127,7 +245,7 @@ class ${obj_key}(${", ".join(parent_classes)}):
         Returns:
             bool: True if pathable, False otherwise
         """
-${merge("        # ", "is_pathable_builtin", "        return false  # DEVELOPER ADD LOGIC HERE")}
+${merge("        # ", "is_pathable_builtin", "        return False  # DEVELOPER ADD LOGIC HERE")}
 
     def has_neighbor(self, tile):
         """Checks if this Tile has a specific neighboring Tile
@@ -136,7 +254,8 @@ ${merge("        # ", "is_pathable_builtin", "        return false  # DEVELOPER
         Returns:
             bool: True if the tile is a neighbor of this Tile, False otherwise
         """
-        return bool(tile and tile in self.get_neighbors())
+        # neighbors are exactly the Tiles one step away
+        return bool(tile) and abs(self.x - tile.x) + abs(self.y - tile.y) == 1
 % endif
 % endif
 
@@ -3,7 +3,8 @@
 from joueur.base_ai import BaseAI
 
 # <<-- Creer-Merge: imports -->> - Code you add between this comment and the end comment will be preserved between Creer re-runs.
-# you can add additional import(s) here
+from games.checkers.bitboard import Board, play
+from games.checkers.search import Searcher
 # <<-- /Creer-Merge: imports -->>
 
 class AI(BaseAI):
@@ -41,7 +42,8 @@ class AI(BaseAI):
             game. You can initialize your AI here.
         """
         # <<-- Creer-Merge: start -->> - Code you add between this comment and the end comment will be preserved between Creer re-runs.
-        # replace with your start logic
+        self.board = Board()
+        self.searcher = Searcher()
         # <<-- /Creer-Merge: start -->>
 
     def game_updated(self):
@@ -81,7 +83,20 @@ class AI(BaseAI):
             bool: Represents if you want to end your turn. True means end your turn, False means to keep your turn going and re-call this function.
         """
         # <<-- Creer-Merge: runTurn -->> - Code you add between this comment and the end comment will be preserved between Creer re-runs.
-        # Put your game logic here for runTurn
+        if self.game.checker_moved is not None and \
+                not self.game.checker_moved_jumped:
+            return True  # moved without jumping, nothing more can be done
+        self.board.sync(self.game)
+        best = self.searcher.choose_move(self.board, self.clock.deadline)
+        if best is None:
+            return True
+        if self.get_setting("verbose") is not None:
+            # e.g. --aiSettings verbose, else it's kept in searcher.log
+            stats = self.searcher.last
+            print("depth {depth} nodes {nodes} ({nps:.0f}/s) in "
+                  "{seconds:.2f}s score {score} pv {pv}".format(
+                      **dict(stats, pv=" ".join(stats["pv"]))))
+        play(self.game, best)
         return True
         # <<-- /Creer-Merge: runTurn -->>
 
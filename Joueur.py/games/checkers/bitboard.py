@@ -0,0 +1,591 @@
+# A bitboard checkers board for the Checkers AI: the 32 dark squares as bits
+# of an int per side plus one for the kings, with a legal move generator
+# (multi jump chains included) fast enough to search with in Python.
+#
+# Board.sync() rebuilds the position from game.checkers each turn, reading
+# Checker.x, y and kinged, and which way each Player's men move from
+# Player.y_direction. Moves are whole turns, a chain of jumps being a single
+# move; steps() turns one back into the Checker.move(x, y) calls the server
+# wants, and play() makes them.
+#
+# The squares use the "ghost square" layout: row y's four dark squares are
+# bits y * 4 + y // 2 onwards, leaving bits 8, 17 and 26 unused, so that a
+# step along either diagonal towards higher y is always a shift of 4 or 5
+# bits, and the unused bits stop shifts wrapping off the sides of the board.
+#
+# games/checkers/validate.py checks it against known perft counts, a plain
+# generator and recorded games, and benchmarks it.
+
+# sides, by the way their men move: DOWN towards higher y (Player.y_direction
+# 1, the first player), UP towards lower y
+DOWN, UP = 0, 1
+
+SIZE = 8
+
+_BITS = 35
+# the unused bits between pairs of rows
+_GHOSTS = (1 << 8) | (1 << 17) | (1 << 26)
+_VALID = ((1 << _BITS) - 1) & ~_GHOSTS
+
+# the (x, y) of each bit, None for the ghosts, and the bit of each (x, y)
+_COORDINATES = [None] * _BITS
+_BIT_OF = {}
+for _y in range(SIZE):
+    for _column in range(SIZE // 2):
+        _bit = _y * 4 + _y // 2 + _column
+        _x = _column * 2 + (1 if _y % 2 == 0 else 0)
+        _COORDINATES[_bit] = (_x, _y)
+        _BIT_OF[(_x, _y)] = _bit
+
+# the row each side's men are kinged on
+_PROMOTION = [0, 0]
+for (_x, _y), _bit in _BIT_OF.items():
+    if _y == SIZE - 1:
+        _PROMOTION[DOWN] |= 1 << _bit
+    elif _y == 0:
+        _PROMOTION[UP] |= 1 << _bit
+
+# shifts along the diagonals each side's men can step, and a king's
+_FORWARD = [(4, 5), (-4, -5)]
+_ALL = (4, 5, -4, -5)
+
+
+def _shift(board, amount):
+    return board << amount if amount > 0 else board >> -amount
+
+
+def _bits(board):
+    """The indices of the set bits of a board, lowest first."""
+    found = []
+    while board:
+        low = board & -board
+        found.append(low.bit_length() - 1)
+        board ^= low
+    return found
+
+
+def coordinates(square):
+    """The (x, y) of a square (bit index) on the game's board."""
+    return _COORDINATES[square]
+
+
+def square_at(x, y):
+    """The square (bit index) of an (x, y), None if it is a light square or
+    off the board.
+    """
+    return _BIT_OF.get((x, y))
+
+
+def steps(move):
+    """The (x, y) each Checker.move call of a move goes to, in order."""
+    return [_COORDINATES[square] for square in move[0][1:]]
+
+
+def notation(move):
+    """A move in the usual numbering of the dark squares 1 to 32 from the
+    first player's side, e.g. "9-13" or "9x18x27".
+    """
+    squares = [str(_number(square)) for square in move[0]]
+    return ("x" if move[1] else "-").join(squares)
+
+
+def _number(square):
+    x, y = _COORDINATES[square]
+    return y * 4 + x // 2 + 1
+
+
+def _captured(path):
+    """The squares jumped over along a path of squares."""
+    captured = 0
+    for start, end in zip(path, path[1:]):
+        if abs(end - start) > 5:
+            captured |= 1 << ((start + end) // 2)
+    return captured
+
+
+class Board():
+    """A checkers position.
+
+    Attributes:
+        pieces (list[int]): The bitboard of each side's checkers.
+        kings (int): The bitboard of the kinged checkers of both sides.
+        turn (int): The side to move, DOWN or UP.
+        continuing (int): The square of the checker that must carry on
+            jumping, as when game.checker_moved_jumped, else None.
+        forced_jumps (bool): Whether a jump must be taken when there is
+            one, as in the usual rules. The server does not insist, so this
+            is an assumption about the opponent that searches rely on.
+
+    Moves are tuples of the squares the checker goes through, start first,
+    and the bitboard of the checkers it jumps. Jumps are followed to the end
+    of the chain, and a man jumping onto the far row is kinged and stops
+    there, as in the usual rules. The server would let a chain stop early or
+    a new king carry on, but neither is ever forced, so every move here is
+    one the server accepts.
+    """
+
+    def __init__(self, forced_jumps=True):
+        """Creates a board with the starting position.
+
+        Args:
+            forced_jumps (bool): See forced_jumps.
+        """
+        self.forced_jumps = forced_jumps
+        self.load([(x, y, DOWN if y < 3 else UP, False)
+                   for (x, y) in _BIT_OF if y < 3 or y > 4])
+
+    def load(self, checkers, turn=DOWN, continuing=None):
+        """Sets up a position.
+
+        Args:
+            checkers (list[tuple[int, int, int, bool]]): The x, y, side and
+                whether it is kinged of every checker.
+            turn (int): The side to move.
+            continuing (tuple[int, int]): The (x, y) of the checker that
+                must carry on jumping, if any.
+
+        Returns:
+            Board: This, for chaining.
+        """
+        self.pieces = [0, 0]
+        self.kings = 0
+        for x, y, side, kinged in checkers:
+            bit = 1 << _BIT_OF[(x, y)]
+            self.pieces[side] |= bit
+            if kinged:
+                self.kings |= bit
+        self.turn = turn
+        self.continuing = _BIT_OF[continuing] if continuing else None
+        self._stack = []
+        return self
+
+    def sync(self, game):
+        """Sets up the position of a game.
+
+        Args:
+            game (games.checkers.game.Game): The game.
+
+        Returns:
+            Board: This, for chaining.
+        """
+        if game.board_width != SIZE or game.board_height != SIZE:
+            raise ValueError("The board is {}x{}, not {}x{}.".format(
+                game.board_width, game.board_height, SIZE, SIZE))
+        continuing = None
+        if game.checker_moved is not None and game.checker_moved_jumped:
+            continuing = (game.checker_moved.x, game.checker_moved.y)
+        return self.load(
+            [(checker.x, checker.y, side(checker.owner), checker.kinged)
+             for checker in game.checkers],
+            side(game.current_player), continuing)
+
+    def state(self):
+        """The position as 5 ints: each side's pieces, the kings, the turn
+        and the continuing square + 1. Compact, for sending to other
+        processes (see joueur.parallel).
+        """
+        return [self.pieces[0], self.pieces[1], self.kings, self.turn,
+                0 if self.continuing is None else self.continuing + 1]
+
+    def load_state(self, values):
+        """Sets up the position from state().
+
+        Returns:
+            Board: This, for chaining.
+        """
+        pieces_down, pieces_up, kings, turn, continuing = \
+            [int(value) for value in values]
+        self.pieces = [pieces_down, pieces_up]
+        self.kings = kings
+        self.turn = turn
+        self.continuing = continuing - 1 if continuing else None
+        self._stack = []
+        return self
+
+    @property
+    def key(self):
+        """A hashable key of the position, for tables."""
+        return (self.pieces[0], self.pieces[1], self.kings, self.turn,
+                self.continuing)
+
+    def checkers(self):
+        """Every checker as (x, y, side, kinged), as load() takes them."""
+        return [_COORDINATES[square] + (side, bool(self.kings >> square & 1))
+                for side in (DOWN, UP) for square in _bits(self.pieces[side])]
+
+    def push(self, move):
+        """Makes a move, to be taken back with pop()."""
+        self._stack.append((self.pieces[0], self.pieces[1], self.kings,
+                            self.turn, self.continuing))
+        path, captured = move
+        us, them = self.turn, self.turn ^ 1
+        start, end = 1 << path[0], 1 << path[-1]
+        # a king's chain can end where it began
+        self.pieces[us] = self.pieces[us] & ~start | end
+        self.pieces[them] &= ~captured
+        kings = self.kings & ~captured
+        if kings & start:
+            kings = kings & ~start | end
+        elif any(_PROMOTION[us] >> square & 1 for square in path[1:]):
+            kings |= end
+        self.kings = kings
+        self.turn = them
+        self.continuing = None
+
+    def push_path(self, path):
+        """Makes a move given only the squares it goes through, working out
+        what it jumps, as when replaying the server's Checker.move calls.
+        """
+        self.push((tuple(path), _captured(path)))
+
+    def pop(self):
+        """Takes back the last move pushed."""
+        (self.pieces[0], self.pieces[1], self.kings, self.turn,
+         self.continuing) = self._stack.pop()
+
+    def jumps(self):
+        """The legal jump moves, whole chains."""
+        us, them = self.turn, self.turn ^ 1
+        ours, theirs = self.pieces[us], self.pieces[them]
+        empty = _VALID & ~(ours | theirs)
+        men = ours & ~self.kings
+        kings = ours & self.kings
+        if self.continuing is not None:
+            men &= 1 << self.continuing
+            kings &= 1 << self.continuing
+
+        moves = []
+        for pieces, directions in ((men, _FORWARD[us]), (kings, _ALL)):
+            # the checkers next to an enemy with an empty square behind it
+            able = 0
+            for shift in directions:
+                able |= pieces & _shift(theirs, -shift) & \
+                    _shift(empty, -2 * shift)
+            for square in _bits(able):
+                self._chain(square, pieces is kings, directions, theirs,
+                            empty | 1 << square, 0, (square,), moves)
+        return moves
+
+    def _chain(self, square, king, directions, theirs, empty, captured,
+               path, moves):
+        """Adds every jump chain from a square, depth first."""
+        promotion = 0 if king else _PROMOTION[self.turn]
+        ended = True
+        for shift in directions:
+            over, land = square + shift, square + 2 * shift
+            if land < 0 or not (theirs >> over & 1) or \
+                    captured >> over & 1 or not (empty >> land & 1):
+                continue
+            ended = False
+            taken = captured | 1 << over
+            if promotion >> land & 1:
+                moves.append((path + (land,), taken))
+            else:
+                self._chain(land, king, directions, theirs, empty, taken,
+                            path + (land,), moves)
+        if ended and captured:
+            moves.append((path, captured))
+
+    def simple_moves(self):
+        """The legal moves one square diagonally, ignoring forced jumps."""
+        if self.continuing is not None:
+            return []
+        us = self.turn
+        ours = self.pieces[us]
+        empty = _VALID & ~(ours | self.pieces[us ^ 1])
+        men = ours & ~self.kings
+        kings = ours & self.kings
+        moves = []
+        for shift in _ALL:
+            movers = kings | men if shift in _FORWARD[us] else kings
+            for end in _bits(_shift(movers, shift) & empty):
+                moves.append(((end - shift, end), 0))
+        return moves
+
+    def legal_moves(self):
+        """The legal moves: the jumps, and the simple moves unless there are
+        jumps and they are forced.
+        """
+        moves = self.jumps()
+        if not moves or not self.forced_jumps:
+            moves.extend(self.simple_moves())
+        return moves
+
+    def perft(self, depth):
+        """Counts the positions a number of moves ahead, to test move
+        generation against known counts.
+        """
+        moves = self.legal_moves()
+        if depth <= 1:
+            return len(moves) if depth == 1 else 1
+        nodes = 0
+        for move in moves:
+            self.push(move)
+            nodes += self.perft(depth - 1)
+            self.pop()
+        return nodes
+
+    def __str__(self):
+        rows = []
+        for y in range(SIZE):
+            row = ""
+            for x in range(SIZE):
+                square = _BIT_OF.get((x, y))
+                if square is None:
+                    row += " "
+                elif self.pieces[DOWN] >> square & 1:
+                    row += "D" if self.kings >> square & 1 else "d"
+                elif self.pieces[UP] >> square & 1:
+                    row += "U" if self.kings >> square & 1 else "u"
+                else:
+                    row += "."
+            rows.append(row)
+        return "\n".join(rows)
+
+
+def side(player):
+    """The side (DOWN or UP) of a Player, from Player.y_direction."""
+    return DOWN if player.y_direction == 1 else UP
+
+
+def play(game, move):
+    """Makes a move in the game, one Checker.move call per step.
+
+    Args:
+        game (games.checkers.game.Game): The game, whose current player
+            is making the move.
+        move (tuple): The move, from a Board synced to the game.
+
+    Returns:
+        bool: True if every step was accepted.
+    """
+    start = _COORDINATES[move[0][0]]
+    for checker in game.current_player.checkers:
+        if (checker.x, checker.y) == start:
+            break
+    else:
+        return False
+    for x, y in steps(move):
+        if checker.move(x, y) is None:
+            return False
+    return True
+
+
+# perft counts from the starting position, the first player to move
+PERFT_COUNTS = [7, 49, 302, 1469, 7361, 36768, 179740, 845931]
+
+
+def run_perft(max_depth=7, verbose=True):
+    """Checks perft counts from the starting position up to a depth.
+
+    Returns:
+        bool: True if every count matched.
+    """
+    import time
+
+    passed = True
+    board = Board()
+    for depth, expected in enumerate(PERFT_COUNTS[:max_depth], 1):
+        began = time.perf_counter()
+        found = board.perft(depth)
+        seconds = time.perf_counter() - began
+        ok = found == expected
+        passed = passed and ok
+        if verbose:
+            print("{} depth {}: {} {} ({:.0f} nodes/s)".format(
+                "ok  " if ok else "FAIL", depth, found,
+                "" if ok else "expected {}".format(expected),
+                found / seconds if seconds else 0))
+    return passed
+
+
+def _plain_moves(checkers, turn, forced_jumps):
+    """The legal moves of a position found square by square on an (x, y)
+    grid, without bitboards, for checking the Board against.
+
+    Returns:
+        set[tuple[tuple[int, int], ...]]: The (x, y) path of each move.
+    """
+    at = {(x, y): (side, kinged) for x, y, side, kinged in checkers}
+    found_jumps, found_steps = set(), set()
+    for (x, y), (side, kinged) in at.items():
+        if side != turn:
+            continue
+        forward = 1 if side == DOWN else -1
+        dys = (1, -1) if kinged else (forward,)
+        last_row = SIZE - 1 if side == DOWN else 0
+
+        def chain(position, taken, path):
+            ended = True
+            for dx in (1, -1):
+                for dy in dys:
+                    over = (position[0] + dx, position[1] + dy)
+                    land = (position[0] + 2 * dx, position[1] + 2 * dy)
+                    if not (0 <= land[0] < SIZE and 0 <= land[1] < SIZE):
+                        continue
+                    if over not in at or at[over][0] == side or \
+                            over in taken:
+                        continue
+                    if land in at and land != path[0]:
+                        continue
+                    ended = False
+                    if not kinged and land[1] == last_row:
+                        found_jumps.add(path + (land,))
+                    else:
+                        chain(land, taken | {over}, path + (land,))
+            if ended and taken:
+                found_jumps.add(path)
+
+        chain((x, y), frozenset(), ((x, y),))
+        for dx in (1, -1):
+            for dy in dys:
+                land = (x + dx, y + dy)
+                if 0 <= land[0] < SIZE and 0 <= land[1] < SIZE and \
+                        land not in at:
+                    found_steps.add(((x, y), land))
+    if found_jumps and forced_jumps:
+        return found_jumps
+    return found_jumps | found_steps
+
+
+def check_random_games(games=200, seed=0, verbose=True):
+    """Plays random games comparing the Board's legal moves at every turn
+    with those of a plain, square by square generator.
+
+    Returns:
+        bool: True if they always agreed.
+    """
+    import random
+
+    randomizer = random.Random(seed)
+    positions = 0
+    for number in range(games):
+        board = Board(forced_jumps=number % 2 == 0)
+        for _ in range(200):
+            moves = board.legal_moves()
+            found = set(tuple(_COORDINATES[square] for square in move[0])
+                        for move in moves)
+            expected = _plain_moves(board.checkers(), board.turn,
+                                    board.forced_jumps)
+            positions += 1
+            if found != expected or len(found) != len(moves):
+                if verbose:
+                    print("FAIL game {}:\n{}\nmissing {}\nextra {}".format(
+                        number, board, expected - found, found - expected))
+                return False
+            if not moves:
+                break
+            board.push(randomizer.choice(moves))
+    if verbose:
+        print("ok   {} games, {} positions".format(games, positions))
+    return True
+
+
+def _load_gamelog(path):
+    import gzip
+    import json
+
+    opener = gzip.open if path.endswith(".gz") else open
+    with opener(path, "rt") as file:
+        return json.load(file)
+
+
+def replay_gamelog(path, verbose=True):
+    """Replays a recorded game (a Cerveau gamelog, gzipped or not), checking
+    that every turn's Checker.move calls make a move the Board generates and
+    that the Board's position matches the game's after it.
+
+    Turns the Board cannot generate but the server allowed (a chain stopped
+    early, or a new king jumping on) are counted and replayed anyway.
+
+    Returns:
+        dict: The "turns", "generated", "allowed" (not generated) and
+        "mismatched" (positions differing) counts.
+    """
+    gamelog = _load_gamelog(path)
+    deltas = gamelog["deltas"]
+    objects = deltas[0]["game"]["gameObjects"]
+    sides = {id: DOWN if data.get("yDirection") == 1 else UP
+             for id, data in objects.items()
+             if data.get("gameObjectName") == "Player"}
+    # id -> [x, y, side, kinged] of the checkers still on the board
+    alive = {id: [data["x"], data["y"], sides[data["owner"]["id"]],
+                  data.get("kinged", False)]
+             for id, data in objects.items()
+             if data.get("gameObjectName") == "Checker"}
+
+    board = Board(forced_jumps=False)
+    board.load([tuple(checker) for checker in alive.values()])
+    counts = {"turns": 0, "generated": 0, "allowed": 0, "mismatched": 0}
+    moved, mover = [], None
+
+    def finish_turn():
+        counts["turns"] += 1
+        board.turn = alive[mover][2]
+        generated = set(move[0] for move in board.legal_moves())
+        if tuple(moved) in generated:
+            counts["generated"] += 1
+        else:
+            counts["allowed"] += 1
+        board.push_path(moved)
+        if sorted(board.checkers()) != sorted(
+                tuple(checker) for checker in alive.values()):
+            counts["mismatched"] += 1
+            if verbose:
+                print("mismatch after turn {} ({}):\n{}".format(
+                    counts["turns"], moved, board))
+
+    for delta in deltas[1:]:
+        data = delta.get("data") or {}
+        run = data.get("run")
+        if delta["type"] == "ran" and run and \
+                run.get("functionName") == "move" and data.get("returned"):
+            id = run["caller"]["id"]
+            if id != mover and moved:
+                finish_turn()
+                moved = []
+            if not moved:
+                mover = id
+                moved = [_BIT_OF[tuple(alive[id][:2])]]
+            x, y = run["args"]["x"], run["args"]["y"]
+            start = alive[id][:2]
+            if abs(x - start[0]) == 2:
+                over = ((x + start[0]) // 2, (y + start[1]) // 2)
+                for other, checker in list(alive.items()):
+                    if checker[:2] == list(over):
+                        del alive[other]
+            moved.append(_BIT_OF[(x, y)])
+            alive[id][:2] = [x, y]
+        elif delta["type"] == "finished" and moved and \
+                data.get("returned") is not False:
+            finish_turn()
+            moved = []
+        for id, changes in (delta.get("game") or {}).get(
+                "gameObjects", {}).items():
+            if id in alive and isinstance(changes, dict) and \
+                    "kinged" in changes:
+                alive[id][3] = changes["kinged"]
+    if moved:
+        finish_turn()
+    if verbose:
+        print("{}: {turns} turns, {generated} generated, {allowed} allowed "
+              "by the server only, {mismatched} mismatched".format(
+                  path, **counts))
+    return counts
+
+
+def benchmark(seconds=5.0):
+    """Measures move generation speed as perft nodes per second from the
+    starting position.
+
+    Returns:
+        float: Nodes per second.
+    """
+    import time
+
+    nodes = 0
+    began = time.perf_counter()
+    while time.perf_counter() - began < seconds:
+        nodes += Board().perft(6)
+    return nodes / (time.perf_counter() - began)
+
@@ -0,0 +1,250 @@
+# Move search for the Checkers AI: iterative deepening alpha-beta over the
+# bitboard Board, with a transposition table, history move ordering and
+# jumps searched past the horizon, so a line never stops halfway through an
+# exchange.
+#
+#     searcher = Searcher()
+#     board.sync(self.game)
+#     best = searcher.choose_move(board, self.clock.deadline)
+#     play(self.game, best)
+#     print(searcher.last)  # depth, nodes, nodes per second, ...
+#
+# python -m games.checkers.validate search times it from the start.
+
+import time
+
+from games.checkers.bitboard import DOWN, SIZE, UP, notation, square_at
+
+INFINITY = 1000000
+WIN = 100000
+# scores beyond this are wins, stored in the table relative to the node
+_WIN_BOUND = WIN - 1000
+
+EXACT, LOWER, UPPER = range(3)
+
+MAN_VALUE = 100
+KING_VALUE = 150
+
+# bonus for a man by how many rows it has advanced
+_ADVANCE = [0, 2, 4, 6, 9, 12, 16, 0]
+
+
+# the squares of each row a side's men have advanced, by side
+_ROWS = [[0] * SIZE, [0] * SIZE]
+for _y in range(SIZE):
+    for _x in range(SIZE):
+        if square_at(_x, _y) is not None:
+            _ROWS[DOWN][_y] |= 1 << square_at(_x, _y)
+            _ROWS[UP][SIZE - 1 - _y] |= 1 << square_at(_x, _y)
+
+
+def evaluate(board):
+    """Scores a position from the side to move's point of view, in
+    hundredths of a man.
+    """
+    score = 0
+    for side in (DOWN, UP):
+        pieces = board.pieces[side]
+        men = pieces & ~board.kings
+        total = bin(pieces & board.kings).count("1") * KING_VALUE
+        for advanced, row in enumerate(_ROWS[side]):
+            if men & row:
+                total += bin(men & row).count("1") * (
+                    MAN_VALUE + _ADVANCE[advanced])
+        score += total if side == board.turn else -total
+    return score
+
+
+class _OutOfTime(Exception):
+    pass
+
+
+class Searcher():
+    """Finds moves by iterative deepening alpha-beta search.
+
+    Attributes:
+        last (dict): Telemetry of the last search: the depth completed,
+            nodes searched, seconds taken, nodes per second, score, best
+            move and principal variation (in square numbers).
+        log (list[dict]): The telemetry of every search this game.
+    """
+
+    def __init__(self, table_size=1 << 20, max_depth=64):
+        """Creates a searcher with an empty transposition table.
+
+        Args:
+            table_size (int): The most positions the table holds before it
+                is cleared.
+            max_depth (int): The deepest iteration to search.
+        """
+        self.table = {}
+        self.table_size = table_size
+        self.max_depth = max_depth
+        self.last = {}
+        self.log = []
+        self.nodes = 0
+
+        self._history = {}
+        self._deadline = None
+
+    def choose_move(self, board, deadline):
+        """Searches for the best move until the move's deadline.
+
+        Args:
+            board (Board): The position, synced to the game.
+            deadline (float): The time.perf_counter() to be done by, the
+                AI's clock.deadline.
+
+        Returns:
+            tuple: The best move found, None if there are no legal moves.
+        """
+        return self.search(board, deadline=deadline)
+
+    def search(self, board, seconds=None, depth=None, deadline=None):
+        """Searches deeper and deeper until out of time or depth.
+
+        Args:
+            board (Board): The position, left as it was.
+            seconds (float): How long to search, None for no limit.
+            depth (int): The deepest iteration, defaults to max_depth.
+            deadline (float): A time.perf_counter() to stop by instead of
+                after seconds.
+
+        Returns:
+            tuple: The best move found, None if there are no legal moves.
+        """
+        began = time.perf_counter()
+        if deadline is None and seconds is not None:
+            deadline = began + seconds
+        self._deadline = deadline
+        self.nodes = 0
+        if len(self.table) > self.table_size:
+            self.table = {}
+        for move in self._history:
+            self._history[move] >>= 2
+
+        moves = board.legal_moves()
+        best, score, completed = (moves[0] if moves else None), 0, 0
+        # with one move there's nothing to think about
+        for iteration in range(1, (depth or self.max_depth) + 1):
+            if len(moves) < 2:
+                break
+            try:
+                score, found = self._root(board, moves, iteration)
+            except _OutOfTime:
+                break
+            best, completed = found, iteration
+            moves.remove(best)
+            moves.insert(0, best)
+            if abs(score) > _WIN_BOUND:
+                break
+            if self._deadline is not None and time.perf_counter() + 2 * (
+                    time.perf_counter() - began) > self._deadline:
+                break
+
+        elapsed = time.perf_counter() - began
+        self.last = {
+            "depth": completed,
+            "nodes": self.nodes,
+            "seconds": elapsed,
+            "nps": self.nodes / elapsed if elapsed else 0.0,
+            "score": score,
+            "move": notation(best) if best else "",
+            "pv": [notation(move) for move in self.principal_variation(
+                board, completed)],
+        }
+        self.log.append(self.last)
+        return best
+
+    def principal_variation(self, board, depth):
+        """The line of best moves the table holds from a position."""
+        line = []
+        for _ in range(depth):
+            entry = self.table.get(board.key)
+            if entry is None or entry[3] is None or \
+                    entry[3] not in board.legal_moves():
+                break
+            line.append(entry[3])
+            board.push(entry[3])
+        for _ in line:
+            board.pop()
+        return line
+
+    def _root(self, board, moves, depth):
+        alpha, best = -INFINITY, moves[0]
+        for move in moves:
+            board.push(move)
+            score = -self._negamax(board, depth - 1, -INFINITY, -alpha, 1)
+            board.pop()
+            if score > alpha:
+                alpha, best = score, move
+        self.table[board.key] = (depth, alpha, EXACT, best)
+        return alpha, best
+
+    def _negamax(self, board, depth, alpha, beta, ply):
+        self.nodes += 1
+        if self._deadline is not None and not self.nodes & 1023 and \
+                time.perf_counter() > self._deadline:
+            raise _OutOfTime()
+
+        key = board.key
+        entry = self.table.get(key)
+        table_move = None
+        if entry is not None:
+            entry_depth, score, flag, table_move = entry
+            if entry_depth >= depth:
+                if score > _WIN_BOUND:
+                    score -= ply
+                elif score < -_WIN_BOUND:
+                    score += ply
+                if flag == EXACT or (flag == LOWER and score >= beta) or \
+                        (flag == UPPER and score <= alpha):
+                    return score
+
+        jumps = board.jumps()
+        if depth <= 0:
+            # past the horizon only jumps are searched, and only while
+            # there are some, as they're forced anyway
+            if not jumps or not board.forced_jumps:
+                return evaluate(board)
+            moves = jumps
+        else:
+            moves = jumps if jumps and board.forced_jumps else \
+                jumps + board.simple_moves()
+        if not moves:
+            return -WIN + ply
+
+        history = self._history
+        moves.sort(key=lambda move: (move != table_move, -len(move[0]),
+                                     -history.get(move, 0)))
+        original_alpha = alpha
+        best_score, best = -INFINITY, moves[0]
+        for move in moves:
+            board.push(move)
+            score = -self._negamax(board, depth - 1, -beta, -alpha, ply + 1)
+            board.pop()
+            if score > best_score:
+                best_score, best = score, move
+                if score > alpha:
+                    alpha = score
+                    if alpha >= beta:
+                        if not move[1]:
+                            history[move] = history.get(move, 0) + \
+                                depth * depth
+                        break
+
+        if best_score >= beta:
+            flag = LOWER
+        elif best_score <= original_alpha:
+            flag = UPPER
+        else:
+            flag = EXACT
+        stored = best_score
+        if stored > _WIN_BOUND:
+            stored += ply
+        elif stored < -_WIN_BOUND:
+            stored -= ply
+        if entry is None or entry[0] <= depth:
+            self.table[key] = (max(depth, 0), stored, flag, best)
+        return best_score
+
@@ -0,0 +1,52 @@
+# Checks and benchmarks the Checkers AI's bitboard move generator, and its
+# search, from the command line:
+#
+#     python -m games.checkers.validate perft          # known counts
+#     python -m games.checkers.validate random         # vs a plain generator
+#     python -m games.checkers.validate replay <gamelogs>...
+#     python -m games.checkers.validate bench          # nodes per second
+#     python -m games.checkers.validate search         # searches the start
+#
+# This is its own module, not bitboard.py's or search.py's __main__, as
+# games.checkers imports them (through the AI) before python -m could run
+# them.
+
+from games.checkers.bitboard import Board, benchmark, check_random_games, \
+    replay_gamelog, run_perft
+from games.checkers.search import Searcher
+
+if __name__ == "__main__":
+    import argparse
+    import sys
+
+    parser = argparse.ArgumentParser(
+        description="Checks and benchmarks the bitboard move generator, "
+                    "and times the search.")
+    parser.add_argument("command",
+                        choices=["perft", "random", "replay", "bench",
+                                 "search"])
+    parser.add_argument("gamelogs", nargs="*",
+                        help="the gamelogs to replay")
+    parser.add_argument("--depth", type=int, default=7,
+                        help="the deepest perft to check")
+    parser.add_argument("--games", type=int, default=200,
+                        help="how many random games to check")
+    parser.add_argument("--seconds", type=float, default=5.0,
+                        help="how long to benchmark or search for")
+    args = parser.parse_args()
+
+    if args.command == "perft":
+        sys.exit(0 if run_perft(args.depth) else 1)
+    if args.command == "random":
+        sys.exit(0 if check_random_games(args.games) else 1)
+    if args.command == "replay":
+        results = [replay_gamelog(path) for path in args.gamelogs]
+        sys.exit(1 if any(result["mismatched"] for result in results) else 0)
+    if args.command == "search":
+        searcher = Searcher()
+        searcher.search(Board(), seconds=args.seconds)
+        print("depth {depth} nodes {nodes} ({nps:.0f}/s) in {seconds:.2f}s "
+              "score {score} pv {pv}".format(
+                  **dict(searcher.last, pv=" ".join(searcher.last["pv"]))))
+        sys.exit(0)
+    print("{:.0f} nodes/s".format(benchmark(args.seconds)))
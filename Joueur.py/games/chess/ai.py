@@ -3,7 +3,8 @@
 from joueur.base_ai import BaseAI
 
 # <<-- Creer-Merge: imports -->> - Code you add between this comment and the end comment will be preserved between Creer re-runs.
-# you can add additional import(s) here
+from games.chess.bitboard import Board
+from games.chess.search import Searcher
 # <<-- /Creer-Merge: imports -->>
 
 class AI(BaseAI):
@@ -41,7 +42,11 @@ class AI(BaseAI):
             game. You can initialize your AI here.
         """
         # <<-- Creer-Merge: start -->> - Code you add between this comment and the end comment will be preserved between Creer re-runs.
-        # replace with your start logic
+        self.board = Board(self.game.fen)
+        self.searcher = Searcher(table_megabytes=32)
+        # a game of chess is about 80 moves each, and may well go on
+        self.clock.expected_turns = 80
+        self.clock.minimum_turns_left = 20
         # <<-- /Creer-Merge: start -->>
 
     def game_updated(self):
@@ -71,8 +76,17 @@ class AI(BaseAI):
             str: A string in Standard Algebriac Notation (SAN) for the move you want to make. If the move is invalid or not properly formatted you will lose the game.
         """
         # <<-- Creer-Merge: makeMove -->> - Code you add between this comment and the end comment will be preserved between Creer re-runs.
-        # Put your game logic here for makeMove
-        return ""
+        self.board.sync(self.game)
+        best = self.searcher.choose_move(self.board, self.clock.deadline)
+        if not best:
+            return ""
+        if self.get_setting("verbose") is not None:
+            # e.g. --aiSettings verbose, else it's kept in searcher.log
+            stats = self.searcher.last
+            print("depth {depth} nodes {nodes} ({nps:.0f}/s) in "
+                  "{seconds:.2f}s score {score} pv {pv}".format(
+                      **dict(stats, pv=" ".join(stats["pv"]))))
+        return self.board.san(best)
         # <<-- /Creer-Merge: makeMove -->>
 
     # <<-- Creer-Merge: functions -->> - Code you add between this comment and the end comment will be preserved between Creer re-runs.
@@ -0,0 +1,731 @@
+# A bitboard chess board for the Chess AI: the position as one 64 bit int per
+# piece type and color, with a legal move generator fast enough to search
+# with in Python.
+#
+# The server only tells the AI the current game.fen and the game.history of
+# moves in SAN. Board.sync() loads the fen once, then replays each new SAN
+# move from the history, so the board keeps the moves that led to the
+# position (for repetition checks) and never re-parses the whole board.
+#
+# Squares are numbered a1 = 0, b1 = 1, ... h8 = 63. Moves are ints packing
+# the from and to squares, the promotion piece and a flag, see move().
+#
+# games/chess/validate.py checks it against known perft counts and
+# benchmarks it.
+
+WHITE, BLACK = 0, 1
+PAWN, KNIGHT, BISHOP, ROOK, QUEEN, KING = range(6)
+
+# move flags
+NORMAL, DOUBLE_PUSH, CASTLE, EN_PASSANT = range(4)
+
+START_FEN = "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1"
+
+_LETTERS = "pnbrqk"
+_FILES = "abcdefgh"
+
+_FULL = (1 << 64) - 1
+_FILE_A = 0x0101010101010101
+_FILE_H = _FILE_A << 7
+_RANK_1 = 0xFF
+_RANK_3 = _RANK_1 << 16
+_RANK_6 = _RANK_1 << 40
+_RANK_8 = _RANK_1 << 56
+
+
+def square_name(square):
+    """The algebraic name of a square, e.g. 0 -> "a1"."""
+    return _FILES[square & 7] + str((square >> 3) + 1)
+
+
+def parse_square(name):
+    """The square an algebraic name is, e.g. "e4" -> 28."""
+    return _FILES.index(name[0]) + 8 * (int(name[1]) - 1)
+
+
+def move(start, end, promotion=0, flag=NORMAL):
+    """Packs a move into an int.
+
+    Args:
+        start (int): The square moved from.
+        end (int): The square moved to.
+        promotion (int): The piece type a pawn promotes to, 0 for none.
+        flag (int): NORMAL, DOUBLE_PUSH, CASTLE or EN_PASSANT.
+
+    Returns:
+        int: The move.
+    """
+    return start | end << 6 | promotion << 12 | flag << 15
+
+
+def move_start(packed):
+    return packed & 63
+
+
+def move_end(packed):
+    return packed >> 6 & 63
+
+
+def move_promotion(packed):
+    return packed >> 12 & 7
+
+
+def move_flag(packed):
+    return packed >> 15
+
+
+def uci(packed):
+    """A move in UCI notation, e.g. "e7e8q"."""
+    text = square_name(packed & 63) + square_name(packed >> 6 & 63)
+    promotion = packed >> 12 & 7
+    return text + _LETTERS[promotion] if promotion else text
+
+
+def _bits(board):
+    """The squares set in a bitboard, lowest first."""
+    while board:
+        low = board & -board
+        yield low.bit_length() - 1
+        board ^= low
+
+
+# -- attack tables, built once on import --------------------------------------
+
+def _step_table(steps):
+    table = []
+    for square in range(64):
+        file, rank = square & 7, square >> 3
+        board = 0
+        for df, dr in steps:
+            if 0 <= file + df < 8 and 0 <= rank + dr < 8:
+                board |= 1 << (file + df + 8 * (rank + dr))
+        table.append(board)
+    return table
+
+
+_KNIGHT = _step_table([(1, 2), (2, 1), (2, -1), (1, -2), (-1, -2), (-2, -1),
+                       (-2, 1), (-1, 2)])
+_KING = _step_table([(0, 1), (1, 1), (1, 0), (1, -1), (0, -1), (-1, -1),
+                     (-1, 0), (-1, 1)])
+_PAWN_ATTACKS = (_step_table([(-1, 1), (1, 1)]),
+                 _step_table([(-1, -1), (1, -1)]))
+
+# rays by direction, the first four going up the board (towards higher
+# squares), so their nearest blocker is the lowest bit, the rest going down
+_DIRECTIONS = [(0, 1), (1, 0), (1, 1), (-1, 1),
+               (0, -1), (-1, 0), (-1, -1), (1, -1)]
+_RAYS = []
+for _df, _dr in _DIRECTIONS:
+    _table = []
+    for _square in range(64):
+        _file, _rank = _square & 7, _square >> 3
+        _board = 0
+        while 0 <= _file + _df < 8 and 0 <= _rank + _dr < 8:
+            _file += _df
+            _rank += _dr
+            _board |= 1 << (_file + 8 * _rank)
+        _table.append(_board)
+    _RAYS.append(_table)
+_ROOK_DIRECTIONS = (0, 1, 4, 5)
+_BISHOP_DIRECTIONS = (2, 3, 6, 7)
+_ROOK_RAYS = [_RAYS[0][s] | _RAYS[1][s] | _RAYS[4][s] | _RAYS[5][s]
+              for s in range(64)]
+_BISHOP_RAYS = [_RAYS[2][s] | _RAYS[3][s] | _RAYS[6][s] | _RAYS[7][s]
+                for s in range(64)]
+
+# the squares strictly between two squares on a line, else 0
+_BETWEEN = [[0] * 64 for _ in range(64)]
+for _direction, _table in enumerate(_RAYS):
+    for _square in range(64):
+        for _other in _bits(_table[_square]):
+            _BETWEEN[_square][_other] = \
+                _table[_square] & ~_table[_other] & ~(1 << _other)
+
+# castling rights left after a move touches a square: K = 1, Q = 2, k = 4,
+# q = 8
+_CASTLE_MASK = [15] * 64
+_CASTLE_MASK[4] = 15 & ~3
+_CASTLE_MASK[7] = 15 & ~1
+_CASTLE_MASK[0] = 15 & ~2
+_CASTLE_MASK[60] = 15 & ~12
+_CASTLE_MASK[63] = 15 & ~4
+_CASTLE_MASK[56] = 15 & ~8
+
+# Zobrist keys: a position's key is the xor of a random number per piece on
+# each square, the side to move, the castling rights and the en passant
+# square, so a move updates it with a few xors
+_random = __import__("random").Random(20180401)
+_ZOBRIST = [[_random.getrandbits(64) for _ in range(64)] for _ in range(12)]
+_ZOBRIST_BLACK = _random.getrandbits(64)
+_ZOBRIST_CASTLING = [_random.getrandbits(64) for _ in range(16)]
+_ZOBRIST_EN_PASSANT = [_random.getrandbits(64) for _ in range(64)]
+
+
+def _slide(square, occupied, directions):
+    attacks = 0
+    for direction in directions:
+        ray = _RAYS[direction][square]
+        blockers = ray & occupied
+        if blockers:
+            if direction < 4:
+                blocker = (blockers & -blockers).bit_length() - 1
+            else:
+                blocker = blockers.bit_length() - 1
+            ray ^= _RAYS[direction][blocker]
+        attacks |= ray
+    return attacks
+
+
+def rook_attacks(square, occupied):
+    """The squares a rook on a square attacks given the occupied squares."""
+    return _slide(square, occupied, _ROOK_DIRECTIONS)
+
+
+def bishop_attacks(square, occupied):
+    """The squares a bishop on a square attacks given the occupied squares.
+    """
+    return _slide(square, occupied, _BISHOP_DIRECTIONS)
+
+
+class Board():
+    """A chess position with make/unmake and legal move generation.
+
+    Attributes:
+        pieces (list[int]): A bitboard per color and piece type, indexed by
+            color * 6 + piece type.
+        occupied (list[int]): A bitboard of each color's pieces.
+        squares (list[int]): The color * 6 + piece type on each square, -1
+            where empty.
+        turn (int): WHITE or BLACK, whoever moves next.
+        castling (int): The castling rights left, K = 1, Q = 2, k = 4,
+            q = 8.
+        en_passant (int): The square a pawn could capture en passant onto,
+            -1 if none.
+        halfmove_clock (int): Plies since a capture or pawn move.
+        fullmove_number (int): The move number, from 1.
+        key (int): The Zobrist hash of the position.
+    """
+
+    def __init__(self, fen=START_FEN):
+        self.load_fen(fen)
+
+    # -- fen ----------------------------------------------------------------
+
+    def load_fen(self, fen):
+        """Sets up the position from FEN, forgetting the moves made."""
+        fields = fen.split()
+        self.key = 0
+        self.pieces = [0] * 12
+        self.occupied = [0, 0]
+        self.squares = [-1] * 64
+        rank = 7
+        file = 0
+        for char in fields[0]:
+            if char == "/":
+                rank -= 1
+                file = 0
+            elif char.isdigit():
+                file += int(char)
+            else:
+                color = WHITE if char.isupper() else BLACK
+                self._put(color * 6 + _LETTERS.index(char.lower()),
+                          file + 8 * rank)
+                file += 1
+
+        self.turn = WHITE if len(fields) < 2 or fields[1] == "w" else BLACK
+        self.castling = 0
+        rights = fields[2] if len(fields) > 2 else "-"
+        for bit, char in zip((1, 2, 4, 8), "KQkq"):
+            if char in rights:
+                self.castling |= bit
+        self.en_passant = parse_square(fields[3]) \
+            if len(fields) > 3 and fields[3] != "-" else -1
+        self.halfmove_clock = int(fields[4]) if len(fields) > 4 else 0
+        self.fullmove_number = int(fields[5]) if len(fields) > 5 else 1
+        self.key ^= self._state_key()
+
+        self.moves = []
+        # the key before each move made, for repetitions
+        self.keys = []
+        self._undo = []
+        self._synced = None
+
+    def fen(self):
+        """The position in FEN."""
+        rows = []
+        for rank in range(7, -1, -1):
+            row = ""
+            empty = 0
+            for file in range(8):
+                piece = self.squares[file + 8 * rank]
+                if piece < 0:
+                    empty += 1
+                    continue
+                if empty:
+                    row += str(empty)
+                    empty = 0
+                letter = _LETTERS[piece % 6]
+                row += letter.upper() if piece < 6 else letter
+            rows.append(row + (str(empty) if empty else ""))
+        rights = "".join(char for bit, char in zip((1, 2, 4, 8), "KQkq")
+                         if self.castling & bit) or "-"
+        return "{} {} {} {} {} {}".format(
+            "/".join(rows), "wb"[self.turn], rights,
+            square_name(self.en_passant) if self.en_passant >= 0 else "-",
+            self.halfmove_clock, self.fullmove_number)
+
+    def sync(self, game):
+        """Brings the board up to the game's position, replaying the moves
+        added to game.history since the last sync, or loading game.fen when
+        the moves don't lead to it.
+
+        Args:
+            game (games.chess.game.Game): The game.
+        """
+        history = game.history
+        if self._synced is not None and len(history) >= self._synced:
+            try:
+                for san in history[self._synced:]:
+                    self.push_san(san)
+            except ValueError:
+                pass
+        if self.fen().split()[:4] != game.fen.split()[:4]:
+            self.load_fen(game.fen)
+        self._synced = len(history)
+
+    def state(self):
+        """The position as 17 ints: the 12 piece bitboards, then the turn,
+        castling rights, en passant square + 1 and the two clocks. Compact,
+        for sending to other processes (see joueur.parallel).
+        """
+        return self.pieces + [self.turn, self.castling, self.en_passant + 1,
+                              self.halfmove_clock, self.fullmove_number]
+
+    def load_state(self, values):
+        """Sets up the position from state(), forgetting the moves made.
+
+        Returns:
+            Board: This, for chaining.
+        """
+        values = [int(value) for value in values]
+        self.load_fen("8/8/8/8/8/8/8/8 w - - 0 1")
+        self.key = 0
+        for piece in range(12):
+            for square in _bits(values[piece]):
+                self._put(piece, square)
+        (self.turn, self.castling, en_passant, self.halfmove_clock,
+         self.fullmove_number) = values[12:]
+        self.en_passant = en_passant - 1
+        self.key ^= self._state_key()
+        return self
+
+    # -- making moves -------------------------------------------------------
+
+    def _put(self, piece, square):
+        bit = 1 << square
+        self.pieces[piece] |= bit
+        self.occupied[piece // 6] |= bit
+        self.squares[square] = piece
+        self.key ^= _ZOBRIST[piece][square]
+
+    def _remove(self, piece, square):
+        bit = 1 << square
+        self.pieces[piece] ^= bit
+        self.occupied[piece // 6] ^= bit
+        self.squares[square] = -1
+        self.key ^= _ZOBRIST[piece][square]
+
+    def _state_key(self):
+        """The part of the key that is not the pieces."""
+        key = _ZOBRIST_CASTLING[self.castling]
+        if self.turn == BLACK:
+            key ^= _ZOBRIST_BLACK
+        if self.en_passant >= 0:
+            key ^= _ZOBRIST_EN_PASSANT[self.en_passant]
+        return key
+
+    def push(self, packed):
+        """Makes a move, which must be legal in this position."""
+        start = packed & 63
+        end = packed >> 6 & 63
+        promotion = packed >> 12 & 7
+        flag = packed >> 15
+        us = self.turn
+        piece = self.squares[start]
+
+        if flag == EN_PASSANT:
+            taken_at = end - 8 if us == WHITE else end + 8
+        else:
+            taken_at = end
+        captured = self.squares[taken_at]
+        self._undo.append((packed, captured, self.castling, self.en_passant,
+                           self.halfmove_clock))
+        self.moves.append(packed)
+        self.keys.append(self.key)
+        self.key ^= self._state_key()
+
+        if captured >= 0:
+            self._remove(captured, taken_at)
+        self._remove(piece, start)
+        self._put(us * 6 + promotion if promotion else piece, end)
+        if flag == CASTLE:
+            if end > start:
+                self._remove(us * 6 + ROOK, end + 1)
+                self._put(us * 6 + ROOK, end - 1)
+            else:
+                self._remove(us * 6 + ROOK, end - 2)
+                self._put(us * 6 + ROOK, end + 1)
+
+        self.castling &= _CASTLE_MASK[start] & _CASTLE_MASK[end]
+        self.en_passant = (start + end) >> 1 if flag == DOUBLE_PUSH else -1
+        if captured >= 0 or piece % 6 == PAWN:
+            self.halfmove_clock = 0
+        else:
+            self.halfmove_clock += 1
+        if us == BLACK:
+            self.fullmove_number += 1
+        self.turn = us ^ 1
+        self.key ^= self._state_key()
+
+    def pop(self):
+        """Takes back the last move made.
+
+        Returns:
+            int: The move.
+        """
+        packed, captured, castling, en_passant, halfmove = self._undo.pop()
+        self.moves.pop()
+        key = self.keys.pop()
+        start = packed & 63
+        end = packed >> 6 & 63
+        promotion = packed >> 12 & 7
+        flag = packed >> 15
+        us = self.turn ^ 1
+
+        piece = self.squares[end]
+        self._remove(piece, end)
+        self._put(us * 6 + PAWN if promotion else piece, start)
+        if captured >= 0:
+            self._put(captured,
+                      (end - 8 if us == WHITE else end + 8)
+                      if flag == EN_PASSANT else end)
+        if flag == CASTLE:
+            if end > start:
+                self._remove(us * 6 + ROOK, end - 1)
+                self._put(us * 6 + ROOK, end + 1)
+            else:
+                self._remove(us * 6 + ROOK, end + 1)
+                self._put(us * 6 + ROOK, end - 2)
+
+        self.castling = castling
+        self.en_passant = en_passant
+        self.halfmove_clock = halfmove
+        if us == BLACK:
+            self.fullmove_number -= 1
+        self.turn = us
+        self.key = key
+        return packed
+
+    def is_repetition(self):
+        """If the position has been seen before since the last capture or
+        pawn move.
+        """
+        keys = self.keys
+        return self.key in keys[max(0, len(keys) - self.halfmove_clock):]
+
+    # -- attacks ------------------------------------------------------------
+
+    def attackers(self, square, color, occupied=None):
+        """The pieces of a color attacking a square, as a bitboard."""
+        if occupied is None:
+            occupied = self.occupied[0] | self.occupied[1]
+        pieces = self.pieces
+        base = color * 6
+        queens = pieces[base + QUEEN]
+        return (_PAWN_ATTACKS[color ^ 1][square] & pieces[base + PAWN]) | \
+            (_KNIGHT[square] & pieces[base + KNIGHT]) | \
+            (_KING[square] & pieces[base + KING]) | \
+            (bishop_attacks(square, occupied) &
+             (pieces[base + BISHOP] | queens)) | \
+            (rook_attacks(square, occupied) & (pieces[base + ROOK] | queens))
+
+    def king_square(self, color):
+        king = self.pieces[color * 6 + KING]
+        return (king & -king).bit_length() - 1
+
+    def in_check(self, color=None):
+        """If a color's (the side to move's by default) king is attacked."""
+        if color is None:
+            color = self.turn
+        return bool(self.attackers(self.king_square(color), color ^ 1))
+
+    # -- move generation ----------------------------------------------------
+
+    def pseudo_legal_moves(self, captures_only=False):
+        """Every move that follows the pieces' movement rules, some of which
+        may leave the king in check.
+        """
+        us = self.turn
+        them = us ^ 1
+        pieces = self.pieces
+        own = self.occupied[us]
+        enemy = self.occupied[them]
+        occupied = own | enemy
+        empty = ~occupied & _FULL
+        targets = enemy if captures_only else ~own & _FULL
+        moves = []
+        add = moves.append
+
+        # pawns, all at once by shifting the whole bitboard
+        pawns = pieces[us * 6 + PAWN]
+        if us == WHITE:
+            forward, last_rank, start_rank = 8, _RANK_8, _RANK_3
+            single = (pawns << 8) & empty
+            double = ((single & start_rank) << 8) & empty
+            left = (pawns << 7) & enemy & ~_FILE_H
+            right = (pawns << 9) & enemy & ~_FILE_A
+        else:
+            forward, last_rank, start_rank = -8, _RANK_1, _RANK_6
+            single = (pawns >> 8) & empty
+            double = ((single & start_rank) >> 8) & empty
+            left = (pawns >> 9) & enemy & ~_FILE_H
+            right = (pawns >> 7) & enemy & ~_FILE_A
+        if captures_only:
+            single &= last_rank
+            double = 0
+        for board, back in ((single, forward), (left, forward - 1),
+                            (right, forward + 1)):
+            for end in _bits(board & ~last_rank):
+                add(end - back | end << 6)
+            for end in _bits(board & last_rank):
+                for promotion in (QUEEN, KNIGHT, ROOK, BISHOP):
+                    add(end - back | end << 6 | promotion << 12)
+        for end in _bits(double):
+            add(end - 2 * forward | end << 6 | DOUBLE_PUSH << 15)
+        if self.en_passant >= 0:
+            for start in _bits(_PAWN_ATTACKS[them][self.en_passant] & pawns):
+                add(start | self.en_passant << 6 | EN_PASSANT << 15)
+
+        for piece, table in ((KNIGHT, _KNIGHT), (KING, _KING)):
+            for start in _bits(pieces[us * 6 + piece]):
+                for end in _bits(table[start] & targets):
+                    add(start | end << 6)
+        for piece, directions in ((BISHOP, _BISHOP_DIRECTIONS),
+                                  (ROOK, _ROOK_DIRECTIONS),
+                                  (QUEEN, _BISHOP_DIRECTIONS +
+                                   _ROOK_DIRECTIONS)):
+            for start in _bits(pieces[us * 6 + piece]):
+                for end in _bits(_slide(start, occupied, directions) &
+                                 targets):
+                    add(start | end << 6)
+
+        if not captures_only and self.castling:
+            self._castling_moves(us, occupied, add)
+        return moves
+
+    def _castling_moves(self, us, occupied, add):
+        king = 4 if us == WHITE else 60
+        rights = self.castling >> (2 * us)
+        if not rights & 3 or self.squares[king] != us * 6 + KING:
+            return
+        them = us ^ 1
+        if self.attackers(king, them, occupied):
+            return
+        if rights & 1 and not occupied & (3 << (king + 1)) and \
+                self.squares[king + 3] == us * 6 + ROOK and \
+                not self.attackers(king + 1, them, occupied) and \
+                not self.attackers(king + 2, them, occupied):
+            add(king | (king + 2) << 6 | CASTLE << 15)
+        if rights & 2 and not occupied & (7 << (king - 3)) and \
+                self.squares[king - 4] == us * 6 + ROOK and \
+                not self.attackers(king - 1, them, occupied) and \
+                not self.attackers(king - 2, them, occupied):
+            add(king | (king - 2) << 6 | CASTLE << 15)
+
+    def _pinned(self, us):
+        """Our pieces pinned to our king, as a bitboard."""
+        king = self.king_square(us)
+        them = us ^ 1
+        pieces = self.pieces
+        occupied = self.occupied[0] | self.occupied[1]
+        queens = pieces[them * 6 + QUEEN]
+        snipers = (_ROOK_RAYS[king] & (pieces[them * 6 + ROOK] | queens)) | \
+            (_BISHOP_RAYS[king] & (pieces[them * 6 + BISHOP] | queens))
+        pinned = 0
+        for sniper in _bits(snipers):
+            between = _BETWEEN[king][sniper] & occupied
+            if between and not between & (between - 1):
+                pinned |= between & self.occupied[us]
+        return pinned
+
+    def legal_moves(self, captures_only=False):
+        """Every legal move.
+
+        Only moves that could expose the king (king moves, moves of pinned
+        pieces, en passant and any move while in check) are tried out to
+        see that they do not.
+
+        Args:
+            captures_only (bool): Only generate captures and promotions,
+                as a quiescence search wants.
+
+        Returns:
+            list[int]: The moves.
+        """
+        us = self.turn
+        king = self.king_square(us)
+        risky = self._pinned(us) | (1 << king)
+        check = self.attackers(king, us ^ 1)
+        legal = []
+        for packed in self.pseudo_legal_moves(captures_only):
+            if check or (1 << (packed & 63)) & risky or \
+                    packed >> 15 == EN_PASSANT:
+                self.push(packed)
+                exposed = self.attackers(self.king_square(us), us ^ 1)
+                self.pop()
+                if exposed:
+                    continue
+            legal.append(packed)
+        return legal
+
+    # -- notation -----------------------------------------------------------
+
+    def san(self, packed, legal=None):
+        """A legal move in Standard Algebraic Notation, e.g. "Nbd7+"."""
+        start = packed & 63
+        end = packed >> 6 & 63
+        promotion = packed >> 12 & 7
+        piece = self.squares[start] % 6
+        if packed >> 15 == CASTLE:
+            text = "O-O" if end > start else "O-O-O"
+        else:
+            capture = self.squares[end] >= 0 or packed >> 15 == EN_PASSANT
+            if piece == PAWN:
+                text = _FILES[start & 7] if capture else ""
+            else:
+                text = _LETTERS[piece].upper()
+                if legal is None:
+                    legal = self.legal_moves()
+                rivals = [other & 63 for other in legal
+                          if other >> 6 & 63 == end and other & 63 != start
+                          and self.squares[other & 63] % 6 == piece]
+                if rivals:
+                    if all(rival & 7 != start & 7 for rival in rivals):
+                        text += _FILES[start & 7]
+                    elif all(rival >> 3 != start >> 3 for rival in rivals):
+                        text += str((start >> 3) + 1)
+                    else:
+                        text += square_name(start)
+            if capture:
+                text += "x"
+            text += square_name(end)
+            if promotion:
+                text += "=" + _LETTERS[promotion].upper()
+        self.push(packed)
+        if self.in_check():
+            text += "#" if not self.legal_moves() else "+"
+        self.pop()
+        return text
+
+    def parse_san(self, text):
+        """The legal move some SAN (or UCI) names.
+
+        Raises:
+            ValueError: If it names no legal move.
+        """
+        legal = self.legal_moves()
+        for packed in legal:
+            if uci(packed) == text:
+                return packed
+        wanted = text.replace("0", "O").rstrip("+#!?")
+        for packed in legal:
+            if self.san(packed, legal).rstrip("+#") == wanted:
+                return packed
+        raise ValueError("'{}' is not a legal move in {}".format(
+            text, self.fen()))
+
+    def push_san(self, text):
+        """Makes the move some SAN (or UCI) names."""
+        packed = self.parse_san(text)
+        self.push(packed)
+        return packed
+
+    # -- testing ------------------------------------------------------------
+
+    def perft(self, depth):
+        """Counts the leaf positions of every legal line depth plies deep,
+        which known counts check the move generator against.
+        """
+        moves = self.legal_moves()
+        if depth <= 1:
+            return len(moves) if depth == 1 else 1
+        count = 0
+        for packed in moves:
+            self.push(packed)
+            count += self.perft(depth - 1)
+            self.pop()
+        return count
+
+
+# positions and their known perft counts by depth, from the Chess
+# Programming Wiki, covering castling, en passant, promotions and pins
+PERFT_SUITE = [
+    (START_FEN, [20, 400, 8902, 197281]),
+    ("r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1",
+     [48, 2039, 97862]),
+    ("8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1", [14, 191, 2812, 43238]),
+    ("r3k2r/Pppp1ppp/1b3nbN/nP6/BBP1P3/q4N2/Pp1P2PP/R2Q1RK1 w kq - 0 1",
+     [6, 264, 9467]),
+    ("rnbq1k1r/pp1Pbppp/2p5/8/2B5/8/PPP1NnPP/RNBQK2R w KQ - 1 8",
+     [44, 1486, 62379]),
+    ("r4rk1/1pp1qppp/p1np1n2/2b1p1B1/2B1P1b1/P1NP1N2/1PP1QPPP/R4RK1 w - - "
+     "0 10",
+     [46, 2079, 89890]),
+]
+
+
+def run_perft_suite(max_depth=3, verbose=True):
+    """Checks perft counts of the PERFT_SUITE positions up to a depth.
+
+    Returns:
+        bool: True if every count matched.
+    """
+    import time
+
+    passed = True
+    for fen, counts in PERFT_SUITE:
+        board = Board(fen)
+        for depth, expected in enumerate(counts[:max_depth], 1):
+            began = time.perf_counter()
+            found = board.perft(depth)
+            seconds = time.perf_counter() - began
+            ok = found == expected
+            passed = passed and ok
+            if verbose:
+                print("{} depth {}: {} {} ({:.0f} nodes/s)".format(
+                    "ok  " if ok else "FAIL", depth, found,
+                    "" if ok else "expected {}".format(expected),
+                    found / seconds if seconds else 0))
+        if board.fen() != Board(fen).fen():
+            passed = False
+            if verbose:
+                print("FAIL position changed after perft: " + fen)
+    return passed
+
+
+def benchmark(seconds=5.0):
+    """Measures move generation speed as perft nodes per second over the
+    PERFT_SUITE positions.
+
+    Returns:
+        float: Nodes per second.
+    """
+    import time
+
+    nodes = 0
+    began = time.perf_counter()
+    while time.perf_counter() - began < seconds:
+        for fen, _ in PERFT_SUITE:
+            nodes += Board(fen).perft(3)
+    return nodes / (time.perf_counter() - began)
+
@@ -0,0 +1,426 @@
+# Move search for the Chess AI: iterative deepening alpha-beta over the
+# bitboard Board, with a Zobrist keyed transposition table, killer and
+# history move ordering, searching until the deadline the AI's Clock (see
+# joueur.timing) gives each move.
+#
+#     searcher = Searcher(table_megabytes=32)
+#     board.sync(self.game)
+#     best = searcher.choose_move(board, self.clock.deadline)
+#     print(searcher.last)  # depth, nodes, nodes per second, ...
+
+import time
+
+from games.chess.bitboard import BISHOP, KING, KNIGHT, PAWN, QUEEN, ROOK, \
+    WHITE, uci
+
+INFINITY = 1000000
+MATE = 100000
+# scores beyond this are mates, stored in the table relative to the node
+_MATE_BOUND = MATE - 1000
+
+EXACT, LOWER, UPPER = range(3)
+
+_VALUES = [100, 320, 330, 500, 900, 0]
+
+# piece square tables from white's side, a8 first so they read like a board
+_TABLES = {
+    PAWN: [
+        0, 0, 0, 0, 0, 0, 0, 0,
+        50, 50, 50, 50, 50, 50, 50, 50,
+        10, 10, 20, 30, 30, 20, 10, 10,
+        5, 5, 10, 25, 25, 10, 5, 5,
+        0, 0, 0, 20, 20, 0, 0, 0,
+        5, -5, -10, 0, 0, -10, -5, 5,
+        5, 10, 10, -20, -20, 10, 10, 5,
+        0, 0, 0, 0, 0, 0, 0, 0],
+    KNIGHT: [
+        -50, -40, -30, -30, -30, -30, -40, -50,
+        -40, -20, 0, 0, 0, 0, -20, -40,
+        -30, 0, 10, 15, 15, 10, 0, -30,
+        -30, 5, 15, 20, 20, 15, 5, -30,
+        -30, 0, 15, 20, 20, 15, 0, -30,
+        -30, 5, 10, 15, 15, 10, 5, -30,
+        -40, -20, 0, 5, 5, 0, -20, -40,
+        -50, -40, -30, -30, -30, -30, -40, -50],
+    BISHOP: [
+        -20, -10, -10, -10, -10, -10, -10, -20,
+        -10, 0, 0, 0, 0, 0, 0, -10,
+        -10, 0, 5, 10, 10, 5, 0, -10,
+        -10, 5, 5, 10, 10, 5, 5, -10,
+        -10, 0, 10, 10, 10, 10, 0, -10,
+        -10, 10, 10, 10, 10, 10, 10, -10,
+        -10, 5, 0, 0, 0, 0, 5, -10,
+        -20, -10, -10, -10, -10, -10, -10, -20],
+    ROOK: [
+        0, 0, 0, 0, 0, 0, 0, 0,
+        5, 10, 10, 10, 10, 10, 10, 5,
+        -5, 0, 0, 0, 0, 0, 0, -5,
+        -5, 0, 0, 0, 0, 0, 0, -5,
+        -5, 0, 0, 0, 0, 0, 0, -5,
+        -5, 0, 0, 0, 0, 0, 0, -5,
+        -5, 0, 0, 0, 0, 0, 0, -5,
+        0, 0, 0, 5, 5, 0, 0, 0],
+    QUEEN: [
+        -20, -10, -10, -5, -5, -10, -10, -20,
+        -10, 0, 0, 0, 0, 0, 0, -10,
+        -10, 0, 5, 5, 5, 5, 0, -10,
+        -5, 0, 5, 5, 5, 5, 0, -5,
+        0, 0, 5, 5, 5, 5, 0, -5,
+        -10, 5, 5, 5, 5, 5, 0, -10,
+        -10, 0, 5, 0, 0, 0, 0, -10,
+        -20, -10, -10, -5, -5, -10, -10, -20],
+    KING: [
+        -30, -40, -40, -50, -50, -40, -40, -30,
+        -30, -40, -40, -50, -50, -40, -40, -30,
+        -30, -40, -40, -50, -50, -40, -40, -30,
+        -30, -40, -40, -50, -50, -40, -40, -30,
+        -20, -30, -30, -40, -40, -30, -30, -20,
+        -10, -20, -20, -20, -20, -20, -20, -10,
+        20, 20, 0, 0, 0, 0, 20, 20,
+        20, 30, 10, 0, 0, 10, 30, 20],
+}
+
+# the value of each piece (color * 6 + type) on each square, from white's
+# side, so evaluate() is one lookup per piece
+_SQUARE_VALUES = []
+for _color in (0, 1):
+    for _piece in range(6):
+        _SQUARE_VALUES.append([
+            (_VALUES[_piece] + _TABLES[_piece][
+                (7 - (square >> 3)) * 8 + (square & 7) if _color == WHITE
+                else (square >> 3) * 8 + (square & 7)]) *
+            (1 if _color == WHITE else -1)
+            for square in range(64)])
+
+
+def evaluate(board):
+    """A static score of the position for the side to move, in centipawns.
+    """
+    score = 0
+    values = _SQUARE_VALUES
+    for square, piece in enumerate(board.squares):
+        if piece >= 0:
+            score += values[piece][square]
+    return score if board.turn == WHITE else -score
+
+
+class TranspositionTable():
+    """Scores of searched positions by Zobrist key, in a fixed number of
+    slots so its memory is bounded.
+
+    Replacement policies, for when two positions want the same slot:
+        "depth": keep the deeper searched entry, unless it is left over
+            from an earlier move's search.
+        "always": the newest entry wins.
+    """
+
+    # about what one entry (a tuple of small ints in a list slot) costs
+    ENTRY_BYTES = 160
+
+    def __init__(self, megabytes=16, replacement="depth"):
+        """Creates an empty table.
+
+        Args:
+            megabytes (float): About how much memory the table may use.
+            replacement (str): "depth" or "always".
+        """
+        if replacement not in ("depth", "always"):
+            raise ValueError("Unknown replacement policy '{}'".format(
+                replacement))
+        self.size = max(1024, int(megabytes * 2 ** 20) // self.ENTRY_BYTES)
+        self.replacement = replacement
+        self.entries = [None] * self.size
+        self.age = 0
+
+        self.probes = 0
+        self.hits = 0
+        self.overwrites = 0
+
+    def new_search(self):
+        """Marks every entry as from an earlier search, for replacement."""
+        self.age += 1
+        self.probes = self.hits = self.overwrites = 0
+
+    def probe(self, key):
+        """The (depth, score, flag, move) stored for a key, or None."""
+        self.probes += 1
+        entry = self.entries[key % self.size]
+        if entry is not None and entry[0] == key:
+            self.hits += 1
+            return entry[1:5]
+        return None
+
+    def store(self, key, depth, score, flag, move):
+        """Stores a search result, if the replacement policy allows."""
+        slot = key % self.size
+        old = self.entries[slot]
+        if old is not None and old[0] != key:
+            if self.replacement == "depth" and old[5] == self.age and \
+                    old[1] > depth:
+                return
+            self.overwrites += 1
+        self.entries[slot] = (key, depth, score, flag, move, self.age)
+
+
+class _OutOfTime(Exception):
+    pass
+
+
+class Searcher():
+    """Finds moves by iterative deepening alpha-beta search.
+
+    Attributes:
+        last (dict): Telemetry of the last search: the depth completed,
+            nodes searched, seconds taken, nodes per second, score, best
+            move and principal variation (in UCI), and table hit rate.
+        log (list[dict]): The telemetry of every search this game.
+    """
+
+    def __init__(self, table_megabytes=16, replacement="depth",
+                 max_depth=64):
+        """Creates a searcher with an empty transposition table.
+
+        Args:
+            table_megabytes (float): The transposition table's memory.
+            replacement (str): Its replacement policy, see
+                TranspositionTable.
+            max_depth (int): The deepest iteration to search.
+        """
+        self.table = TranspositionTable(table_megabytes, replacement)
+        self.max_depth = max_depth
+        self.last = {}
+        self.log = []
+
+        self._killers = []
+        self._history = [[0] * 64 for _ in range(12)]
+        self._deadline = None
+        self.nodes = 0
+
+    def choose_move(self, board, deadline):
+        """Searches for the best move until the move's deadline.
+
+        Args:
+            board (Board): The position, synced to the game.
+            deadline (float): The time.perf_counter() to be done by, the
+                AI's clock.deadline.
+
+        Returns:
+            int: The best move found, 0 if there are no legal moves.
+        """
+        return self.search(board, deadline=deadline)
+
+    def search(self, board, seconds=None, depth=None, deadline=None):
+        """Searches deeper and deeper until out of time or depth.
+
+        Args:
+            board (Board): The position, left as it was.
+            seconds (float): How long to search, None for no limit.
+            depth (int): The deepest iteration, defaults to max_depth.
+            deadline (float): A time.perf_counter() to stop by instead of
+                after seconds.
+
+        Returns:
+            int: The best move found, 0 if there are no legal moves.
+        """
+        began = time.perf_counter()
+        if deadline is None and seconds is not None:
+            deadline = began + seconds
+        self._deadline = deadline
+        self.nodes = 0
+        self.table.new_search()
+        self._killers = [[0, 0] for _ in range(self.max_depth + 64)]
+        for row in self._history:
+            for square in range(64):
+                row[square] >>= 2
+
+        moves = board.legal_moves()
+        best, score, completed = (moves[0] if moves else 0), 0, 0
+        for iteration in range(1, (depth or self.max_depth) + 1):
+            if not moves:
+                break
+            try:
+                score, found = self._root(board, moves, iteration)
+            except _OutOfTime:
+                break
+            best, completed = found, iteration
+            # search the best move first next time
+            moves.remove(best)
+            moves.insert(0, best)
+            if abs(score) > _MATE_BOUND:
+                break
+            # another iteration takes several times as long as the last,
+            # so don't start one that won't finish
+            if self._deadline is not None and time.perf_counter() + 2 * (
+                    time.perf_counter() - began) > self._deadline:
+                break
+
+        elapsed = time.perf_counter() - began
+        self.last = {
+            "depth": completed,
+            "nodes": self.nodes,
+            "seconds": elapsed,
+            "nps": self.nodes / elapsed if elapsed else 0.0,
+            "score": score,
+            "move": uci(best) if best else "",
+            "pv": [uci(packed) for packed in self.principal_variation(
+                board, completed)],
+            "table_hits": self.table.hits / max(1, self.table.probes),
+        }
+        self.log.append(self.last)
+        return best
+
+    def principal_variation(self, board, depth):
+        """The line of best moves the table holds from a position."""
+        line = []
+        for _ in range(depth):
+            entry = self.table.probe(board.key)
+            if entry is None or not entry[3] or \
+                    entry[3] not in board.legal_moves():
+                break
+            line.append(entry[3])
+            board.push(entry[3])
+        for _ in line:
+            board.pop()
+        return line
+
+    def _root(self, board, moves, depth):
+        alpha = -INFINITY
+        best = moves[0]
+        for packed in moves:
+            board.push(packed)
+            try:
+                score = -self._negamax(board, depth - 1, -INFINITY, -alpha, 1)
+            finally:
+                board.pop()
+            if score > alpha:
+                alpha, best = score, packed
+        self.table.store(board.key, depth, alpha, EXACT, best)
+        return alpha, best
+
+    def _tick(self):
+        self.nodes += 1
+        if not self.nodes & 1023 and self._deadline is not None and \
+                time.perf_counter() > self._deadline:
+            raise _OutOfTime()
+
+    def _negamax(self, board, depth, alpha, beta, ply):
+        self._tick()
+        if board.halfmove_clock >= 100 or board.is_repetition():
+            return 0
+
+        checked = board.in_check()
+        if checked:
+            depth += 1
+        if depth <= 0:
+            return self._quiesce(board, alpha, beta, ply)
+
+        original_alpha = alpha
+        table_move = 0
+        entry = self.table.probe(board.key)
+        if entry is not None:
+            entry_depth, score, flag, table_move = entry
+            if entry_depth >= depth:
+                if score > _MATE_BOUND:
+                    score -= ply
+                elif score < -_MATE_BOUND:
+                    score += ply
+                if flag == EXACT:
+                    return score
+                if flag == LOWER and score >= beta:
+                    return score
+                if flag == UPPER and score <= alpha:
+                    return score
+
+        moves = board.legal_moves()
+        if not moves:
+            return -MATE + ply if checked else 0
+
+        best, best_move = -INFINITY, 0
+        for packed in self._order(board, moves, table_move, ply):
+            board.push(packed)
+            try:
+                score = -self._negamax(board, depth - 1, -beta, -alpha,
+                                       ply + 1)
+            finally:
+                board.pop()
+            if score > best:
+                best, best_move = score, packed
+                if score > alpha:
+                    alpha = score
+                    if alpha >= beta:
+                        self._cutoff(board, packed, depth, ply)
+                        break
+
+        if best <= original_alpha:
+            flag = UPPER
+        elif best >= beta:
+            flag = LOWER
+        else:
+            flag = EXACT
+        stored = best
+        if best > _MATE_BOUND:
+            stored += ply
+        elif best < -_MATE_BOUND:
+            stored -= ply
+        self.table.store(board.key, depth, stored, flag, best_move)
+        return best
+
+    def _quiesce(self, board, alpha, beta, ply):
+        """Searches captures only, so the static evaluation is never taken
+        in the middle of an exchange.
+        """
+        self._tick()
+        standing = evaluate(board)
+        if standing >= beta:
+            return standing
+        if standing > alpha:
+            alpha = standing
+        for packed in self._order(board, board.legal_moves(True), 0, ply):
+            board.push(packed)
+            try:
+                score = -self._quiesce(board, -beta, -alpha, ply + 1)
+            finally:
+                board.pop()
+            if score >= beta:
+                return score
+            if score > alpha:
+                alpha = score
+        return alpha
+
+    def _order(self, board, moves, table_move, ply):
+        """Sorts moves best first: the table's move, captures by most
+        valuable victim then least valuable attacker, promotions, the
+        killers of this ply, then quiet moves by history.
+        """
+        squares = board.squares
+        killers = self._killers[ply]
+        history = self._history
+
+        def rank(packed):
+            if packed == table_move:
+                return 10 ** 9
+            victim = squares[packed >> 6 & 63]
+            piece = squares[packed & 63]
+            if victim >= 0:
+                return 10 ** 8 + _VALUES[victim % 6] * 10 - \
+                    _VALUES[piece % 6] // 10
+            if packed >> 12 & 7:
+                return 10 ** 8 - 1 + (packed >> 12 & 7)
+            if packed == killers[0]:
+                return 10 ** 7 + 1
+            if packed == killers[1]:
+                return 10 ** 7
+            return history[piece][packed >> 6 & 63]
+
+        return sorted(moves, key=rank, reverse=True)
+
+    def _cutoff(self, board, packed, depth, ply):
+        """Remembers a quiet move that caused a beta cutoff."""
+        if board.squares[packed >> 6 & 63] >= 0 or packed >> 12 & 7:
+            return
+        killers = self._killers[ply]
+        if killers[0] != packed:
+            killers[1] = killers[0]
+            killers[0] = packed
+        piece = board.squares[packed & 63]
+        self._history[piece][packed >> 6 & 63] += depth * depth
@@ -0,0 +1,27 @@
+# Checks and benchmarks the Chess AI's bitboard move generator, from the
+# command line:
+#
+#     python -m games.chess.validate perft       # check against known counts
+#     python -m games.chess.validate bench       # nodes per second
+#
+# This is its own module, not bitboard.py's __main__, as games.chess imports
+# bitboard.py (through the AI) before python -m could run it.
+
+from games.chess.bitboard import benchmark, run_perft_suite
+
+if __name__ == "__main__":
+    import argparse
+    import sys
+
+    parser = argparse.ArgumentParser(
+        description="Checks and benchmarks the bitboard move generator.")
+    parser.add_argument("command", choices=["perft", "bench"])
+    parser.add_argument("--depth", type=int, default=3,
+                        help="the deepest perft to check")
+    parser.add_argument("--seconds", type=float, default=5.0,
+                        help="how long to benchmark for")
+    args = parser.parse_args()
+
+    if args.command == "perft":
+        sys.exit(0 if run_perft_suite(args.depth) else 1)
+    print("{:.0f} nodes/s".format(benchmark(args.seconds)))
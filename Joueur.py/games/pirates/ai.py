@@ -1,6 +1,7 @@
 # This is where you build your AI for the Pirates game.
 
 from joueur.base_ai import BaseAI
+import joueur.pathfinding
 
 # <<-- Creer-Merge: imports -->> - Code you add between this comment and the end comment will be preserved between Creer re-runs.
 # you can add additional import(s) here
@@ -75,67 +76,32 @@ class AI(BaseAI):
         return True
         # <<-- /Creer-Merge: runTurn -->>
 
-    def find_path(self, start, goal):
-        """A very basic path finding algorithm (Breadth First Search) that when
-            given a starting Tile, will return a valid path to the goal Tile.
+    def find_path(self, start, goal, passable=None, cost=None,
+                  algorithm="bfs", stats=None):
+        """A path finding algorithm (Breadth First Search by default) that
+            when given a starting Tile, will return a valid path to the goal
+            Tile.
 
         Args:
             start (games.pirates.tile.Tile): the starting Tile
             goal (games.pirates.tile.Tile): the goal Tile
+            passable (function): optional, takes a Tile and returns if the
+                path may go through it, Tile.is_pathable by default
+            cost (function): optional, takes a Tile and returns the cost of
+                stepping onto it (or None if it can't be), used by "astar"
+                and "dijkstra"
+            algorithm (str): "bfs", "astar" (Manhattan distance guided),
+                "dijkstra", "jps" (Jump Point Search, for open maps) or "hpa"
+                (hierarchical, near shortest, for many searches on big maps)
+            stats (dict): optional, given the nodes "expanded" by the search
+                and the "seconds" it took
         Returns:
             list[games.pirates.tile.Tile]: A list of Tiles
             representing the path, the the first element being a valid adjacent
             Tile to the start, and the last element being the goal.
         """
-
-        if start == goal:
-            # no need to make a path to here...
-            return []
-
-        # queue of the tiles that will have their neighbors searched for 'goal'
-        fringe = []
-
-        # How we got to each tile that went into the fringe.
-        came_from = {}
-
-        # Enqueue start as the first tile to have its neighbors searched.
-        fringe.append(start)
-
-        # keep exploring neighbors of neighbors... until there are no more.
-        while len(fringe) > 0:
-            # the tile we are currently exploring.
-            inspect = fringe.pop(0)
-
-            # cycle through the tile's neighbors.
-            for neighbor in inspect.get_neighbors():
-                # if we found the goal, we have the path!
-                if neighbor == goal:
-                    # Follow the path backward to the start from the goal and
-                    # # return it.
-                    path = [goal]
-
-                    # Starting at the tile we are currently at, insert them
-                    # retracing our steps till we get to the starting tile
-                    while inspect != start:
-                        path.insert(0, inspect)
-                        inspect = came_from[inspect.id]
-                    return path
-                # else we did not find the goal, so enqueue this tile's
-                # neighbors to be inspected
-
-                # if the tile exists, has not been explored or added to the
-                # fringe yet, and it is pathable
-                if neighbor and neighbor.id not in came_from and (
-                    neighbor.is_pathable()
-                ):
-                    # add it to the tiles to be explored and add where it came
-                    # from for path reconstruction.
-                    fringe.append(neighbor)
-                    came_from[neighbor.id] = inspect
-
-        # if you're here, that means that there was not a path to get to where
-        # you want to go; in that case, we'll just return an empty path.
-        return []
+        return joueur.pathfinding.find_path(
+            self.game, start, goal, passable, cost, algorithm, stats)
 
     # <<-- Creer-Merge: functions -->> - Code you add between this comment and the end comment will be preserved between Creer re-runs.
     # if you need additional functions for your AI you can add them here
@@ -147,7 +147,8 @@ class Tile(GameObject):
             bool: True if pathable, False otherwise
         """
         # <<-- Creer-Merge: is_pathable_builtin -->> - Code you add between this comment and the end comment will be preserved between Creer re-runs.
-        return false  # DEVELOPER ADD LOGIC HERE
+        # Tiles with a Unit or Port on them can't be moved onto
+        return self.unit is None and self.port is None
         # <<-- /Creer-Merge: is_pathable_builtin -->>
 
     def has_neighbor(self, tile):
@@ -157,7 +158,8 @@ class Tile(GameObject):
         Returns:
             bool: True if the tile is a neighbor of this Tile, False otherwise
         """
-        return bool(tile and tile in self.get_neighbors())
+        # neighbors are exactly the Tiles one step away
+        return bool(tile) and abs(self.x - tile.x) + abs(self.y - tile.y) == 1
 
     # <<-- Creer-Merge: functions -->> - Code you add between this comment and the end comment will be preserved between Creer re-runs.
     # if you want to add any client side logic (such as state checking functions) this is where you can add them
@@ -156,7 +156,9 @@ class Tile(GameObject):
             bool: True if pathable, False otherwise
         """
         # <<-- Creer-Merge: is_pathable_builtin -->> - Code you add between this comment and the end comment will be preserved between Creer re-runs.
-        return false  # DEVELOPER ADD LOGIC HERE
+        # Cowboys can't move onto balconies, furnishings or other Cowboys
+        return not self.is_balcony and self.furnishing is None and (
+            self.cowboy is None)
         # <<-- /Creer-Merge: is_pathable_builtin -->>
 
     def has_neighbor(self, tile):
@@ -166,7 +168,8 @@ class Tile(GameObject):
         Returns:
             bool: True if the tile is a neighbor of this Tile, False otherwise
         """
-        return bool(tile and tile in self.get_neighbors())
+        # neighbors are exactly the Tiles one step away
+        return bool(tile) and abs(self.x - tile.x) + abs(self.y - tile.y) == 1
 
     # <<-- Creer-Merge: functions -->> - Code you add between this comment and the end comment will be preserved between Creer re-runs.
     # if you want to add any client side logic (such as state checking functions) this is where you can add them
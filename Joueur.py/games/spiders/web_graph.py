@@ -0,0 +1,217 @@
+# The Spiders map as a graph: Nests joined by Webs, which Spiderlings cross
+# at the game's movement_speed.
+#
+# WebGraph keeps the adjacency of every Nest up to date from the deltas, as
+# Webs are spit and snap or are cut, instead of rebuilding it from game.webs
+# each turn. On top of it are time weighted shortest paths, all pairs travel
+# times (kept until a Web appears or disappears) and routing that won't send
+# Spiderlings onto a Web their weight would snap.
+
+import heapq
+import math
+
+import numpy as np
+
+
+class WebGraph():
+    """An index of which Webs join which Nests, kept in sync with the game.
+
+        graph = WebGraph(self.game)
+        path = graph.find_path(spiderling.nest, target, weight=1)
+        if path:
+            graph.reserve(path[:1])
+            spiderling.move(path[0])
+
+    Times are in turns, a Web taking travel_time(web) turns to cross.
+    """
+
+    def __init__(self, game):
+        """Indexes the Webs of a game whose Nests have been sent.
+
+        Args:
+            game (games.spiders.game.Game): The game.
+        """
+        self.game = game
+        # Nest -> {Web: the Nest at its other end}
+        self.adjacency = {}
+        # bumped each time a Web is added or removed
+        self.version = 0
+        # the load each Web will carry once Spiderlings reserved onto it this
+        # turn start moving, by Web
+        self.planned = {}
+
+        # Web -> (nest_a, nest_b) of every indexed Web, remembered as a Web's
+        # Nests may be gone by the time it is removed
+        self._ends = {}
+        self._dirty = True
+        self._matrix = None
+        self._planned_turn = None
+        game.add_delta_listener(self._delta_merged)
+
+    def _delta_merged(self, delta):
+        if "webs" in delta or "nests" in delta:
+            self._dirty = True
+            return
+        game_objects = self.game.game_objects
+        for id, changes in delta.get("gameObjects", {}).items():
+            obj = game_objects.get(id)
+            if obj is not None and obj.game_object_name == "Web" and \
+                    isinstance(changes, dict) and \
+                    ("nestA" in changes or "nestB" in changes):
+                self._dirty = True
+                return
+
+    def refresh(self):
+        """Adds and removes the Webs that changed since the last refresh.
+
+        Returns:
+            WebGraph: This, for chaining.
+        """
+        if not self._dirty:
+            return self
+        self._dirty = False
+
+        current = set(web for web in self.game.webs
+                      if web.nest_a is not None and web.nest_b is not None)
+        for nest in self.game.nests:
+            self.adjacency.setdefault(nest, {})
+        removed = [web for web in self._ends if web not in current]
+        added = [web for web in current if web not in self._ends]
+        for web in removed:
+            for nest in self._ends.pop(web):
+                self.adjacency[nest].pop(web, None)
+        for web in added:
+            self._ends[web] = (web.nest_a, web.nest_b)
+            self.adjacency.setdefault(web.nest_a, {})[web] = web.nest_b
+            self.adjacency.setdefault(web.nest_b, {})[web] = web.nest_a
+        if removed or added:
+            self.version += 1
+            self._matrix = None
+        return self
+
+    def travel_time(self, web):
+        """How many turns a Spiderling takes to cross a Web."""
+        return max(1, math.ceil(web.length / self.game.movement_speed))
+
+    def capacity(self, web):
+        """How much more weight a Web can take this turn before it snaps,
+        less what has been reserved onto it.
+        """
+        self._start_turn()
+        return web.strength - web.load - self.planned.get(web, 0)
+
+    def reserve(self, webs, weight=1):
+        """Notes that Spiderlings are about to move onto some Webs, so
+        routes found later this turn leave room for them.
+
+        Args:
+            webs (list[Web]): The Webs, e.g. the first of a path.
+            weight (int): The weight moving onto each.
+        """
+        self._start_turn()
+        for web in webs:
+            self.planned[web] = self.planned.get(web, 0) + weight
+
+    def _start_turn(self):
+        if self._planned_turn != self.game.current_turn:
+            self._planned_turn = self.game.current_turn
+            self.planned = {}
+
+    def find_path(self, start, goal, weight=None):
+        """Finds the quickest Webs to take from one Nest to another.
+
+        Args:
+            start (Nest): The Nest to start from.
+            goal (Nest): The Nest to get to.
+            weight (int): If given, only Webs that can take this much more
+                weight (see capacity) are used.
+
+        Returns:
+            list[Web]: The Webs to cross in order, empty if start is goal or
+            there is no way.
+        """
+        self.refresh()
+        if start is goal:
+            return []
+
+        speed = self.game.movement_speed
+
+        def heuristic(nest):
+            # a Web is never shorter than the straight line
+            return math.hypot(nest.x - goal.x, nest.y - goal.y) / speed
+
+        best = {start: 0}
+        came_from = {start: None}
+        counter = 0
+        fringe = [(heuristic(start), counter, 0, start)]
+        while fringe:
+            _, _, so_far, nest = heapq.heappop(fringe)
+            if nest is goal:
+                break
+            if so_far > best[nest]:
+                continue
+            for web, other in self.adjacency[nest].items():
+                if weight is not None and self.capacity(web) < weight:
+                    continue
+                total = so_far + self.travel_time(web)
+                if other not in best or total < best[other]:
+                    best[other] = total
+                    came_from[other] = (nest, web)
+                    counter += 1
+                    heapq.heappush(fringe, (total + heuristic(other),
+                                            counter, total, other))
+        else:
+            return []
+
+        path = []
+        nest = goal
+        while came_from[nest] is not None:
+            nest, web = came_from[nest]
+            path.append(web)
+        path.reverse()
+        return path
+
+    def distances(self):
+        """The travel time between every pair of Nests, ignoring load.
+
+        Returns:
+            tuple[list[Nest], numpy.ndarray]: The Nests, and a read only
+            (nests, nests) array of the turns between each pair, inf where
+            there's no way.
+        """
+        self.refresh()
+        if self._matrix is None:
+            nests = list(self.adjacency)
+            index = {nest: i for i, nest in enumerate(nests)}
+            times = np.full((len(nests), len(nests)), np.inf)
+            np.fill_diagonal(times, 0)
+            for nest, webs in self.adjacency.items():
+                for web, other in webs.items():
+                    i, j = index[nest], index[other]
+                    times[i, j] = min(times[i, j], self.travel_time(web))
+            # Floyd-Warshall, a row and column of the matrix at a time
+            for k in range(len(nests)):
+                np.minimum(times, times[:, k, None] + times[None, k, :],
+                           out=times)
+            times.flags.writeable = False
+            self._matrix = nests, index, times
+        nests, _, times = self._matrix
+        return nests, times
+
+    def distance(self, start, goal):
+        """The travel time from one Nest to another, from distances()."""
+        self.distances()
+        _, index, times = self._matrix
+        return times[index[start], index[goal]]
+
+    def nearest(self, start, nests):
+        """The closest of some Nests to a Nest by travel time, or None if
+        none can be reached.
+        """
+        self.distances()
+        _, index, times = self._matrix
+        row = times[index[start]]
+        reachable = [nest for nest in nests if row[index[nest]] < np.inf]
+        if not reachable:
+            return None
+        return min(reachable, key=lambda nest: row[index[nest]])
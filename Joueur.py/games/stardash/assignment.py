@@ -0,0 +1,281 @@
+# Assignment: matches miners to asteroids so no two miners chase the same rock.
+#
+# A miners x asteroids cost matrix is built in one vectorized pass, then an
+# auction algorithm finds the cheapest one-to-one matching. The auction's
+# prices are kept between turns, so each turn only re-bids for what changed.
+
+import numpy as np
+
+from games.stardash.geometry import MATERIALS, distance, predict_orbits, \
+    sun_collides
+
+# a row's assignment while it is still bidding, and when it is best left idle
+UNASSIGNED = -2
+IDLE = -1
+
+
+def _best_two(profits):
+    """The best column, its profit, and the best profit of any other option
+    (always including staying idle, worth 0) for each row.
+    """
+    rows = np.arange(profits.shape[0])
+    best = np.argmax(profits, axis=1)
+    first = profits[rows, best]
+    if profits.shape[1] > 1:
+        rest = profits.copy()
+        rest[rows, best] = -np.inf
+        second = np.maximum(rest.max(axis=1), 0.0)
+    else:
+        second = np.zeros(len(rows))
+    return best, first, second
+
+
+def _unhappy(benefit, prices, assigned, epsilon):
+    """Rows whose assignment is more than epsilon worse than their best."""
+    profits = benefit - prices
+    best = np.maximum(profits.max(axis=1), 0.0) if profits.shape[1] \
+        else np.zeros(len(assigned))
+    rows = np.arange(len(assigned))
+    current = np.where(assigned >= 0,
+                       profits[rows, np.maximum(assigned, 0)], 0.0)
+    return (assigned != UNASSIGNED) & (current < best - epsilon)
+
+
+def _owners(assigned, columns):
+    """The row holding each column, or -1."""
+    owner = np.full(columns, -1, dtype=np.int64)
+    taken = assigned >= 0
+    owner[assigned[taken]] = np.nonzero(taken)[0]
+    return owner
+
+
+def _bid(benefit, prices, assigned, owner, epsilon, max_rounds):
+    """Jacobi auction: every unassigned row bids at once each round."""
+    for _ in range(max_rounds):
+        free = np.nonzero(assigned == UNASSIGNED)[0]
+        if not free.size:
+            return
+        if not prices.size:
+            assigned[free] = IDLE
+            return
+
+        best, first, second = _best_two(benefit[free] - prices)
+        idle = first < 0
+        assigned[free[idle]] = IDLE
+
+        bidders = free[~idle]
+        if not bidders.size:
+            return
+        wanted = best[~idle]
+        bids = prices[wanted] + first[~idle] - second[~idle] + epsilon
+
+        # the highest bid on each object wins it, outbidding its owner
+        order = np.lexsort((-bids, wanted))
+        ordered = wanted[order]
+        winners = order[np.r_[True, ordered[1:] != ordered[:-1]]]
+        objects = wanted[winners]
+
+        outbid = owner[objects]
+        assigned[outbid[outbid >= 0]] = UNASSIGNED
+        owner[objects] = bidders[winners]
+        assigned[bidders[winners]] = objects
+        prices[objects] = bids[winners]
+
+
+def auction(benefit, prices=None, assigned=None, epsilon=None,
+            max_rounds=10000):
+    """Solves the (rectangular) assignment problem, maximizing total benefit.
+
+    Every row is matched to at most one column and every column to at most
+    one row. A row whose best benefit is negative is left idle. Passing in
+    the prices and assignment from a previous solve warm starts the auction,
+    so small changes to the benefits only cost a few bidding rounds.
+
+    Args:
+        benefit (numpy.ndarray): (rows, columns) benefits, -inf if forbidden.
+        prices (numpy.ndarray): Optional starting column prices.
+        assigned (numpy.ndarray): Optional starting column (or IDLE) per row,
+            UNASSIGNED rows will bid.
+        epsilon (float): The final bid increment. The result is within
+            rows * epsilon of the optimum. Defaults to a ten thousandth of
+            the largest benefit.
+        max_rounds (int): A cap on bidding rounds, rows still bidding when
+            it is hit are left idle.
+
+    Returns:
+        tuple[numpy.ndarray, numpy.ndarray]: The column (or IDLE) matched to
+        each row, and the final column prices.
+    """
+    benefit = np.asarray(benefit, dtype=np.float64)
+    rows, columns = benefit.shape
+    finite = np.abs(benefit[np.isfinite(benefit)])
+    scale = max(finite.max(), 1e-9) if finite.size else 1.0
+    if epsilon is None:
+        epsilon = scale * 1e-4
+
+    warm = prices is not None
+    prices = np.zeros(columns) if not warm \
+        else np.array(prices, dtype=np.float64)
+    assigned = np.full(rows, UNASSIGNED, dtype=np.int64) if assigned is None \
+        else np.array(assigned, dtype=np.int64)
+
+    if warm:
+        # keep last turn's matches that are still (nearly) the best choice,
+        # and free the rest. Prices of objects nobody holds go back to 0,
+        # which can make more rows want to switch, so repeat until stable
+        while True:
+            owner = _owners(assigned, columns)
+            prices[owner < 0] = 0.0
+            unhappy = _unhappy(benefit, prices, assigned, epsilon)
+            if not unhappy.any():
+                break
+            assigned[unhappy] = UNASSIGNED
+
+    # a forward auction never frees an object once bid on, so every object
+    # left over still has price 0, which makes the result optimal
+    _bid(benefit, prices, assigned, _owners(assigned, columns), epsilon,
+         max_rounds)
+    assigned[assigned == UNASSIGNED] = IDLE
+    return assigned, prices
+
+
+class MinerAssigner():
+    """Assigns a player's miners to asteroids each turn, remembering the last
+    matching and auction prices so later turns are solved incrementally.
+
+    Use it once per turn from run_turn:
+
+        assignments = self.assigner.assign(self.player)
+        for miner, asteroid in assignments.items():
+            ...
+    """
+
+    def __init__(self, game, lead=2, distance_weight=0.05, energy_weight=0.5,
+                 mythicite_value=None):
+        """Creates an assigner.
+
+        Args:
+            game (games.stardash.game.Game): The game being played.
+            lead (int): How many orbit updates ahead to aim at. Two by
+                default, as asteroids move after both players' turns before
+                a miner that dashes this turn can mine.
+            distance_weight (float): Cost per unit of distance traveled.
+            energy_weight (float): Cost per point of energy spent dashing.
+            mythicite_value (float): What a unit of mythicite is worth. It is
+                worth no money, but wins the game, so by default it is worth
+                ten times legendarium.
+        """
+        self.game = game
+        self.lead = lead
+        self.distance_weight = distance_weight
+        self.energy_weight = energy_weight
+        self.values = np.array([
+            game.genarium_value,
+            game.rarium_value,
+            game.legendarium_value,
+            mythicite_value if mythicite_value is not None
+            else 10 * game.legendarium_value,
+        ], dtype=np.float64)
+
+        self._prices = {}
+        self._assigned = {}
+
+    def cost_matrix(self, miners, asteroids):
+        """Builds the miners x asteroids cost matrix.
+
+        The cost is the distance traveled and energy spent dashing to where
+        the asteroid will be, less the value of the ore the miner can carry
+        away. Asteroids locked by the opponent, or out of reach this turn,
+        cost infinity.
+
+        Args:
+            miners (list[games.stardash.unit.Unit]): The miners.
+            asteroids (list[games.stardash.body.Body]): The asteroids.
+
+        Returns:
+            numpy.ndarray: A (len(miners), len(asteroids)) cost matrix.
+        """
+        game = self.game
+        if not miners or not asteroids:
+            return np.zeros((len(miners), len(asteroids)))
+        sun = game.bodies[2]
+
+        mx = np.array([m.x for m in miners], dtype=np.float64)[:, None]
+        my = np.array([m.y for m in miners], dtype=np.float64)[:, None]
+        energy = np.array([m.energy for m in miners], dtype=np.float64)
+        moves = np.array([m.moves for m in miners], dtype=np.float64)
+        reach = np.array([m.job.range for m in miners], dtype=np.float64)
+        room = np.array([m.job.carry_limit - sum(getattr(m, k)
+                                                  for k in MATERIALS)
+                         for m in miners], dtype=np.float64)
+
+        ax, ay = predict_orbits(
+            [a.x for a in asteroids], [a.y for a in asteroids],
+            sun.x, sun.y, game.turns_to_orbit, self.lead)
+        ax = ax[self.lead][None, :]
+        ay = ay[self.lead][None, :]
+        radius = np.array([a.radius for a in asteroids], dtype=np.float64)
+        amount = np.array([a.amount for a in asteroids], dtype=np.float64)
+        value = np.array([self.values[MATERIALS.index(a.material_type)]
+                          if a.material_type in MATERIALS else 0.0
+                          for a in asteroids])
+        locked = np.array([a.owner is not None and
+                           a.owner is not miners[0].owner
+                           for a in asteroids])
+
+        # travel to the edge of mining range, dashing if a move can't get
+        # there, which costs energy and must not clip the sun
+        dist = distance(mx, my, ax, ay)
+        travel = np.maximum(dist - (reach[:, None] + radius), 0.0)
+        dashing = travel > moves[:, None]
+        needed = np.ceil(travel / game.dash_distance) * game.dash_cost
+        spent = np.where(dashing, np.ceil(
+            game.dash_cost * travel / game.dash_distance), 0.0)
+        blocked = dashing & (
+            (needed > energy[:, None]) |
+            sun_collides(ax, ay, mx, my, sun.x, sun.y,
+                         sun.radius + game.ship_radius))
+
+        gain = np.minimum(amount, np.maximum(room, 0.0)[:, None]) * value
+        cost = self.distance_weight * travel + \
+            self.energy_weight * spent - gain
+        cost[blocked | locked[None, :] | (amount <= 0)[None, :]] = np.inf
+        return cost
+
+    def assign(self, player, asteroids=None):
+        """Matches the player's miners to asteroids.
+
+        Args:
+            player (games.stardash.player.Player): The player whose miners
+                to assign.
+            asteroids (list[games.stardash.body.Body]): The candidates,
+                defaulting to every asteroid with material left.
+
+        Returns:
+            dict[games.stardash.unit.Unit, games.stardash.body.Body]: The
+            asteroid each miner should go mine, or None to leave it be.
+        """
+        miners = [u for u in player.units if u.job.title == "miner"]
+        if asteroids is None:
+            asteroids = [b for b in self.game.bodies
+                         if b.body_type == "asteroid" and b.amount > 0]
+
+        # carry over what is still valid from last turn to warm start
+        column = {a.id: j for j, a in enumerate(asteroids)}
+        prices = np.array([self._prices.get(a.id, 0.0) for a in asteroids])
+        assigned = np.array([
+            column.get(self._assigned[m.id], UNASSIGNED)
+            if self._assigned.get(m.id) is not None
+            else (IDLE if m.id in self._assigned else UNASSIGNED)
+            for m in miners], dtype=np.int64)
+
+        cost = self.cost_matrix(miners, asteroids)
+        matched, prices = auction(-cost, prices=prices, assigned=assigned)
+
+        self._prices = {a.id: prices[j] for j, a in enumerate(asteroids)}
+        self._assigned = {
+            m.id: asteroids[j].id if j >= 0 else None
+            for m, j in zip(miners, matched)
+        }
+        return {m: asteroids[j] if j >= 0 else None
+                for m, j in zip(miners, matched)}
@@ -0,0 +1,108 @@
+# Geometry: vectorized versions of the Stardash server's movement math.
+# Every function accepts NumPy arrays (or scalars) and broadcasts, so a whole
+# fleet or a whole batch of simulations can be checked in one call.
+
+import numpy as np
+
+# the order of the ore types, used as the index into any (..., 4) cargo array
+MATERIALS = ("genarium", "rarium", "legendarium", "mythicite")
+
+
+def distance(x1, y1, x2, y2):
+    """Euclidean distance between two (arrays of) points.
+
+    Returns:
+        numpy.ndarray: The distances, broadcast over the inputs.
+    """
+    return np.hypot(np.subtract(x1, x2), np.subtract(y1, y2))
+
+
+def orbit_rotation(turns_to_orbit):
+    """The (cos, sin) of the angle every asteroid rotates by per orbit update.
+
+    Asteroids move clockwise around the sun once after every player's turn.
+
+    Args:
+        turns_to_orbit (int): game.turns_to_orbit
+
+    Returns:
+        tuple[float, float]: cos and sin of the per turn rotation.
+    """
+    theta = 2.0 * np.pi / turns_to_orbit
+    return np.cos(theta), np.sin(theta)
+
+
+def rotate_about(x, y, center_x, center_y, cos_t, sin_t):
+    """Rotates points clockwise (in screen space) about a center.
+
+    Returns:
+        tuple[numpy.ndarray, numpy.ndarray]: The rotated x and y values.
+    """
+    dx = np.subtract(x, center_x)
+    dy = np.subtract(y, center_y)
+    return (center_x + dx * cos_t + dy * sin_t,
+            center_y - dx * sin_t + dy * cos_t)
+
+
+def predict_orbits(x, y, sun_x, sun_y, turns_to_orbit, turns):
+    """Predicts where asteroids will be for each of the next turns.
+
+    This is the client side equivalent of Body.next_x/next_y for every
+    asteroid at once, without a round trip to the server per call.
+
+    Args:
+        x (numpy.ndarray): The current x values of the asteroids.
+        y (numpy.ndarray): The current y values of the asteroids.
+        sun_x (float): The x value of the sun.
+        sun_y (float): The y value of the sun.
+        turns_to_orbit (int): game.turns_to_orbit
+        turns (int): How many turns in the future to predict.
+
+    Returns:
+        tuple[numpy.ndarray, numpy.ndarray]: x and y arrays shaped
+        (turns + 1, len(x)), where row 0 is the current position.
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    theta = 2.0 * np.pi / turns_to_orbit
+    angles = theta * np.arange(turns + 1).reshape((turns + 1,) + (1,) * x.ndim)
+    cos_t = np.cos(angles)
+    sin_t = np.sin(angles)
+    return rotate_about(x, y, sun_x, sun_y, cos_t, sin_t)
+
+
+def sun_collides(to_x, to_y, from_x, from_y, sun_x, sun_y, min_dist):
+    """Checks if the straight line between two points clips the sun.
+
+    Mirrors the server's Unit.collide check used to invalidate dashes and
+    to answer Unit.safe, so it can be asked for many paths at once.
+
+    Args:
+        to_x (numpy.ndarray): The x values of the destinations.
+        to_y (numpy.ndarray): The y values of the destinations.
+        from_x (numpy.ndarray): The x values of the starting points.
+        from_y (numpy.ndarray): The y values of the starting points.
+        sun_x (float): The x value of the sun.
+        sun_y (float): The y value of the sun.
+        min_dist (float): sun radius plus the radius of what is moving.
+
+    Returns:
+        numpy.ndarray: A boolean array, True where the path hits the sun.
+    """
+    length = distance(to_x, to_y, from_x, from_y)
+    a = np.subtract(to_y, from_y)
+    b = np.subtract(from_x, to_x)
+    c = np.multiply(to_x, from_y) - np.multiply(from_x, to_y)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        # a zero length path divides by zero, which (like the server) never
+        # counts as a collision as NaN compares False
+        line_dist = np.abs(a * sun_x + b * sun_y + c) / np.hypot(a, b)
+
+    to_sun = distance(to_x, to_y, sun_x, sun_y)
+    from_sun = distance(from_x, from_y, sun_x, sun_y)
+    check1 = to_sun > length
+    check2 = from_sun > length
+    hit = ((check1 & (from_sun < min_dist)) |
+           (check2 & (to_sun < min_dist)) |
+           (~check1 & ~check2))
+    return (line_dist <= min_dist) & hit
@@ -0,0 +1,274 @@
+# Raster: occupancy, influence and resource grids laid over the Stardash map.
+#
+# The map is continuous, so it is cut into square cells of a configurable
+# size. Every unit, body and projectile is stamped into the grids once, and
+# after that only the objects a delta changed are re-stamped. Spreading
+# influence is a separable Gaussian blur done as two small matrix products.
+
+import numpy as np
+
+from games.stardash.geometry import MATERIALS
+
+# the attributes (as they appear in deltas) that change what gets stamped
+_STAMPED_KEYS = frozenset(["x", "y", "amount", "owner", "energy", "radius"])
+
+# the game lists whose membership decides what is stamped at all
+_STAMPED_LISTS = ("units", "bodies", "projectiles")
+
+
+class Raster():
+    """Grids over the map, kept in sync with the game through its deltas.
+
+    Fields, each a (rows, columns) array:
+        occupancy: how many ships, projectiles and bodies cover each cell.
+        friendly: the player's unit strength in each cell.
+        enemy: the opponent's unit and projectile strength in each cell.
+        resources: the value of the ore left on asteroids in each cell.
+
+    Make one in start(), then call refresh() before reading it each turn:
+
+        self.raster = Raster(self.game, self.player, cell_size=50)
+        ...
+        self.raster.refresh()
+        x, y = self.raster.argmax(self.raster.influence())
+    """
+
+    def __init__(self, game, player, cell_size=50, spread=150,
+                 unit_weight=None, values=None):
+        """Creates the grids and stamps everything currently in the game.
+
+        Args:
+            game (games.stardash.game.Game): The game being played.
+            player (games.stardash.player.Player): The friendly player.
+            cell_size (float): The width and height of each cell.
+            spread (float): The standard deviation, in map units, of the
+                kernel influence is spread with.
+            unit_weight (function): Gives the strength of a unit, defaulting
+                to its energy.
+            values (list[float]): What one unit of each material is worth,
+                in geometry.MATERIALS order. Defaults to the game's values,
+                with mythicite worth ten times legendarium.
+        """
+        self.game = game
+        self.player = player
+        self.cell_size = float(cell_size)
+        self.columns = int(np.ceil(game.size_x / self.cell_size))
+        self.rows = int(np.ceil(game.size_y / self.cell_size))
+        self.unit_weight = unit_weight or (lambda unit: unit.energy)
+        self.values = list(values) if values is not None else [
+            game.genarium_value, game.rarium_value, game.legendarium_value,
+            10 * game.legendarium_value]
+
+        shape = (self.rows, self.columns)
+        self.occupancy = np.zeros(shape)
+        self.friendly = np.zeros(shape)
+        self.enemy = np.zeros(shape)
+        self.resources = np.zeros(shape)
+
+        self._kernels = {}
+        self.set_spread(spread)
+
+        # id -> list of (field, flat cell indexes, weights) stamped for it
+        self._stamps = {}
+        self._dirty = set()
+        self._membership_dirty = False
+
+        game.add_delta_listener(self._delta_merged)
+        self.rebuild()
+
+    # -- geometry -----------------------------------------------------------
+
+    def cell(self, x, y):
+        """The (row, column) of the cell holding a point (or arrays of them).
+
+        Returns:
+            tuple[numpy.ndarray, numpy.ndarray]: Rows and columns, clipped to
+            the grid.
+        """
+        column = np.clip((np.asarray(x) // self.cell_size).astype(np.int64),
+                         0, self.columns - 1)
+        row = np.clip((np.asarray(y) // self.cell_size).astype(np.int64),
+                      0, self.rows - 1)
+        return row, column
+
+    def center(self, row, column):
+        """The map coordinates of the center of a cell (or arrays of them).
+
+        Returns:
+            tuple[numpy.ndarray, numpy.ndarray]: x and y values.
+        """
+        return ((np.asarray(column) + 0.5) * self.cell_size,
+                (np.asarray(row) + 0.5) * self.cell_size)
+
+    def _disc(self, x, y, radius):
+        """Flat indexes of the cells whose centers are within a circle, or
+        the single cell holding its center if the circle is smaller.
+        """
+        lo_row, lo_column = self.cell(x - radius, y - radius)
+        hi_row, hi_column = self.cell(x + radius, y + radius)
+        rows = np.arange(lo_row, hi_row + 1)[:, None]
+        columns = np.arange(lo_column, hi_column + 1)[None, :]
+        cx, cy = self.center(rows, columns)
+        inside = (cx - x) ** 2 + (cy - y) ** 2 <= radius ** 2
+        if not inside.any():
+            row, column = self.cell(x, y)
+            return np.array([row * self.columns + column])
+        return (rows * self.columns + columns)[inside]
+
+    # -- stamping -----------------------------------------------------------
+
+    def rebuild(self):
+        """Clears every grid and stamps everything in the game again."""
+        for field in (self.occupancy, self.friendly, self.enemy,
+                      self.resources):
+            field[:] = 0.0
+        self._stamps = {}
+        self._dirty = set()
+        self._membership_dirty = False
+        for obj in self._stamped_objects():
+            self._stamp(obj)
+
+    def refresh(self):
+        """Re-stamps only what the deltas merged since the last refresh
+        changed. Cheap when called every turn.
+        """
+        if self._membership_dirty:
+            current = set(obj.id for obj in self._stamped_objects())
+            self._dirty |= current.symmetric_difference(self._stamps)
+        alive = None
+        for id in self._dirty:
+            self._unstamp(id)
+            obj = self.game.get_game_object(id)
+            if obj is None:
+                continue
+            if alive is None:
+                alive = set(o.id for o in self._stamped_objects())
+            if id in alive:
+                self._stamp(obj)
+        self._dirty = set()
+        self._membership_dirty = False
+
+    def _delta_merged(self, delta):
+        for key in _STAMPED_LISTS:
+            if key in delta:
+                self._membership_dirty = True
+        for id, changes in delta.get("gameObjects", {}).items():
+            if isinstance(changes, dict) and \
+                    not _STAMPED_KEYS.isdisjoint(changes):
+                self._dirty.add(id)
+
+    def _stamped_objects(self):
+        game = self.game
+        return list(game.units) + list(game.bodies) + list(game.projectiles)
+
+    def _stamp(self, obj):
+        stamps = []
+        name = obj.game_object_name
+        if name == "Body":
+            cells = self._disc(obj.x, obj.y, obj.radius)
+            stamps.append((self.occupancy, cells, 1.0))
+            if obj.body_type == "asteroid" and \
+                    obj.material_type in MATERIALS:
+                value = obj.amount * \
+                    self.values[MATERIALS.index(obj.material_type)]
+                stamps.append((self.resources, cells, value / len(cells)))
+        else:
+            row, column = self.cell(obj.x, obj.y)
+            cells = np.array([row * self.columns + column])
+            stamps.append((self.occupancy, cells, 1.0))
+            side = self.friendly if obj.owner is self.player else self.enemy
+            weight = self.unit_weight(obj) if name == "Unit" else obj.energy
+            stamps.append((side, cells, float(weight)))
+
+        for field, cells, weight in stamps:
+            np.add.at(field.reshape(-1), cells, weight)
+        self._stamps[obj.id] = stamps
+
+    def _unstamp(self, id):
+        for field, cells, weight in self._stamps.pop(id, ()):
+            np.subtract.at(field.reshape(-1), cells, weight)
+
+    # -- queries ------------------------------------------------------------
+
+    def set_spread(self, spread):
+        """Sets how far influence() spreads strength from where it is.
+
+        Args:
+            spread (float): The standard deviation of the kernel, in map
+                units.
+        """
+        self.spread_distance = float(spread)
+        self._kernels = {
+            n: self._kernel(n, spread) for n in (self.rows, self.columns)
+        }
+
+    def _kernel(self, size, spread):
+        offsets = np.arange(size) * self.cell_size
+        gaps = offsets[:, None] - offsets[None, :]
+        return np.exp(-0.5 * (gaps / max(spread, 1e-9)) ** 2)
+
+    def spread(self, field):
+        """Blurs a field with a Gaussian kernel, so strength in one cell is
+        felt by its neighbors. Done as rows_kernel @ field @ columns_kernel.
+
+        Args:
+            field (numpy.ndarray): A (rows, columns) grid.
+
+        Returns:
+            numpy.ndarray: The spread grid.
+        """
+        return self._kernels[self.rows].dot(field).dot(
+            self._kernels[self.columns])
+
+    def influence(self):
+        """Friendly minus enemy strength, spread across the map. Positive
+        where the player is in control.
+
+        Returns:
+            numpy.ndarray: A (rows, columns) grid.
+        """
+        return self.spread(self.friendly - self.enemy)
+
+    def tension(self):
+        """Friendly plus enemy strength, spread across the map. High where
+        both sides are contesting the space.
+
+        Returns:
+            numpy.ndarray: A (rows, columns) grid.
+        """
+        return self.spread(self.friendly + self.enemy)
+
+    def argmax(self, field, free=True):
+        """The center of the best cell of a field.
+
+        Args:
+            field (numpy.ndarray): A (rows, columns) grid of scores.
+            free (bool): Only consider cells nothing occupies.
+
+        Returns:
+            tuple[float, float]: The (x, y) of the best cell's center.
+        """
+        if free:
+            field = np.where(self.occupancy > 0, -np.inf, field)
+        row, column = np.unravel_index(np.argmax(field), field.shape)
+        return tuple(float(v) for v in self.center(row, column))
+
+    def top(self, field, count, free=True):
+        """The centers of the best cells of a field, best first.
+
+        Args:
+            field (numpy.ndarray): A (rows, columns) grid of scores.
+            count (int): How many cells to return.
+            free (bool): Only consider cells nothing occupies.
+
+        Returns:
+            list[tuple[float, float]]: The (x, y) of each cell's center.
+        """
+        flat = field.reshape(-1)
+        if free:
+            flat = np.where(self.occupancy.reshape(-1) > 0, -np.inf, flat)
+        count = min(count, flat.size)
+        best = np.argpartition(-flat, count - 1)[:count]
+        best = best[np.argsort(-flat[best])]
+        x, y = self.center(best // self.columns, best % self.columns)
+        return list(zip(x.tolist(), y.tolist()))
@@ -0,0 +1,288 @@
+# Reachability: how (and how soon) every unit can get to every target.
+#
+# Choosing between Unit.move and Unit.dash means knowing, for each unit and
+# each place it might go, what a dash would cost, where an asteroid will be
+# by the time the unit gets there, and whether the straight line clips the
+# sun. ReachTable answers all of that for a whole fleet at once, once per
+# turn, reusing the orbit predictions of asteroids that moved as expected.
+
+import numpy as np
+
+from games.stardash.geometry import distance, orbit_rotation, rotate_about, \
+    sun_collides
+
+# how far inside a target's range to aim, so rounding never leaves a unit
+# just out of reach
+_SLACK = 1.0
+
+
+class ReachTable():
+    """A units x targets table of how each unit can reach each target.
+
+    Targets may be bodies (asteroids are followed along their orbits), units
+    or (x, y) points. Build it once per turn with update(), then read the
+    arrays or ask about one pair:
+
+        table = ReachTable(self.game)
+        table.update(miners, asteroids)
+        arrival, dash, energy, x, y = table.reach(miner, asteroid)
+        if arrival == 0:
+            miner.move(x, y)
+            miner.mine(asteroid)
+        elif dash:
+            miner.dash(x, y)
+
+    Arrays, each shaped (len(units), len(targets)):
+        reachable: True if the unit can act on the target within the horizon.
+        arrival: How many of the unit's turns until it can act on the target,
+            0 meaning this turn, -1 if it can't within the horizon.
+        dash: True if the unit should dash this turn, else it moves.
+        energy: The energy the dash spends, 0 when moving.
+        aim_x, aim_y: Where to move or dash to this turn.
+    """
+
+    def __init__(self, game, horizon=8):
+        """Creates an empty table.
+
+        Args:
+            game (games.stardash.game.Game): The game being played.
+            horizon (int): How many of a unit's turns ahead to look for a
+                way to reach each target by moving alone.
+        """
+        self.game = game
+        self.horizon = horizon
+        self.units = []
+        self.targets = []
+
+        # orbits advance once after every player's turn, so a unit's k-th
+        # turn from now sees every asteroid 2k rotations further on
+        updates = 2 * horizon + 1
+        cos_t, sin_t = orbit_rotation(game.turns_to_orbit)
+        angle = np.arctan2(sin_t, cos_t) * np.arange(updates)[:, None]
+        self._cos = np.cos(angle)
+        self._sin = np.sin(angle)
+
+        self._orbit_turn = None
+        self._orbit_column = {}
+        self._orbit_x = np.zeros((updates, 0))
+        self._orbit_y = np.zeros((updates, 0))
+
+        # how many asteroid paths the last update reused instead of
+        # recomputing
+        self.reused = 0
+
+    def update(self, units, targets):
+        """Rebuilds the table for the current state of the game.
+
+        Args:
+            units (list[games.stardash.unit.Unit]): The units that may go.
+            targets (list): Bodies, units or (x, y) tuples to go to.
+        """
+        game = self.game
+        sun = game.bodies[2]
+        self.units = list(units)
+        self.targets = list(targets)
+        self._unit_row = {u.id: i for i, u in enumerate(self.units)}
+        self._target_column = {self._key(t): j
+                               for j, t in enumerate(self.targets)}
+        shape = (len(self.units), len(self.targets))
+        if not all(shape):
+            self.reachable = np.zeros(shape, dtype=bool)
+            self.arrival = np.full(shape, -1, dtype=np.int64)
+            self.dash = np.zeros(shape, dtype=bool)
+            self.energy = np.zeros(shape)
+            self.aim_x = np.zeros(shape)
+            self.aim_y = np.zeros(shape)
+            return
+
+        # a busy unit is mid dash and only gets going again next turn from
+        # where the dash lands
+        busy = np.array([u.is_busy for u in self.units], dtype=bool)
+        acted = np.array([u.acted for u in self.units], dtype=bool) | busy
+        ux = np.array([u.dash_x if u.is_busy else u.x for u in self.units],
+                      dtype=np.float64)[:, None]
+        uy = np.array([u.dash_y if u.is_busy else u.y for u in self.units],
+                      dtype=np.float64)[:, None]
+        moves = np.where(busy, 0.0, np.array(
+            [u.moves for u in self.units], dtype=np.float64))
+        job_moves = np.array([u.job.moves for u in self.units],
+                             dtype=np.float64)
+        energy = np.array([u.energy for u in self.units], dtype=np.float64)
+        job_range = np.array([u.job.range for u in self.units],
+                             dtype=np.float64)
+
+        # where each target will be on each of the unit's coming turns
+        tx, ty = self._target_paths()
+        radius = np.array([getattr(t, "radius", 0.0)
+                           if not isinstance(t, tuple) else 0.0
+                           for t in self.targets], dtype=np.float64)
+        point = np.array([isinstance(t, tuple) for t in self.targets])
+        margin = np.where(point[None, :], 0.0,
+                          job_range[:, None] + radius[None, :])
+        margin = np.maximum(margin - _SLACK, 0.0)
+
+        # moving: the unit arrives on turn k if what is left of this turn's
+        # moves plus k full turns of moves covers the distance
+        k = np.arange(self.horizon + 1)
+        dist = distance(ux[:, :, None], uy[:, :, None],
+                        tx.T[None, :, :], ty.T[None, :, :])
+        travel = np.maximum(dist - margin[:, :, None], 0.0)
+        capacity = moves[:, None, None] + k[None, None, :] * \
+            job_moves[:, None, None]
+        fits = travel <= capacity
+        fits[:, :, 0] &= ~acted[:, None]
+        move_turn = np.where(fits.any(axis=2), fits.argmax(axis=2), -1)
+        chosen = np.maximum(move_turn, 0)[:, :, None]
+        move_dist = np.take_along_axis(dist, chosen, axis=2)[:, :, 0]
+        move_travel = np.take_along_axis(travel, chosen, axis=2)[:, :, 0]
+        rx = np.take_along_axis(
+            np.broadcast_to(tx.T[None], dist.shape), chosen, axis=2)[:, :, 0]
+        ry = np.take_along_axis(
+            np.broadcast_to(ty.T[None], dist.shape), chosen, axis=2)[:, :, 0]
+        min_dist = sun.radius + game.ship_radius
+        move_ok = (move_turn >= 0) & ~sun_collides(
+            *self._along(ux, uy, rx, ry, move_dist, move_travel),
+            ux, uy, sun.x, sun.y, min_dist)
+        move_turn = np.where(move_ok, move_turn, -1)
+
+        # dashing: lands at the end of this turn, ready to act next turn
+        dash_travel = travel[:, :, min(1, self.horizon)]
+        dash_x, dash_y = self._along(
+            ux, uy, tx[min(1, self.horizon)][None, :],
+            ty[min(1, self.horizon)][None, :],
+            dist[:, :, min(1, self.horizon)], dash_travel)
+        needed = np.ceil(dash_travel / game.dash_distance) * game.dash_cost
+        spent = np.ceil(game.dash_cost * dash_travel / game.dash_distance)
+        dash_ok = ~acted[:, None] & (needed <= energy[:, None]) & \
+            (dash_travel > 0) & (self.horizon >= 1) & \
+            ~sun_collides(dash_x, dash_y, ux, uy, sun.x, sun.y, min_dist)
+
+        # dash only when it gets there sooner than moving would
+        self.dash = dash_ok & ((move_turn < 0) | (move_turn > 1))
+        self.arrival = np.where(self.dash, 1, move_turn)
+        self.reachable = self.arrival >= 0
+        self.energy = np.where(self.dash, spent, 0.0)
+
+        step = np.minimum(move_travel, moves[:, None])
+        step_x, step_y = self._along(ux, uy, rx, ry, move_dist, step)
+        self.aim_x = np.where(self.dash, dash_x, step_x)
+        self.aim_y = np.where(self.dash, dash_y, step_y)
+
+        # units that can't get there stay where they are
+        self.aim_x = np.where(self.reachable, self.aim_x, ux)
+        self.aim_y = np.where(self.reachable, self.aim_y, uy)
+
+    def reach(self, unit, target):
+        """Looks up how a unit can reach a target.
+
+        Args:
+            unit (games.stardash.unit.Unit): A unit passed to update().
+            target: A target passed to update().
+
+        Returns:
+            tuple[int, bool, float, float, float]: The arrival turn (-1 if
+            unreachable), whether to dash, the energy spent, and the x and
+            y to move or dash to this turn.
+        """
+        i = self._unit_row[unit.id]
+        j = self._target_column[self._key(target)]
+        return (int(self.arrival[i, j]), bool(self.dash[i, j]),
+                float(self.energy[i, j]), float(self.aim_x[i, j]),
+                float(self.aim_y[i, j]))
+
+    def soonest(self, unit):
+        """The targets a unit can reach, soonest (then cheapest) first.
+
+        Args:
+            unit (games.stardash.unit.Unit): A unit passed to update().
+
+        Returns:
+            list: The reachable targets.
+        """
+        i = self._unit_row[unit.id]
+        reachable = np.nonzero(self.reachable[i])[0]
+        order = np.lexsort((self.energy[i, reachable],
+                            self.arrival[i, reachable]))
+        return [self.targets[j] for j in reachable[order]]
+
+    def _key(self, target):
+        return target if isinstance(target, tuple) else target.id
+
+    def _along(self, x0, y0, x1, y1, dist, travel):
+        """The point travel along the line from (x0, y0) to (x1, y1)."""
+        with np.errstate(divide="ignore", invalid="ignore"):
+            scale = np.where(dist > 0, travel / dist, 0.0)
+        return x0 + (x1 - x0) * scale, y0 + (y1 - y0) * scale
+
+    def _target_paths(self):
+        """The (horizon + 1, targets) positions of every target at the start
+        of each of the unit's coming turns.
+        """
+        count = self.horizon + 1
+        asteroids = [t for t in self.targets
+                     if not isinstance(t, tuple) and
+                     t.game_object_name == "Body" and
+                     t.body_type == "asteroid"]
+        ox, oy = self._asteroid_orbits(asteroids)
+        column = {a.id: j for j, a in enumerate(asteroids)}
+
+        tx = np.empty((count, len(self.targets)))
+        ty = np.empty((count, len(self.targets)))
+        for j, target in enumerate(self.targets):
+            if isinstance(target, tuple):
+                tx[:, j], ty[:, j] = target
+            elif target.id in column:
+                tx[:, j] = ox[::2, column[target.id]]
+                ty[:, j] = oy[::2, column[target.id]]
+            else:
+                tx[:, j], ty[:, j] = target.x, target.y
+        return tx, ty
+
+    def _asteroid_orbits(self, asteroids):
+        """Predicts every orbit update over the horizon for each asteroid,
+        reusing last update's predictions for asteroids that are where they
+        were predicted to be.
+        """
+        game = self.game
+        sun = game.bodies[2]
+        turn = game.current_turn
+        updates = self._cos.shape[0]
+        shift = turn - self._orbit_turn if self._orbit_turn is not None \
+            else updates
+        x = np.array([a.x for a in asteroids], dtype=np.float64)
+        y = np.array([a.y for a in asteroids], dtype=np.float64)
+
+        cached = np.array([self._orbit_column.get(a.id, -1)
+                           for a in asteroids], dtype=np.int64)
+        reuse = np.zeros(len(asteroids), dtype=bool)
+        if 0 <= shift < updates and len(asteroids):
+            held = cached >= 0
+            expected_x = self._orbit_x[shift, np.maximum(cached, 0)]
+            expected_y = self._orbit_y[shift, np.maximum(cached, 0)]
+            reuse = held & (np.abs(expected_x - x) < 1e-6) & \
+                (np.abs(expected_y - y) < 1e-6)
+
+        ox = np.empty((updates, len(asteroids)))
+        oy = np.empty((updates, len(asteroids)))
+        if reuse.any():
+            # keep the rows still ahead, and rotate the last one to fill in
+            # the rest
+            columns = cached[reuse]
+            kept = updates - shift
+            ox[:kept, reuse] = self._orbit_x[shift:, columns]
+            oy[:kept, reuse] = self._orbit_y[shift:, columns]
+            if shift:
+                ox[kept:, reuse], oy[kept:, reuse] = rotate_about(
+                    ox[kept - 1, reuse], oy[kept - 1, reuse], sun.x, sun.y,
+                    self._cos[1:shift + 1], self._sin[1:shift + 1])
+        fresh = ~reuse
+        if fresh.any():
+            ox[:, fresh], oy[:, fresh] = rotate_about(
+                x[fresh], y[fresh], sun.x, sun.y, self._cos, self._sin)
+
+        self.reused = int(reuse.sum())
+        self._orbit_turn = turn
+        self._orbit_column = {a.id: j for j, a in enumerate(asteroids)}
+        self._orbit_x = ox
+        self._orbit_y = oy
+        return ox, oy
@@ -0,0 +1,601 @@
+# Simulator: a NumPy forward model of whole Stardash turns for lookahead.
+#
+# The model mirrors the server's end of turn logic (missile flight, dash
+# landings, planet recharge, asteroid orbits, mining and deposits) so an AI can
+# predict several turns ahead without asking the server. Every array carries a
+# leading batch dimension, so many candidate action sets are stepped at once.
+#
+# Attacks, shootdowns, spawns and transfers are not modeled; validate() reports
+# how close the model stays to a recorded gamelog given the same commands.
+
+import gzip
+import json
+import time
+
+import numpy as np
+
+from games.stardash.geometry import (MATERIALS, distance, orbit_rotation,
+                                     rotate_about, sun_collides)
+
+# the kinds of action a unit can take after its (optional) move
+ACT_NONE = 0
+ACT_DASH = 1
+ACT_MINE = 2
+
+# the order of the jobs in game.jobs, see Game.jobs
+JOB_TITLES = ("corvette", "missileboat", "martyr", "transport", "miner")
+
+
+class Actions():
+    """The commands for every unit, for every simulation in a batch.
+
+    Each unit may move (move_x/move_y, NaN for no move) and then either dash
+    to (act_x, act_y) or mine the asteroid at index act_body. Actions for
+    units not owned by the current player are ignored.
+    """
+
+    def __init__(self, batch, num_units):
+        self.move_x = np.full((batch, num_units), np.nan)
+        self.move_y = np.full((batch, num_units), np.nan)
+        self.act = np.zeros((batch, num_units), dtype=np.int8)
+        self.act_x = np.zeros((batch, num_units))
+        self.act_y = np.zeros((batch, num_units))
+        self.act_body = np.full((batch, num_units), -1, dtype=np.int64)
+
+    def move(self, unit, x, y, batch=slice(None)):
+        """Moves a unit (by index) to (x, y) in the given batch rows."""
+        self.move_x[batch, unit] = x
+        self.move_y[batch, unit] = y
+
+    def dash(self, unit, x, y, batch=slice(None)):
+        """Dashes a unit (by index) to (x, y) in the given batch rows."""
+        self.act[batch, unit] = ACT_DASH
+        self.act_x[batch, unit] = x
+        self.act_y[batch, unit] = y
+
+    def mine(self, unit, body, batch=slice(None)):
+        """Mines the asteroid (by index) with a unit in the given batch rows."""
+        self.act[batch, unit] = ACT_MINE
+        self.act_body[batch, unit] = body
+
+
+class Simulator():
+    """A batched, vectorized copy of a Stardash game state that can be
+    stepped forward whole turns at a time.
+
+    Build one from the live game with Simulator(game, batch=n), then call
+    step() with an Actions (or None to have every unit idle) per turn.
+    """
+
+    def __init__(self, game, batch=1):
+        """Copies the current state of the game into arrays.
+
+        Args:
+            game (games.stardash.game.Game): The game to copy.
+            batch (int): How many independent copies of the state to hold.
+        """
+        self.batch = batch
+        self.turn = game.current_turn
+        self.current_player = game.players.index(game.current_player) \
+            if game.current_player in game.players else 0
+
+        # constants
+        self.size_x = game.size_x
+        self.size_y = game.size_y
+        self.ship_radius = game.ship_radius
+        self.projectile_radius = game.projectile_radius
+        self.projectile_speed = game.projectile_speed
+        self.dash_cost = game.dash_cost
+        self.dash_distance = game.dash_distance
+        self.mining_speed = game.mining_speed
+        self.orbits_protected = game.orbits_protected
+        self.planet_recharge_rate = game.planet_recharge_rate
+        self.planet_energy_cap = game.planet_energy_cap
+        self.regenerate_rate = game.regenerate_rate
+        self.turns_to_orbit = game.turns_to_orbit
+        self.values = np.array([game.genarium_value, game.rarium_value,
+                                game.legendarium_value, 0.0])
+        self.martyr_regen = game.jobs[1].damage if len(game.jobs) > 1 else 0
+
+        sun = game.bodies[2]
+        self.sun_x = sun.x
+        self.sun_y = sun.y
+        self.sun_radius = sun.radius
+        self._cos, self._sin = orbit_rotation(self.turns_to_orbit)
+
+        players = game.players
+        self.player_ids = [p.id for p in players]
+
+        # planets, indexed by the player whose home base they are
+        bases = [p.home_base for p in players]
+        self.planet_x = np.array([b.x for b in bases], dtype=np.float64)
+        self.planet_y = np.array([b.y for b in bases], dtype=np.float64)
+        self.planet_radius = np.array([b.radius for b in bases],
+                                      dtype=np.float64)
+        self.planet_amount = self._tile([b.amount for b in bases])
+        self.money = self._tile([p.money for p in players])
+        self.victory_points = self._tile([p.victory_points for p in players])
+
+        # asteroids
+        asteroids = [b for b in game.bodies if b.body_type == "asteroid"]
+        self.asteroid_ids = [a.id for a in asteroids]
+        self.asteroid_index = {a.id: i for i, a in enumerate(asteroids)}
+        self.asteroid_material = np.array(
+            [MATERIALS.index(a.material_type)
+             if a.material_type in MATERIALS else -1 for a in asteroids],
+            dtype=np.int64)
+        self.asteroid_radius = np.array([a.radius for a in asteroids],
+                                        dtype=np.float64)
+        self.asteroid_x = self._tile([a.x for a in asteroids])
+        self.asteroid_y = self._tile([a.y for a in asteroids])
+        self.asteroid_amount = self._tile([a.amount for a in asteroids])
+        self.asteroid_owner = self._tile(
+            [self._player_index(a.owner) for a in asteroids], np.int8)
+        self.asteroid_alive = self._tile([True] * len(asteroids), bool)
+
+        # units
+        units = game.units
+        self.unit_ids = [u.id for u in units]
+        self.unit_index = {u.id: i for i, u in enumerate(units)}
+        self.unit_owner = np.array([self._player_index(u.owner)
+                                    for u in units], dtype=np.int8)
+        self.unit_job = np.array([JOB_TITLES.index(u.job.title)
+                                  for u in units], dtype=np.int8)
+        self.job_moves = np.array([u.job.moves for u in units],
+                                  dtype=np.float64)
+        self.job_range = np.array([u.job.range for u in units],
+                                  dtype=np.float64)
+        self.job_carry_limit = np.array([u.job.carry_limit for u in units],
+                                        dtype=np.float64)
+        self.job_energy = np.array([u.job.energy for u in units],
+                                   dtype=np.float64)
+        self.job_shield = np.array([u.job.shield for u in units],
+                                   dtype=np.float64)
+        self.unit_x = self._tile([u.x for u in units])
+        self.unit_y = self._tile([u.y for u in units])
+        self.unit_energy = self._tile([u.energy for u in units])
+        self.unit_shield = self._tile([u.shield for u in units])
+        self.unit_moves = self._tile([u.moves for u in units])
+        self.unit_busy = self._tile([u.is_busy for u in units], bool)
+        self.unit_acted = self._tile([u.acted for u in units], bool)
+        self.unit_dash_x = self._tile([u.dash_x for u in units])
+        self.unit_dash_y = self._tile([u.dash_y for u in units])
+        self.unit_alive = self._tile([True] * len(units), bool)
+        self.unit_cargo = np.tile(
+            np.array([[getattr(u, m) for m in MATERIALS] for u in units],
+                     dtype=np.float64).reshape(len(units), len(MATERIALS)),
+            (batch, 1, 1))
+
+        # projectiles
+        projectiles = game.projectiles
+        self.projectile_ids = [p.id for p in projectiles]
+        self.projectile_owner = np.array(
+            [self._player_index(p.owner) for p in projectiles], dtype=np.int8)
+        self.projectile_target = np.array(
+            [self.unit_index.get(p.target.id, -1) if p.target else -1
+             for p in projectiles], dtype=np.int64)
+        self.projectile_x = self._tile([p.x for p in projectiles])
+        self.projectile_y = self._tile([p.y for p in projectiles])
+        self.projectile_fuel = self._tile([p.fuel for p in projectiles])
+        self.projectile_alive = self._tile([True] * len(projectiles), bool)
+
+    def _player_index(self, player):
+        return self.player_ids.index(player.id) if player else -1
+
+    def _tile(self, values, dtype=np.float64):
+        return np.tile(np.array(values, dtype=dtype), (self.batch, 1))
+
+    def copy(self):
+        """Makes an independent copy, so a state can be branched.
+
+        Returns:
+            Simulator: The copy.
+        """
+        clone = Simulator.__new__(Simulator)
+        for key, value in self.__dict__.items():
+            clone.__dict__[key] = value.copy() \
+                if isinstance(value, np.ndarray) else value
+        return clone
+
+    def new_actions(self):
+        """Creates an Actions where every unit idles, sized for this batch.
+
+        Returns:
+            Actions: The empty actions.
+        """
+        return Actions(self.batch, len(self.unit_ids))
+
+    def asteroid_positions(self, turns):
+        """Where every asteroid will be for each of the next turns, dead
+        ones included (see asteroid_alive).
+
+        Returns:
+            tuple[numpy.ndarray, numpy.ndarray]: x and y arrays shaped
+            (turns + 1, batch, asteroids).
+        """
+        angles = (2.0 * np.pi / self.turns_to_orbit) * \
+            np.arange(turns + 1).reshape(-1, 1, 1)
+        return rotate_about(self.asteroid_x, self.asteroid_y,
+                            self.sun_x, self.sun_y,
+                            np.cos(angles), np.sin(angles))
+
+    def run(self, turns, actions=None):
+        """Steps several turns forward.
+
+        Args:
+            turns (int): How many turns to step.
+            actions (list[Actions]): Optional actions for each turn.
+        """
+        for turn in range(turns):
+            self.step(actions[turn] if actions else None)
+
+    def step(self, actions=None):
+        """Applies the current player's actions, then the end of turn logic.
+
+        Args:
+            actions (Actions): The commands sent this turn, or None to idle.
+        """
+        if actions is not None:
+            self._apply_actions(actions)
+        self._update_projectiles()
+        self._update_units()
+        self._update_orbits()
+        self.planet_amount += self.regenerate_rate
+        self._deposit()
+        self.turn += 1
+        self.current_player = 1 - self.current_player
+
+    # -- commands ---------------------------------------------------------
+
+    def _apply_actions(self, actions):
+        mine = self.unit_owner == self.current_player
+        ready = mine & self.unit_alive & ~self.unit_busy
+
+        # moves, invalid ones (too far, off map) are ignored like the server
+        wants = ready & ~np.isnan(actions.move_x)
+        trav = distance(self.unit_x, self.unit_y,
+                        actions.move_x, actions.move_y)
+        with np.errstate(invalid="ignore"):
+            ok = wants & (trav <= self.unit_moves) & \
+                self._on_map(actions.move_x, actions.move_y)
+        self.unit_x = np.where(ok, actions.move_x, self.unit_x)
+        self.unit_y = np.where(ok, actions.move_y, self.unit_y)
+        self.unit_moves = np.where(ok, self.unit_moves - trav, self.unit_moves)
+        self.unit_acted |= ok & (self.unit_job == JOB_TITLES.index(
+            "missileboat"))
+
+        # dashes land at the end of the turn
+        wants = ready & (actions.act == ACT_DASH)
+        trav = distance(self.unit_x, self.unit_y, actions.act_x, actions.act_y)
+        needed = np.ceil(trav / self.dash_distance) * self.dash_cost
+        ok = wants & (self.unit_energy >= needed) & \
+            self._on_map(actions.act_x, actions.act_y) & \
+            ~sun_collides(actions.act_x, actions.act_y,
+                          self.unit_x, self.unit_y, self.sun_x, self.sun_y,
+                          self.sun_radius + self.ship_radius)
+        self.unit_dash_x = np.where(ok, actions.act_x, self.unit_dash_x)
+        self.unit_dash_y = np.where(ok, actions.act_y, self.unit_dash_y)
+        self.unit_energy = np.where(
+            ok, self.unit_energy - np.ceil(
+                self.dash_cost * trav / self.dash_distance),
+            self.unit_energy)
+        self.unit_busy |= ok
+        self.unit_acted |= ok
+        self.unit_moves = np.where(ok, 0.0, self.unit_moves)
+
+        # mining is resolved unit by unit, as earlier miners empty asteroids
+        # and claim them before later ones try
+        if self.turn < self.orbits_protected:
+            return
+        wants = ready & ~self.unit_acted & (actions.act == ACT_MINE) & \
+            (self.unit_job == JOB_TITLES.index("miner")) & \
+            (actions.act_body >= 0)
+        rows = np.arange(self.batch)
+        for u in np.nonzero(wants.any(axis=0))[0]:
+            body = np.maximum(actions.act_body[:, u], 0)
+            reach = distance(self.unit_x[:, u], self.unit_y[:, u],
+                             self.asteroid_x[rows, body],
+                             self.asteroid_y[rows, body])
+            owner = self.asteroid_owner[rows, body]
+            amount = self.asteroid_amount[rows, body]
+            ok = wants[:, u] & self.asteroid_alive[rows, body] & \
+                (amount > 0) & \
+                (reach <= self.job_range[u] + self.asteroid_radius[body]) & \
+                ((owner < 0) | (owner == self.current_player))
+            load = self.unit_cargo[:, u].sum(axis=1)
+            taken = np.minimum(amount, self.mining_speed)
+            taken = np.where(load + taken > self.job_carry_limit[u],
+                             self.job_carry_limit[u] - load, taken)
+
+            material = self.asteroid_material[body]
+            ok &= material >= 0
+            taken = np.where(ok, taken, 0.0)
+            self.unit_cargo[rows, u, np.maximum(material, 0)] += taken
+            self.asteroid_amount[rows, body] -= taken
+            self.asteroid_owner[rows, body] = np.where(
+                ok, self.current_player, owner)
+            self.unit_acted[:, u] |= ok
+            self.unit_busy[:, u] |= ok
+            self.unit_dash_x[:, u] = np.where(ok, self.unit_x[:, u],
+                                              self.unit_dash_x[:, u])
+            self.unit_dash_y[:, u] = np.where(ok, self.unit_y[:, u],
+                                              self.unit_dash_y[:, u])
+            self.unit_moves[:, u] = np.where(ok, 0.0, self.unit_moves[:, u])
+
+    def _on_map(self, x, y):
+        return (x >= 0) & (y >= 0) & (x <= self.size_x) & (y <= self.size_y)
+
+    # -- end of turn ------------------------------------------------------
+
+    def _update_projectiles(self):
+        hit_radius = self.projectile_radius + self.ship_radius
+        rows = np.arange(self.batch)
+
+        # missiles resolve in order, as one that kills its target leaves
+        # any later missile chasing it without a target
+        for p in np.nonzero(self.projectile_owner == self.current_player)[0]:
+            target = self.projectile_target[p]
+            alive = self.projectile_alive[:, p]
+            if target < 0:
+                self.projectile_alive[:, p] = False
+                continue
+
+            target_alive = self.unit_alive[:, target]
+            tx = self.unit_x[:, target]
+            ty = self.unit_y[:, target]
+            px = self.projectile_x[:, p]
+            py = self.projectile_y[:, p]
+            dist = distance(px, py, tx, ty)
+            trav = np.minimum(self.projectile_speed, dist)
+            with np.errstate(divide="ignore", invalid="ignore"):
+                scale = np.where(dist > 0, trav / dist, 0.0)
+            nx = px + (tx - px) * scale
+            ny = py + (ty - py) * scale
+            moving = alive & target_alive
+            self.projectile_x[:, p] = np.where(moving, nx, px)
+            self.projectile_y[:, p] = np.where(moving, ny, py)
+            self.projectile_fuel[:, p] -= np.where(moving, trav, 0.0)
+
+            hit = moving & (distance(nx, ny, tx, ty) < hit_radius)
+            self.unit_alive[rows, target] &= ~hit
+            self.projectile_alive[:, p] &= target_alive & ~hit
+
+        in_sun = distance(self.projectile_x, self.projectile_y,
+                          self.sun_x, self.sun_y) < \
+            self.sun_radius + self.projectile_radius
+        target_alive = np.where(
+            self.projectile_target >= 0,
+            self.unit_alive[:, np.maximum(self.projectile_target, 0)], False)
+        self.projectile_alive &= (self.projectile_fuel >= 0) & ~in_sun & \
+            target_alive
+
+        in_sun = distance(self.unit_x, self.unit_y, self.sun_x, self.sun_y) < \
+            self.sun_radius + self.ship_radius
+        self.unit_alive &= (self.unit_energy >= 0) & ~in_sun
+
+    def _update_units(self):
+        mine = (self.unit_owner == self.current_player) & self.unit_alive
+        landing = mine & self.unit_busy
+        self.unit_x = np.where(landing, self.unit_dash_x, self.unit_x)
+        self.unit_y = np.where(landing, self.unit_dash_y, self.unit_y)
+        self.unit_dash_x = np.where(landing, -1000.0, self.unit_dash_x)
+        self.unit_dash_y = np.where(landing, -1000.0, self.unit_dash_y)
+        self.unit_busy &= ~mine
+        self.unit_acted &= ~mine
+        self.unit_moves = np.where(mine, self.job_moves, self.unit_moves)
+
+        self.planet_amount = np.minimum(
+            self.planet_amount + self.planet_recharge_rate,
+            self.planet_energy_cap)
+
+        martyr = self.unit_alive & \
+            (self.unit_job == JOB_TITLES.index("martyr"))
+        self.unit_shield = np.where(
+            martyr, np.minimum(self.unit_shield + self.martyr_regen,
+                               self.job_shield), self.unit_shield)
+
+    def _update_orbits(self):
+        self.asteroid_owner = np.where(
+            self.asteroid_owner != self.current_player, -1,
+            self.asteroid_owner).astype(np.int8)
+        self.asteroid_x, self.asteroid_y = rotate_about(
+            self.asteroid_x, self.asteroid_y, self.sun_x, self.sun_y,
+            self._cos, self._sin)
+        if self.regenerate_rate > 0:
+            self.asteroid_amount += self.regenerate_rate
+        else:
+            self.asteroid_alive &= self.asteroid_amount > 0
+
+    def _deposit(self):
+        for player in range(len(self.player_ids)):
+            at_base = self.unit_alive & (distance(
+                self.unit_x, self.unit_y, self.planet_x[player],
+                self.planet_y[player]) <= self.planet_radius[player])
+            if not at_base.any():
+                continue
+
+            cargo = np.where(at_base[..., None], self.unit_cargo, 0.0)
+            self.money[:, player] += (cargo * self.values).sum(axis=(1, 2))
+            self.victory_points[:, player] += cargo[..., 3].sum(axis=1)
+            self.unit_cargo[at_base] = 0.0
+
+            # repairs are paid for one ship at a time out of the planet's
+            # energy; the server only restores shields at the second planet
+            for u in np.nonzero((at_base & (
+                    self.unit_owner == player)).any(axis=0))[0]:
+                dif = self.job_energy[u] - self.unit_energy[:, u]
+                if player == 1:
+                    dif = dif + self.job_shield[u] - self.unit_shield[:, u]
+                ok = at_base[:, u] & (self.unit_owner[u] == player) & \
+                    (dif < self.planet_amount[:, player])
+                self.unit_energy[:, u] = np.where(ok, self.job_energy[u],
+                                                  self.unit_energy[:, u])
+                if player == 1:
+                    self.unit_shield[:, u] = np.where(
+                        ok, self.job_shield[u], self.unit_shield[:, u])
+                self.planet_amount[:, player] -= np.where(ok, dif, 0.0)
+
+
+def load_gamelog(path):
+    """Loads a (optionally gzipped) gamelog from disk.
+
+    Returns:
+        dict: The parsed gamelog.
+    """
+    opener = gzip.open if path.endswith(".gz") else open
+    with opener(path, "rt") as gamelog_file:
+        return json.load(gamelog_file)
+
+
+def _actions_from_runs(sim, runs):
+    actions = sim.new_actions()
+    for run in runs:
+        unit = sim.unit_index.get(run["caller"]["id"])
+        if unit is None:
+            continue
+        args = run.get("args") or {}
+        name = run["functionName"]
+        if name == "move":
+            actions.move(unit, args["x"], args["y"])
+        elif name == "dash":
+            actions.dash(unit, args["x"], args["y"])
+        elif name == "mine" and args.get("body"):
+            body = sim.asteroid_index.get(args["body"]["id"])
+            if body is not None:
+                actions.mine(unit, body)
+    return actions
+
+
+def _max_error(ids, xs, ys, actual_ids, actual_xs, actual_ys, alive):
+    index = {id: i for i, id in enumerate(actual_ids)}
+    worst = 0.0
+    for i, id in enumerate(ids):
+        if alive[i] and id in index:
+            j = index[id]
+            worst = max(worst, float(np.hypot(xs[i] - actual_xs[j],
+                                              ys[i] - actual_ys[j])))
+    return worst
+
+
+def replay(gamelog):
+    """Merges a recorded gamelog's deltas into a client side Game one at a
+    time, like the client does while playing.
+
+    Args:
+        gamelog (dict): A gamelog, as returned by load_gamelog().
+
+    Yields:
+        tuple[dict, games.stardash.game.Game]: Each delta, and the game after
+        it has been merged.
+    """
+    from copy import deepcopy
+    from joueur.game_manager import GameManager
+    from games.stardash.game import Game
+
+    game = Game()
+    manager = GameManager(game)
+    manager.set_constants(gamelog["constants"])
+
+    for delta in gamelog["deltas"]:
+        # merging consumes the delta, and the gamelog may be replayed again
+        manager.apply_delta_state(deepcopy(delta["game"]))
+        yield delta, game
+
+
+def validate(gamelog, tolerance=1.0):
+    """Replays a recorded gamelog, predicting each turn from the one before
+    it and the commands actually sent, and compares against what happened.
+
+    Args:
+        gamelog (dict): A gamelog, as returned by load_gamelog().
+        tolerance (float): The largest position error that still counts as
+            an accurate turn.
+
+    Returns:
+        dict: 'turns' with per turn max position errors for asteroids,
+        units and projectiles, and 'accuracy', the fraction of turns where
+        every error was within the tolerance.
+    """
+    turns = []
+    sim = None
+    runs = []
+    for delta, game in replay(gamelog):
+        if delta["type"] == "start":
+            sim = Simulator(game)
+        elif delta["type"] == "ran":
+            runs.append(delta["data"]["run"])
+        elif delta["type"] == "finished" and sim is not None:
+            sim.step(_actions_from_runs(sim, runs))
+            actual = Simulator(game)
+            turns.append({
+                "turn": actual.turn,
+                "asteroids": _max_error(
+                    sim.asteroid_ids, sim.asteroid_x[0], sim.asteroid_y[0],
+                    actual.asteroid_ids, actual.asteroid_x[0],
+                    actual.asteroid_y[0], sim.asteroid_alive[0]),
+                "units": _max_error(
+                    sim.unit_ids, sim.unit_x[0], sim.unit_y[0],
+                    actual.unit_ids, actual.unit_x[0], actual.unit_y[0],
+                    sim.unit_alive[0]),
+                "projectiles": _max_error(
+                    sim.projectile_ids, sim.projectile_x[0],
+                    sim.projectile_y[0], actual.projectile_ids,
+                    actual.projectile_x[0], actual.projectile_y[0],
+                    sim.projectile_alive[0]),
+            })
+            sim = actual
+            runs = []
+
+    accurate = sum(1 for t in turns if max(
+        t["asteroids"], t["units"], t["projectiles"]) <= tolerance)
+    return {
+        "turns": turns,
+        "accuracy": accurate / len(turns) if turns else 0.0,
+    }
+
+
+def benchmark(sim, turns=10, repeat=5):
+    """Measures simulated turns per second for a (batched) simulator.
+
+    Args:
+        sim (Simulator): The state to step from, which is left untouched.
+        turns (int): How many turns each run steps.
+        repeat (int): How many runs to time.
+
+    Returns:
+        float: Simulated turns per second, counting every batch row.
+    """
+    elapsed = 0.0
+    for _ in range(repeat):
+        clone = sim.copy()
+        started = time.perf_counter()
+        clone.run(turns)
+        elapsed += time.perf_counter() - started
+    return sim.batch * turns * repeat / elapsed
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description="Checks the Stardash simulator against a gamelog and "
+                    "reports its throughput.")
+    parser.add_argument("gamelog", help="path to a (gzipped) gamelog")
+    parser.add_argument("--batch", type=int, default=256,
+                        help="simulations stepped at once for throughput")
+    parser.add_argument("--turns", type=int, default=20,
+                        help="turns stepped per throughput run")
+    args = parser.parse_args()
+
+    log = load_gamelog(args.gamelog)
+    result = validate(log)
+    for t in result["turns"]:
+        print("turn {turn:4d}  asteroids {asteroids:8.3f}  units "
+              "{units:8.3f}  projectiles {projectiles:8.3f}".format(**t))
+    print("accuracy: {:.1%} of {} turns".format(result["accuracy"],
+                                                 len(result["turns"])))
+
+    start = next(game for delta, game in replay(log))
+    rate = benchmark(Simulator(start, batch=args.batch), turns=args.turns)
+    print("throughput: {:,.0f} simulated turns per second (batch of {})"
+          .format(rate, args.batch))
@@ -0,0 +1,205 @@
+# Threats: where every missile is headed and when it will hit.
+#
+# Missiles fly straight at their target by projectile_speed each time their
+# owner ends a turn, burning that much fuel, and kill the target when they
+# get within projectile_radius + ship_radius of it. Every missile is projected
+# along that path at once, assuming targets stay where they are.
+
+import numpy as np
+
+from games.stardash.geometry import distance
+
+
+class ThreatMap():
+    """Projected paths of every projectile, with per unit time to impact and
+    a rasterized danger field over the map.
+
+    Rebuild it once per turn with update(), then query it for every unit:
+
+        threats = ThreatMap(self.game, self.player)
+        for unit in self.player.units:
+            turns, missile = threats.incoming(unit)
+    """
+
+    def __init__(self, game, player=None):
+        """Creates a threat map and projects the current projectiles.
+
+        Args:
+            game (games.stardash.game.Game): The game being played.
+            player (games.stardash.player.Player): The player being
+                threatened, whose own projectiles are left out of the danger
+                field. None to include every projectile.
+        """
+        self.game = game
+        self.player = player
+        self.update()
+
+    def update(self):
+        """Re-projects every projectile from the current game state."""
+        game = self.game
+        speed = float(game.projectile_speed)
+        self.hit_radius = game.projectile_radius + game.ship_radius
+        sun = game.bodies[2]
+
+        self.projectiles = list(game.projectiles)
+        self.units = list(game.units)
+        self._unit_index = {u.id: i for i, u in enumerate(self.units)}
+        unit_index = self._unit_index
+        projectiles = self.projectiles
+
+        px = np.array([p.x for p in projectiles], dtype=np.float64)
+        py = np.array([p.y for p in projectiles], dtype=np.float64)
+        fuel = np.array([p.fuel for p in projectiles], dtype=np.float64)
+        self.targets = np.array(
+            [unit_index.get(p.target.id, -1) if p.target else -1
+             for p in projectiles], dtype=np.int64)
+        has_target = self.targets >= 0
+        tx = np.array([p.target.x if p.target else p.x for p in projectiles],
+                      dtype=np.float64)
+        ty = np.array([p.target.y if p.target else p.y for p in projectiles],
+                      dtype=np.float64)
+
+        # the number of moves until the hit, and until the fuel runs out
+        dist = distance(px, py, tx, ty)
+        to_hit = np.floor(np.maximum(dist - self.hit_radius, 0.0) / speed) + 1
+        alive = has_target & (fuel >= 0)
+        fueled = np.where(alive, np.floor(np.maximum(fuel, 0.0) / speed) + 1,
+                          0)
+        moves = np.where(to_hit <= fueled, to_hit, fueled).astype(np.int64)
+        steps = int(moves.max()) if moves.size else 0
+
+        # positions after each move, row 0 being where they are now
+        step = np.arange(steps + 1)[None, :]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            trav = np.minimum(step * speed, dist[:, None])
+            scale = np.where(dist[:, None] > 0, trav / dist[:, None], 0.0)
+        self.path_x = px[:, None] + (tx - px)[:, None] * scale
+        self.path_y = py[:, None] + (ty - py)[:, None] * scale
+        self.path_valid = step <= moves[:, None]
+
+        # flying into the sun ends a missile before it can hit anything
+        burned = self.path_valid & (step > 0) & (distance(
+            self.path_x, self.path_y, sun.x, sun.y) <
+            sun.radius + game.projectile_radius)
+        if burned.any():
+            first = np.where(burned.any(axis=1), burned.argmax(axis=1),
+                             steps + 1)
+            moves = np.minimum(moves, first)
+            self.path_valid &= step <= moves[:, None]
+
+        self.hits = alive & (to_hit <= moves)
+        self.moves = moves
+
+        # missiles move when their owner ends a turn, so ones fired by the
+        # player whose turn it is move one turn sooner
+        now = np.array([p.owner is game.current_player for p in projectiles],
+                       dtype=bool)
+        self.impact_turns = np.where(
+            self.hits, 2 * moves - now, np.inf).astype(np.float64)
+        self._step_turns = 2 * step - now[:, None]
+
+        self.unit_impact = np.full(len(self.units), np.inf)
+        self.unit_threat = np.full(len(self.units), -1, dtype=np.int64)
+        order = np.argsort(-self.impact_turns)
+        for p in order[self.hits[order]]:
+            # the soonest missile for each unit is written last
+            self.unit_impact[self.targets[p]] = self.impact_turns[p]
+            self.unit_threat[self.targets[p]] = p
+
+    def incoming(self, unit):
+        """The soonest missile that will hit a unit, if any.
+
+        Args:
+            unit (games.stardash.unit.Unit): The unit to check.
+
+        Returns:
+            tuple[float, games.stardash.projectile.Projectile]: How many turn
+            ends until the hit (1 meaning the end of this turn) and the
+            missile, or (inf, None) if nothing will hit it.
+        """
+        i = self._unit_index.get(unit.id)
+        if i is None or self.unit_threat[i] < 0:
+            return np.inf, None
+        return self.unit_impact[i], self.projectiles[self.unit_threat[i]]
+
+    def shootdown_targets(self, unit):
+        """The missiles a unit could shoot down now, soonest impact first.
+
+        Args:
+            unit (games.stardash.unit.Unit): A corvette or missileboat.
+
+        Returns:
+            list[games.stardash.projectile.Projectile]: Enemy missiles in
+            range that will hit something, in order of time to impact.
+        """
+        if not self.projectiles:
+            return []
+        # the server allows missileboats' shootdowns as far as corvettes'
+        reach = self.game.jobs[0].range
+        near = (distance(self.path_x[:, 0], self.path_y[:, 0],
+                         unit.x, unit.y) <= reach) & self.hits
+        return [self.projectiles[p]
+                for p in np.argsort(self.impact_turns, kind="stable")
+                if near[p] and self.projectiles[p].owner is not unit.owner]
+
+    def danger_field(self, cell_size=50):
+        """Rasterizes the projected missile paths over the map.
+
+        Each cell is worth 1 / turns until the first missile sweeps within
+        hit range of its center, so 1 means a missile passes there at the
+        end of this turn and 0 means none ever will.
+
+        Args:
+            cell_size (float): The width and height of each cell.
+
+        Returns:
+            numpy.ndarray: A (rows, columns) array, row = y // cell_size and
+            column = x // cell_size.
+        """
+        game = self.game
+        columns = int(np.ceil(game.size_x / cell_size))
+        rows = int(np.ceil(game.size_y / cell_size))
+        field = np.zeros((rows, columns))
+
+        mask = self.path_valid[:, 1:].copy()
+        if self.player is not None:
+            mask &= np.array([p.owner is not self.player
+                              for p in self.projectiles], dtype=bool)[:, None]
+        if not mask.any():
+            return field
+
+        # the segment each missile sweeps during each of its moves
+        x0 = self.path_x[:, :-1][mask]
+        y0 = self.path_y[:, :-1][mask]
+        x1 = self.path_x[:, 1:][mask]
+        y1 = self.path_y[:, 1:][mask]
+        turns = self._step_turns[:, 1:][mask]
+
+        # only the cells in a window around each segment can be in range, so
+        # check those rather than the whole map
+        reach = self.game.projectile_speed + 2 * self.hit_radius
+        window = int(np.ceil(reach / cell_size)) + 1
+        offset = np.arange(window)
+        col = np.floor((np.minimum(x0, x1) - self.hit_radius) / cell_size)
+        row = np.floor((np.minimum(y0, y1) - self.hit_radius) / cell_size)
+        col = col[:, None, None] + offset[None, None, :]
+        row = row[:, None, None] + offset[None, :, None]
+        cx = (col + 0.5) * cell_size
+        cy = (row + 0.5) * cell_size
+
+        x0, y0, x1, y1, turns = (v[:, None, None]
+                                 for v in (x0, y0, x1, y1, turns))
+        dx = x1 - x0
+        dy = y1 - y0
+        length = dx * dx + dy * dy
+        with np.errstate(divide="ignore", invalid="ignore"):
+            t = np.clip(((cx - x0) * dx + (cy - y0) * dy) / length, 0.0, 1.0)
+        t = np.nan_to_num(t)
+        near = (distance(cx, cy, x0 + t * dx, y0 + t * dy) <=
+                self.hit_radius) & (col >= 0) & (row >= 0) & \
+            (col < columns) & (row < rows)
+
+        soonest = np.full(rows * columns, np.inf)
+        cells = (row * columns + col)[near].astype(np.int64)
+        np.minimum.at(soonest, cells, np.broadcast_to(turns, near.shape)[near])
+        return (1.0 / soonest).reshape(rows, columns)
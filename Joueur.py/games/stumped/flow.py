@@ -0,0 +1,323 @@
+# River aware routing for Stumped: moving with the water's flow costs a
+# Beaver fewer moves than moving across or against it, so the shortest path
+# by steps is often not the cheapest. Edges are weighted by flow_direction
+# and searched with Dijkstra.
+#
+# Most questions are "how far is every Beaver from the nearest X": the
+# nearest food spawner, a lodge to drop branches at. FlowRouter answers them
+# with one search out from all the X at once, backwards along the edges, and
+# keeps the resulting tree for the rest of the turn, so every Beaver's answer
+# is a lookup.
+
+import heapq
+
+
+# the moves a step costs, as the server's Tile.getMovementCost has it: less
+# going the way the Tile being left flows, more going into a Tile flowing
+# back at the Beaver, else MOVE_COST (Land Tiles have no flow)
+MOVE_COST = 2
+WITH_FLOW_COST = 1
+AGAINST_FLOW_COST = 3
+
+# Tile.flow_direction values in the order of the Tile.tile_<direction>s
+_DIRECTIONS = ("North", "East", "South", "West")
+_OPPOSITES = {"North": "South", "East": "West", "South": "North",
+              "West": "East"}
+
+
+def flow_cost(tile, neighbor):
+    """The moves it costs to step from a Tile onto a neighbor.
+
+    Args:
+        tile (Tile): The Tile being left.
+        neighbor (Tile): The Tile stepped onto, next to it.
+
+    Returns:
+        int: WITH_FLOW_COST with the flow of the Tile being left, else
+        AGAINST_FLOW_COST against the flow of the Tile stepped onto, else
+        MOVE_COST.
+    """
+    direction = _DIRECTIONS[_step(tile, neighbor)]
+    if tile.flow_direction == direction:
+        return WITH_FLOW_COST
+    if neighbor.flow_direction == _OPPOSITES[direction]:
+        return AGAINST_FLOW_COST
+    return MOVE_COST
+
+
+class PathTree():
+    """The cheapest way from every Tile to the nearest of some sources.
+
+    Attributes:
+        cost (list[float]): The moves from each tile index to its nearest
+            source, inf if none can be reached.
+        next (list[int]): The tile index to step to from each tile index,
+            -1 at the sources and where none can be reached.
+        source (list[int]): The tile index of each tile's nearest source, -1
+            if none can be reached.
+    """
+
+    def __init__(self, game, cost, next, source):
+        self.game = game
+        self.cost = cost
+        self.next = next
+        self.source = source
+
+    def _index(self, tile):
+        return tile.x + tile.y * self.game.map_width
+
+    def cost_from(self, tile):
+        """The moves from a Tile to its nearest source, inf if none."""
+        return self.cost[self._index(tile)]
+
+    def source_of(self, tile):
+        """The nearest source Tile to a Tile, or None if none can be
+        reached.
+        """
+        source = self.source[self._index(tile)]
+        return self.game.tiles[source] if source >= 0 else None
+
+    def path_from(self, tile):
+        """The cheapest path from a Tile to its nearest source.
+
+        Returns:
+            list[Tile]: The path, as with AI.find_path: first the Tile next
+            to the start, last the source (which, being a lodge or spawner,
+            can't be stepped onto, so stop a Tile short of it). Empty if no
+            source can be reached.
+        """
+        tiles = self.game.tiles
+        i = self._index(tile)
+        if self.source[i] < 0:
+            return []
+        path = []
+        while self.next[i] >= 0:
+            i = self.next[i]
+            path.append(tiles[i])
+        return path
+
+
+class FlowRouter():
+    """Flow weighted path finding for a game of Stumped.
+
+    Trees are cached until the turn changes (or refresh() is called), so ask
+    freely for every Beaver:
+
+        router = FlowRouter(self.game)
+        for beaver, (spawner, cost, path) in router.nearest_spawners(
+                self.player.beavers, "food").items():
+            steps = router.affordable(beaver, path[:-1])
+            ...
+    """
+
+    def __init__(self, game, cost=flow_cost):
+        """Creates a router for a game whose tiles have been sent.
+
+        Args:
+            game (games.stumped.game.Game): The game.
+            cost (function): Takes the Tile being left and the Tile stepped
+                onto, returns the moves it costs. Defaults to flow_cost().
+        """
+        self.game = game
+        self.cost = cost
+        self._turn = None
+        self._edges = None
+        self._trees = {}
+
+    def refresh(self):
+        """Forgets the cached trees, for when Beavers moved mid turn."""
+        self._turn = None
+
+    def _prepare(self):
+        """Builds the edge costs and clears the trees at the start of each
+        turn.
+        """
+        game = self.game
+        if self._turn == game.current_turn:
+            return
+        self._turn = game.current_turn
+        self._trees = {}
+
+        # (neighbor, cost) of every edge out of each tile index
+        width, height = game.map_width, game.map_height
+        self._edges = []
+        for tile in game.tiles:
+            edges = []
+            for direction in _DIRECTIONS:
+                neighbor = getattr(tile, "tile_" + direction.lower())
+                if neighbor is not None:
+                    edges.append((neighbor.x + neighbor.y * width,
+                                  self.cost(tile, neighbor)))
+            self._edges.append(edges)
+        # and every edge into each tile index, for the backwards searches
+        self._reverse = [[] for _ in range(width * height)]
+        for i, edges in enumerate(self._edges):
+            for neighbor, cost in edges:
+                self._reverse[neighbor].append((i, cost))
+        self._open = game.pathable_mask()
+
+    def find_path(self, start, goal):
+        """Finds the path from start to goal that costs the fewest moves.
+
+        Args:
+            start (Tile): The starting Tile.
+            goal (Tile): The goal Tile, which need not be pathable.
+
+        Returns:
+            list[Tile]: The path, as with AI.find_path.
+        """
+        self._prepare()
+        width = self.game.map_width
+        start_index = start.x + start.y * width
+        goal_index = goal.x + goal.y * width
+        if start_index == goal_index:
+            return []
+
+        best = {start_index: 0}
+        came_from = {start_index: -1}
+        fringe = [(0, start_index)]
+        while fringe:
+            so_far, current = heapq.heappop(fringe)
+            if current == goal_index:
+                break
+            if so_far > best[current]:
+                continue
+            for neighbor, cost in self._edges[current]:
+                if neighbor != goal_index and not self._open[neighbor]:
+                    continue
+                total = so_far + cost
+                if neighbor not in best or total < best[neighbor]:
+                    best[neighbor] = total
+                    came_from[neighbor] = current
+                    heapq.heappush(fringe, (total, neighbor))
+        else:
+            return []
+
+        tiles = self.game.tiles
+        path = []
+        current = goal_index
+        while current != start_index:
+            path.append(tiles[current])
+            current = came_from[current]
+        path.reverse()
+        return path
+
+    def path_cost(self, start, path):
+        """The moves following a path from start costs."""
+        total = 0
+        for tile in path:
+            total += self.cost(start, tile)
+            start = tile
+        return total
+
+    def affordable(self, beaver, path):
+        """How much of a path a Beaver can walk with the moves it has left.
+
+        Returns:
+            list[Tile]: The start of the path it can afford this turn.
+        """
+        moves = beaver.moves
+        start = beaver.tile
+        for i, tile in enumerate(path):
+            moves -= self.cost(start, tile)
+            if moves < 0:
+                return path[:i]
+            start = tile
+        return path
+
+    def tree(self, sources):
+        """Gets (searching if needed this turn) the tree of cheapest paths
+        to the nearest of some Tiles.
+
+        Args:
+            sources (list[Tile]): The Tiles to route to.
+
+        Returns:
+            PathTree: The tree.
+        """
+        self._prepare()
+        width = self.game.map_width
+        key = frozenset(tile.x + tile.y * width for tile in sources)
+        if key not in self._trees:
+            self._trees[key] = self._search(key)
+        return self._trees[key]
+
+    def _search(self, sources):
+        """Multi source Dijkstra backwards along the edges, so costs are of
+        paths towards the sources. Like find_path, a Tile that is not
+        pathable (a Beaver's own) gets a cost but is not walked through.
+        """
+        count = len(self._edges)
+        inf = float("inf")
+        cost = [inf] * count
+        next = [-1] * count
+        source = [-1] * count
+        fringe = []
+        for i in sources:
+            cost[i] = 0
+            source[i] = i
+            fringe.append((0, i))
+        heapq.heapify(fringe)
+        while fringe:
+            so_far, current = heapq.heappop(fringe)
+            if so_far > cost[current]:
+                continue
+            if current not in sources and not self._open[current]:
+                continue
+            for neighbor, step in self._reverse[current]:
+                total = so_far + step
+                if total < cost[neighbor]:
+                    cost[neighbor] = total
+                    next[neighbor] = current
+                    source[neighbor] = source[current]
+                    heapq.heappush(fringe, (total, neighbor))
+        return PathTree(self.game, cost, next, source)
+
+    def to_spawners(self, type=None):
+        """The tree to the nearest Spawner, of a type ("food" or
+        "branches") if given.
+        """
+        return self.tree([tile for tile in self.game.tiles
+                          if tile.spawner is not None and
+                          (type is None or tile.spawner.type == type)])
+
+    def to_lodges(self, owner=None):
+        """The tree to the nearest lodge, of a Player if given."""
+        return self.tree([tile for tile in self.game.tiles
+                          if tile.lodge_owner is not None and
+                          (owner is None or tile.lodge_owner == owner)])
+
+    def nearest_spawners(self, beavers, type=None):
+        """Finds the cheapest Spawner (of a type, if given) for every Beaver
+        from a single search.
+
+        Args:
+            beavers (list[Beaver]): The Beavers to route.
+            type (str): "food" or "branches", None for either.
+
+        Returns:
+            dict[Beaver, tuple[Spawner, float, list[Tile]]]: For each Beaver
+            that can reach one, the Spawner, the moves to get there and the
+            path, whose last Tile is the Spawner's.
+        """
+        tree = self.to_spawners(type)
+        found = {}
+        for beaver in beavers:
+            if beaver.tile is None:
+                continue
+            spawner = tree.source_of(beaver.tile)
+            if spawner is not None:
+                found[beaver] = (spawner.spawner, tree.cost_from(beaver.tile),
+                                 tree.path_from(beaver.tile))
+        return found
+
+
+def _step(tile, neighbor):
+    """The index in _DIRECTIONS of the step from a Tile to its neighbor."""
+    if neighbor.y < tile.y:
+        return 0
+    if neighbor.x > tile.x:
+        return 1
+    if neighbor.y > tile.y:
+        return 2
+    return 3
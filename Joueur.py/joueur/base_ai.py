@@ -2,18 +2,27 @@
 from joueur.utilities import camel_case_converter
 import joueur.error_code as error_code
 import joueur.ansi_color_coder as color
+from joueur.timing import Clock
 import sys
 
 
 # @class BaseAI: the basic AI functions that are the same between games
 class BaseAI:
+    # modules the AI imports later (e.g. inside functions) that are worth
+    # importing in the background while connecting, e.g. ["scipy.optimize"]
+    preload = []
+
     def __init__(self, game):
         self._game = game
         self._player = None
         self._settings = {}
+        self._clock = None
+        self._pondered = None
+        self._startup = {}
 
     def set_player(self, player):
         self._player = player
+        self._clock = Clock(self._game, player)
 
     @property
     def game(self):
@@ -31,6 +40,14 @@ class BaseAI:
         """
         return self._player
 
+    @property
+    def clock(self):
+        """The player's time, with the deadline of the current order.
+
+        :rtype: joueur.timing.Clock
+        """
+        return self._clock
+
     def set_settings(self, ai_settings_str):
         if ai_settings_str:
             settings = ai_settings_str.split("&")
@@ -52,6 +69,34 @@ class BaseAI:
         """
         return self._settings[key] if key in self._settings else None
 
+    # intended to be overridden by the AI class
+    def prepare(self):
+        """Called on a worker thread while waiting in the lobby for the
+        other players, for setup that doesn't need the game: loading opening
+        books, building lookup tables, starting worker pools, warming up
+        NumPy. The game has not been sent yet, so don't read it. It is
+        finished before start() is called.
+        """
+        pass
+
+    # intended to be overridden by the AI class
+    def prepare_game(self):
+        """Called once the starting state of the game is in, before
+        start(), for setup that needs it: adjacency tables, distance fields
+        and the like. How long it takes is reported in startup.
+        """
+        pass
+
+    @property
+    def startup(self):
+        """Seconds taken before the game: from running to being in the
+        lobby ("to_lobby"), by "prepare", waiting in the "lobby" (prepare ran
+        during it) and by "prepare_game".
+
+        :rtype: dict
+        """
+        return self._startup
+
     # intended to be overridden by the AI class
     def start(self):
         pass
@@ -60,6 +105,27 @@ class BaseAI:
     def game_updated(self):
         pass
 
+    # intended to be overridden by the AI class, if it wants to think while
+    # waiting on the server, see joueur.pondering
+    def ponder(self, should_stop):
+        """Called on a worker thread while the client waits for the server,
+        e.g. during the opponent's turn. The game won't change until it
+        returns, so it may read it freely, but must return soon after
+        should_stop() becomes True.
+
+        Args:
+            should_stop (function): Returns True once it should stop.
+
+        Returns:
+            Anything, kept as pondered.
+        """
+        return None
+
+    @property
+    def pondered(self):
+        """What ponder last returned, None if it hasn't yet."""
+        return self._pondered
+
     # intended to be overridden by the AI class
     def _do_order(self, order, arguments):
         callback = getattr(self, camel_case_converter(order))
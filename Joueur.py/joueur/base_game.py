@@ -5,6 +5,7 @@ from joueur.delta_mergeable import DeltaMergeable
 class BaseGame(DeltaMergeable):
     def __init__(self):
         DeltaMergeable.__init__(self)
+        self._delta_listeners = []
 
     def get_game_object(self, id):
         """ gets the game object with the given id, or None
@@ -14,3 +15,22 @@ class BaseGame(DeltaMergeable):
         """
         if id in self.game_objects:
             return self.game_objects[id]
+
+    def add_delta_listener(self, listener):
+        """ registers a function to call each time a delta has been merged
+
+        Args:
+            listener (function): called with the merged delta (dict), whose
+                'gameObjects' map the id of every changed game object to its
+                changed (camelCase) attributes
+        """
+        self._delta_listeners.append(listener)
+
+    def remove_delta_listener(self, listener):
+        """ stops calling a function registered via add_delta_listener
+
+        Args:
+            listener (function): the previously added listener
+        """
+        if listener in self._delta_listeners:
+            self._delta_listeners.remove(listener)
@@ -0,0 +1,167 @@
+# Board arrays for the tiled games: every Tile's state as (map_height,
+# map_width) NumPy arrays, so whole-board features are single array
+# operations instead of loops over Tiles.
+#
+# Which arrays a game gets is read off its Tile class: every number or bool a
+# Tile has (gold, redium, branches, harvest_rate, ...) becomes an array. The
+# arrays are filled once, then only the Tiles a delta touched are re-read:
+# Tiles it changed, and the Tiles the units and structures it changed (e.g.
+# their owner or tile) are on and were last on.
+
+import numpy as np
+
+# Tile attributes holding the unit standing on it, in the tiled games
+_UNIT_ATTRIBUTES = ("unit", "cowboy", "beaver")
+
+# Tile attributes that are not worth an array
+_SKIPPED = ("x", "y", "id")
+
+# what unit holds where a Tile has a unit with no owner (like a merchant)
+NO_OWNER = -2
+
+
+class BoardArrays():
+    """Arrays describing every Tile, indexed [y, x].
+
+    Arrays:
+        type: The index of each Tile's type in type_names, for games whose
+            Tiles have a type.
+        passable: Tile.is_pathable() of each Tile, from Game.pathable_mask.
+        owner: The index in game.players of the player owning the Tile (its
+            owner or lodge_owner) or the owned thing on it that is not a unit
+            (a port, structure or young gun), else -1.
+        unit: The index in game.players of the owner of the unit on the
+            Tile, -1 if there is none, NO_OWNER if it has no owner.
+        and one float array per number or bool a Tile has, by its name.
+
+    The arrays are updated in place by refresh(), which Game.board_arrays
+    calls, so copy any you want to compare against later.
+    """
+
+    def __init__(self, game):
+        """Creates the arrays for a game whose tiles have been sent.
+
+        Args:
+            game (BaseGame): A game with tiles, map_width and map_height.
+        """
+        self.game = game
+        shape = (game.map_height, game.map_width)
+        blank = type(game.tiles[0])()
+
+        self.numerics = []
+        self._references = []
+        for key, value in sorted(vars(blank).items()):
+            name = key.lstrip("_")
+            if not key.startswith("_") or name in _SKIPPED:
+                continue
+            if isinstance(value, (bool, int, float)):
+                self.numerics.append(name)
+            elif value is None and not name.startswith("tile_"):
+                self._references.append(name)
+        self._has_type = "_type" in vars(blank)
+        self._owners = [name for name in self._references
+                        if name == "owner" or name.endswith("_owner")]
+
+        self.type_names = [""]
+        self._type_codes = {"": 0}
+        self.type = np.zeros(shape, dtype=np.int16)
+        self.passable = np.zeros(shape, dtype=bool)
+        self.owner = np.full(shape, -1, dtype=np.int8)
+        self.unit = np.full(shape, -1, dtype=np.int8)
+        self.fields = {
+            "type": self.type,
+            "passable": self.passable,
+            "owner": self.owner,
+            "unit": self.unit,
+        }
+        for name in self.numerics:
+            self.fields[name] = np.zeros(shape)
+            setattr(self, name, self.fields[name])
+
+        self._dirty = set(range(len(game.tiles)))
+        # id -> the index of the Tile each game object on a Tile was last
+        # read on, to re-read once it moves off it
+        self._placed = {}
+        game.add_delta_listener(self._delta_merged)
+
+    def __getitem__(self, name):
+        return self.fields[name]
+
+    def _delta_merged(self, delta):
+        game_objects = self.game.game_objects
+        width = self.game.map_width
+        for id in delta.get("gameObjects", {}):
+            obj = game_objects.get(id)
+            if obj is None:
+                continue
+            if obj.game_object_name == "Tile":
+                self._dirty.add(obj.x + obj.y * width)
+                continue
+            if id in self._placed:
+                self._dirty.add(self._placed[id])
+            tile = getattr(obj, "tile", None)
+            if tile is not None:
+                self._dirty.add(tile.x + tile.y * width)
+
+    def refresh(self):
+        """Re-reads every Tile changed since the last refresh.
+
+        Returns:
+            BoardArrays: This, for chaining.
+        """
+        if not self._dirty:
+            return self
+
+        game = self.game
+        tiles = game.tiles
+        players = {player.id: i for i, player in enumerate(game.players)}
+        width = game.map_width
+        pathable = game.pathable_mask()
+        for i in self._dirty:
+            tile = tiles[i]
+            at = (i // width, i % width)
+
+            if self._has_type:
+                name = tile.type
+                if name not in self._type_codes:
+                    self._type_codes[name] = len(self.type_names)
+                    self.type_names.append(name)
+                self.type[at] = self._type_codes[name]
+
+            self.passable[at] = pathable[i]
+            for name in self._references:
+                if name in self._owners:
+                    continue
+                placed = getattr(tile, name)
+                if placed is not None:
+                    self._placed[placed.id] = i
+            self.owner[at] = self._owner_of(tile, players)
+            self.unit[at] = self._unit_of(tile, players)
+            for name in self.numerics:
+                self.fields[name][at] = getattr(tile, name)
+
+        self._dirty = set()
+        return self
+
+    def _owner_of(self, tile, players):
+        for name in self._owners:
+            owner = getattr(tile, name)
+            if owner is not None:
+                return players.get(owner.id, -1)
+        for name in self._references:
+            if name in _UNIT_ATTRIBUTES or name in self._owners:
+                continue
+            built = getattr(tile, name)
+            owner = getattr(built, "owner", None)
+            if owner is not None:
+                return players.get(owner.id, -1)
+        return -1
+
+    def _unit_of(self, tile, players):
+        for name in _UNIT_ATTRIBUTES:
+            unit = getattr(tile, name, None)
+            if unit is not None:
+                owner = getattr(unit, "owner", None)
+                return players.get(owner.id, -1) if owner is not None \
+                    else NO_OWNER
+        return -1
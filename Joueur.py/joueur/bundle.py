@@ -0,0 +1,200 @@
+# Builds a single file client for one game, so starting a client in a fresh
+# container doesn't pay for compiling or validating every module it imports.
+#
+# The bundle is a zipapp holding joueur/, main.py as __main__.py and only
+# the chosen game's package, each module next to an unchecked hash .pyc
+# (compiled by the same Python that will run it), so nothing is compiled,
+# and no source is stat()ed or hashed, at startup. It is stored
+# uncompressed, trading size for not inflating modules as they're imported.
+# Or, with --format dir, the same files as a directory with __pycache__.
+#
+#     python -m joueur.bundle build Chess              # -> build/chess.pyz
+#     python build/chess.pyz Chess -s localhost:3000
+#
+#     python -m joueur.bundle bench Chess              # ./main.py
+#     python -m joueur.bundle bench Chess --built      # build/chess.pyz
+#
+# bench times from starting the interpreter to the client sending "play",
+# against a stand in server that answers the alias and stops there.
+
+import os
+import py_compile
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import zipapp
+
+from joueur.utilities import camel_case_converter
+
+_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# only used to build bundles, so not put in them
+_LEFT_OUT = ("bundle.py",)
+
+
+def _sources(game_name):
+    """The (path in the repo, path in the bundle) of every module bundled."""
+    yield os.path.join(_ROOT, "main.py"), "__main__.py"
+    for package in ("joueur", os.path.join("games",
+                                           camel_case_converter(game_name))):
+        directory = os.path.join(_ROOT, package)
+        if not os.path.isdir(directory):
+            raise ValueError("There is no {}.".format(package))
+        for folder, folders, files in os.walk(directory):
+            folders[:] = [name for name in folders if name != "__pycache__"]
+            for name in sorted(files):
+                if name.endswith(".py") and name not in _LEFT_OUT:
+                    path = os.path.join(folder, name)
+                    yield path, os.path.relpath(path, _ROOT)
+
+
+def default_output(game_name, format="zip"):
+    """Where build() writes a game's bundle by default."""
+    name = camel_case_converter(game_name)
+    return os.path.join(_ROOT, "build",
+                        name + (".pyz" if format == "zip" else ""))
+
+
+def build(game_name, output=None, format="zip", sources=True):
+    """Builds the bundle of a game's client.
+
+    Args:
+        game_name (str): The game, e.g. "Chess".
+        output (str): Where to write it, defaults to build/<game>.pyz (or
+            build/<game>/ as a dir).
+        format (str): "zip" for a zipapp, "dir" for a directory.
+        sources (bool): Whether to include the .py files, for tracebacks.
+
+    Returns:
+        str: The path written.
+    """
+    output = output or default_output(game_name, format)
+    unchecked = py_compile.PycInvalidationMode.UNCHECKED_HASH
+
+    with tempfile.TemporaryDirectory() as staging:
+        for source, target in _sources(game_name):
+            staged = os.path.join(staging, target)
+            os.makedirs(os.path.dirname(staged), exist_ok=True)
+            shutil.copyfile(source, staged)
+        # games/ is a namespace package in the repo, which zipimport can't
+        # always find modules under
+        open(os.path.join(staging, "games", "__init__.py"), "w").close()
+
+        for folder, _, files in os.walk(staging):
+            for file in files:
+                if not file.endswith(".py"):
+                    continue
+                path = os.path.join(folder, file)
+                # zipimport looks for a .pyc beside the .py, a directory in
+                # __pycache__
+                compiled = path + "c" if format == "zip" else None
+                py_compile.compile(path, cfile=compiled, doraise=True,
+                                   invalidation_mode=unchecked)
+                if not sources and format == "zip" and \
+                        file != "__main__.py":
+                    os.remove(path)
+
+        os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+        if format == "zip":
+            zipapp.create_archive(staging, output,
+                                  interpreter="/usr/bin/env python3")
+        else:
+            if os.path.exists(output):
+                shutil.rmtree(output)
+            shutil.copytree(staging, output)
+    return output
+
+
+def time_to_play(command, game_name, timeout=30.0):
+    """Times one client from starting its interpreter to sending "play",
+    against a stand in server on a free local port.
+
+    Args:
+        command (list[str]): The client to run, without the game and
+            server arguments.
+        game_name (str): The game the stand in names.
+
+    Returns:
+        float: The seconds.
+    """
+    listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    listener.bind(("localhost", 0))
+    listener.listen(1)
+    listener.settimeout(timeout)
+    port = listener.getsockname()[1]
+
+    began = time.perf_counter()
+    client = subprocess.Popen(
+        command + [game_name, "-s", "localhost:{}".format(port)],
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        connection, _ = listener.accept()
+        connection.settimeout(timeout)
+        received = ""
+        named = False
+        while '"play"' not in received:
+            data = connection.recv(4096).decode("utf-8")
+            if not data:
+                raise RuntimeError("The client hung up before playing.")
+            received += data
+            if not named and '"alias"' in received:
+                connection.sendall((
+                    '{"event": "named", "data": "' + game_name + '"}' +
+                    chr(4)).encode("utf-8"))
+                named = True
+        return time.perf_counter() - began
+    finally:
+        client.kill()
+        client.wait()
+        listener.close()
+
+
+def benchmark(game_name, bundle=None, runs=10):
+    """Times clients from start to "play" several times.
+
+    Args:
+        game_name (str): The game.
+        bundle (str): A bundle to time, else ./main.py.
+        runs (int): How many clients to time.
+
+    Returns:
+        list[float]: The seconds of each, fastest first.
+    """
+    command = [sys.executable, "-u",
+               bundle or os.path.join(_ROOT, "main.py")]
+    return sorted(time_to_play(command, game_name) for _ in range(runs))
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description="Builds and benchmarks single file clients.")
+    parser.add_argument("command", choices=["build", "bench"])
+    parser.add_argument("game", help="the game, e.g. Chess")
+    parser.add_argument("bundle", nargs="?", default=None,
+                        help="bench: the bundle to time, else ./main.py")
+    parser.add_argument("--output", default=None,
+                        help="build: where to write the bundle")
+    parser.add_argument("--format", choices=["zip", "dir"], default="zip",
+                        help="build: a zipapp or a directory")
+    parser.add_argument("--no-sources", action="store_true",
+                        help="build: leave out the .py files")
+    parser.add_argument("--built", action="store_true",
+                        help="bench: time the bundle build writes by default")
+    parser.add_argument("--runs", type=int, default=10,
+                        help="bench: how many clients to time")
+    args = parser.parse_args()
+
+    if args.command == "build":
+        print(build(args.game, args.output, args.format,
+                    not args.no_sources))
+    else:
+        bundle = default_output(args.game) if args.built else args.bundle
+        times = benchmark(args.game, bundle, args.runs)
+        print("start to play: fastest {:.3f}s, median {:.3f}s, slowest "
+              "{:.3f}s over {} runs".format(times[0], times[len(times) // 2],
+                                            times[-1], len(times)))
@@ -7,235 +7,364 @@ import time
 from joueur.serializer import serialize, deserialize
 import joueur.error_code as error_code
 from joueur.game_manager import GameManager
+from joueur.pondering import Ponderer
 import joueur.ansi_color_coder as color
 
 EOT_CHAR = chr(4)
 
 
-# Client: A singleton module that talks to the server receiving game
-# information and sending commands to execute. Clients perform no game logic
-class _Client:
+# Client: talks to the server receiving game information and sending commands
+# to execute. Clients perform no game logic. Each holds the state of one
+# connection, so many can run in one process (see joueur.swarm); the module
+# functions below use the default one, for the usual one client a process.
+class Client:
     socket = None
+    # set by setup() if the AI ponders
+    ponderer = None
+    # where each order's timing is written as a line of JSON, if the
+    # JOUEUR_TELEMETRY environment variable names a file
+    telemetry = None
+    # moving average of run_on_server's round trips, in seconds
+    round_trip = None
+    # the data of the "over" event, once the game is over. From then on
+    # nothing more is sent, as the server has hung up, so an order the game
+    # ended during (e.g. by the player timing out) runs to its end harmlessly
+    over = None
+
+    def __init__(self):
+        self.hostname = 'localhost'
+        self.port = 3000
+        self.game = None
+        self.ai = None
+        self.manager = None
+        # events sent and received, for load testing
+        self.sent = 0
+        self.received = 0
+        self._print_io = False
+        self._received_buffer = ""
+        self._events_stack = []
+        self._buffer_size = 1024
+        self._timeout_time = 1.0
+
+    def connect(self, hostname='localhost', port=3000, print_io=False):
+        self.hostname = hostname
+        self.port = int(port)
+
+        self._print_io = print_io
+        self._received_buffer = ""
+        self._events_stack = []
+        if os.environ.get('JOUEUR_TELEMETRY'):
+            self.telemetry = open(os.environ['JOUEUR_TELEMETRY'], 'a',
+                                  buffering=1)
+
+        print(color.text('cyan') + 'Connecting to:', self.hostname + ':' +
+              str(self.port) + color.reset())
+
+        try:
+            self.socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+
+            # Silly Windows
+            self.socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+
+            # so the blocking on recv doesn't hang forever and other system
+            # interrupts (e.g. keyboard) can be handled
+            self.socket.settimeout(self._timeout_time)
+            self.socket.connect((self.hostname, self.port))
+        except socket.error as e:
+            error_code.handle_error(
+                error_code.COULD_NOT_CONNECT,
+                e,
+                'Could not connect to {}:{}'.format(
+                    self.hostname,
+                    self.port
+                )
+            )
 
-_client = _Client()
+    def setup(self, game, ai, manager):
+        self.game = game
+        self.ai = ai
+        self.manager = manager
+        # so the game's objects run their functions through this client
+        game._client = self
+        if Ponderer.wanted(ai):
+            self.ponderer = Ponderer(ai)
+
+    def _send_raw(self, string):
+        if self._print_io:
+            print(color.text('magenta') + 'TO SERVER --> ' + str(
+                string) + color.reset())
+        self.socket.send(string)
+
+    # sends the server an event via socket, unless the game is over
+    def send(self, event, data):
+        if self.over is not None:
+            return
+        self.sent += 1
+        self._send_raw(
+            (json.dumps({
+                'sentTime': int(time.time()),
+                'event': event,
+                'data': serialize(data)
+            }) + EOT_CHAR).encode('utf-8')
+        )
 
+    def disconnect(self, exit_code=None):
+        if self.socket:
+            self.socket.close()
+
+    def run_on_server(self, caller, function_name, args=None):
+        if self.over is not None:
+            return None
+        sent_at = time.perf_counter()
+        self.send('run', {
+            'caller': caller,
+            'functionName': function_name,
+            'args': args
+        })
+
+        ran_data = self.wait_for_event('ran')
+        if self.over is not None:
+            # the game ended instead of the server running it
+            return None
+        self._note_round_trip(time.perf_counter() - sent_at)
+        return deserialize(ran_data, self.game)
+
+    def _note_round_trip(self, seconds):
+        if self.round_trip is None:
+            self.round_trip = seconds
+        else:
+            self.round_trip += (seconds - self.round_trip) * 0.2
+
+    def round_trip_time(self):
+        """The average time a command to the server has taken to be run and
+        answered, in seconds, 0 before any have been sent.
+        """
+        return self.round_trip or 0.0
+
+    # handles events until the game is over
+    def play(self):
+        if self.ponderer:
+            self.ponderer.start()
+        self.wait_for_event(None)
+
+    def wait_for_event(self, event):
+        while self.over is None:
+            self.wait_for_events()
+            # the game can't change under the pondering thread
+            if self.ponderer:
+                self.ponderer.stop()
+
+            while len(self._events_stack) > 0:
+                event_name, data = self.next_event()
+                if event is not None and event_name == event:
+                    return data
+                else:
+                    self._auto_handle(event_name, data)
+                    if self.over is not None:
+                        return None
+
+            # idle until the server sends more, e.g. during the opponent's
+            # turn
+            if event is None and self.ponderer and self.ai.player:
+                self.ponderer.start()
+        return None
+
+    # loops to check the socket for incoming data and ends once some events
+    # get found
+    def wait_for_events(self):
+        if len(self._events_stack) > 0:
+            return  # as we already have events to handle, no need to wait
+
+        try:
+            while True:
+                try:
+                    self.receive()
+                except socket.timeout:
+                    pass  # timed out so keyboard/system interrupts can be
+                    #       handled, hence the while true loop above
+                except socket.error as e:
+                    self._read_failed(e)
+
+                if len(self._events_stack) > 0:
+                    return
+        except (KeyboardInterrupt, SystemExit):
+            self.disconnect()
+
+    def _read_failed(self, error):
+        # a client of its own process ends with it
+        error_code.handle_error(
+            error_code.CANNOT_READ_SOCKET, error,
+            'Error reading socket while waiting for events')
+
+    def receive(self):
+        """Reads what the server has sent once, queueing the events in it.
+
+        Returns:
+            str: What was read, "" if the server hung up.
+        """
+        sent = self.socket.recv(self._buffer_size).decode('utf-8')
+        if not sent:
+            return sent
+        elif self._print_io:
+            print(color.text('magenta') + 'FROM SERVER <-- ' + str(
+                sent) + color.reset())
+
+        split = (self._received_buffer + sent).split(EOT_CHAR)
+        # the last item will either be "" if the last char was an EOT_CHAR,
+        #   or a partial data we need to buffer anyways
+        self._received_buffer = split.pop()
+
+        # oldest first, so next_event() pops events in the order sent
+        for json_str in split:
+            try:
+                parsed = json.loads(json_str)
+            except ValueError as e:
+                error_code.handle_error(error_code.MALFORMED_JSON, e,
+                                        'Could not parse json "{}"'.format(
+                                            json_str)
+                                        )
+
+            self.received += 1
+            self._events_stack.insert(0, parsed)
+        return sent
+
+    def next_event(self):
+        """Takes the oldest event received and not yet handled.
+
+        Returns:
+            tuple[str, dict]: The event's name and data, or (None, None) if
+            there are none.
+        """
+        if not self._events_stack:
+            return None, None
+        sent = self._events_stack.pop()
+        return sent['event'], sent['data'] if 'data' in sent else None
+
+    # called via the client run loop when data is sent
+    def _auto_handle(self, event, data=None):
+        auto_handle_function = getattr(self, '_auto_handle_' + event, None)
+
+        if auto_handle_function:
+            return auto_handle_function(data)
+        else:
+            error_code.handle_error(
+                error_code.UNKNOWN_EVENT_FROM_SERVER, message=(
+                    'Could not auto handle event "{}".'.format(event)))
+
+    def _auto_handle_delta(self, data):
+        try:
+            self.manager.apply_delta_state(data)
+        except:
+            error_code.handle_error(error_code.DELTA_MERGE_FAILURE,
+                                    sys.exc_info(), 'Error merging delta')
+
+        if self.ai.player:  # then the AI is ready for updates
+            self.ai.game_updated()
+
+    def _auto_handle_order(self, data):
+        args = deserialize(data['args'], self.game)
+        if self.ai.clock is not None:
+            self.ai.clock.start()
+        try:
+            returned = self.ai._do_order(data['name'], args)
+        except:
+            print('esc info', type(sys.exc_info()))
+            error_code.handle_error(error_code.AI_ERRORED, sys.exc_info(),
+                                    'AI errored executing order "{}"'.format(
+                                        data.name))
+
+        if self.ai.clock is not None:
+            timing = self.ai.clock.finish(data['name'])
+            if self.telemetry:
+                self.telemetry.write(json.dumps(timing) + '\n')
+
+        if self.over is not None:
+            return  # the game ended during the order, there's no one to tell
+        self.send("finished", {
+            'orderIndex': data['index'],
+            'returned': returned
+        })
+
+    def _auto_handle_invalid(self, data):
+        try:
+            self.ai.invalid(data['message'])
+        except:
+            error_code.handle_error(error_code.AI_ERRORED, sys.exc_info(),
+                                    'AI errored while handling invalid data.')
+
+    def _auto_handle_fatal(self, data):
+        error_code.handle_error(
+            error_code.FATAL_EVENT,
+            message='Got a fatal event from the server: ' + data['message']
+        )
 
-def connect(hostname='localhost', port=3000, print_io=False):
-    _client.hostname = hostname
-    _client.port = int(port)
+    def _auto_handle_over(self, data):
+        won = self.ai.player.won
+        reason = self.ai.player.reason_won \
+            if self.ai.player.won \
+            else self.ai.player.reason_lost
 
-    _client._print_io = print_io
-    _client._received_buffer = ""
-    _client._events_stack = []
-    _client._buffer_size = 1024
-    _client._timeout_time = 1.0
+        print('{}Game is Over. {} because {}{}'.format(
+            color.text('green'),
+            'I Won!' if won else 'I Lost :(',
+            reason,
+            color.reset()
+        ))
 
-    print(color.text('cyan') + 'Connecting to:', _client.hostname + ':' + str(
-        _client.port) + color.reset())
+        try:
+            self.ai.end(won, reason)
+        except:
+            error_code.handle_error(error_code.AI_ERRORED, sys.exc_info(),
+                                    'AI errored during end.')
 
-    try:
-        _client.socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        if 'message' in data:
+            message = data['message'].replace('__HOSTNAME__', self.hostname)
+            print(color.text('cyan') + message + color.reset())
 
-        # Silly Windows
-        _client.socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        # play() returns now, leaving what happens next to whoever called it
+        self.over = data
+        self.disconnect()
 
-        # so the blocking on recv doesn't hang forever and other system
-        # interrupts (e.g. keyboard) can be handled
-        _client.socket.settimeout(_client._timeout_time)
-        _client.socket.connect((_client.hostname, _client.port))
-    except socket.error as e:
-        error_code.handle_error(
-            error_code.COULD_NOT_CONNECT,
-            e,
-            'Could not connect to {}:{}'.format(
-                _client.hostname,
-                _client.port
-            )
-        )
 
+# the client of a process running one AI, used by the functions below
+_client = Client()
 
-def setup(game, ai, manager):
-    _client.game = game
-    _client.ai = ai
-    _client.manager = manager
 
+def connect(hostname='localhost', port=3000, print_io=False):
+    _client.connect(hostname, port, print_io)
 
-def _send_raw(string):
-    if _client._print_io:
-        print(color.text('magenta') + 'TO SERVER --> ' + str(
-            string) + color.reset())
-    _client.socket.send(string)
+
+def setup(game, ai, manager):
+    _client.setup(game, ai, manager)
 
 
 # sends the server an event via socket
 def send(event, data):
-    _send_raw(
-        (json.dumps({
-            'sentTime': int(time.time()),
-            'event': event,
-            'data': serialize(data)
-        }) + EOT_CHAR).encode('utf-8')
-    )
+    _client.send(event, data)
 
 
 def disconnect(exit_code=None):
-    if _client.socket:
-        _client.socket.close()
+    _client.disconnect(exit_code)
 
 
 def run_on_server(caller, function_name, args=None):
-    send('run', {
-        'caller': caller,
-        'functionName': function_name,
-        'args': args
-    })
+    return _client.run_on_server(caller, function_name, args)
 
-    ran_data = wait_for_event('ran')
-    return deserialize(ran_data, _client.game)
+
+def round_trip_time():
+    """The average time a command to the server has taken to be run and
+    answered, in seconds, 0 before any have been sent.
+    """
+    return _client.round_trip_time()
 
 
 def play():
-    wait_for_event(None)
+    _client.play()
 
 
 def wait_for_event(event):
-    while True:
-        wait_for_events()
-
-        while len(_client._events_stack) > 0:
-            sent = _client._events_stack.pop()
-            data = sent['data'] if 'data' in sent else None
-            if event is not None and sent['event'] == event:
-                return data
-            else:
-                _auto_handle(sent['event'], data)
+    return _client.wait_for_event(event)
 
 
-# loops to check the socket for incoming data and ends once some events
-# get found
 def wait_for_events():
-    if len(_client._events_stack) > 0:
-        return  # as we already have events to handle, no need to wait for more
-
-    try:
-        while True:
-            sent = None
-            try:
-                sent = _client.socket.recv(_client._buffer_size) \
-                    .decode('utf-8')
-            except socket.timeout:
-                pass  # timed out so keyboard/system interrupts can be handled,
-                #       hence the while true loop above
-            except socket.error as e:
-                error_code.handle_error(
-                    error_code.CANNOT_READ_SOCKET, e,
-                    'Error reading socket while waiting for events')
-
-            if not sent:
-                continue
-            elif _client._print_io:
-                print(color.text('magenta') + 'FROM SERVER <-- ' + str(
-                    sent) + color.reset())
-
-            split = (_client._received_buffer + sent).split(EOT_CHAR)
-            # the last item will either be "" if the last char was an EOT_CHAR,
-            #   or a partial data we need to buffer anyways
-            _client._received_buffer = split.pop()
-
-            for json_str in reversed(split):
-                try:
-                    parsed = json.loads(json_str)
-                except ValueError as e:
-                    error_code.handle_error(error_code.MALFORMED_JSON, e,
-                                            'Could not parse json ""'.format(
-                                                json_str)
-                                            )
-
-                _client._events_stack.append(parsed)
-
-            if len(_client._events_stack) > 0:
-                return
-    except (KeyboardInterrupt, SystemExit):
-        disconnect()
-
-
-# called via the client run loop when data is sent
-def _auto_handle(event, data=None):
-    # the current module, e.g. the Client module that acts as a singleton
-    g = globals()
-    auto_handle_function = g['_auto_handle_' + event]
-
-    if auto_handle_function:
-        return auto_handle_function(data)
-    else:
-        error_code.handle_error(error_code.UNKNOWN_EVENT_FROM_SERVER, message=(
-            'Could not auto handle event "{}".'.format(event)))
-
-
-def _auto_handle_delta(data):
-    try:
-        _client.manager.apply_delta_state(data)
-    except:
-        error_code.handle_error(error_code.DELTA_MERGE_FAILURE, sys.exc_info(),
-                                'Error merging delta')
-
-    if _client.ai.player:  # then the AI is ready for updates
-        _client.ai.game_updated()
-
-
-def _auto_handle_order(data):
-    args = deserialize(data['args'], _client.game)
-    try:
-        returned = _client.ai._do_order(data['name'], args)
-    except:
-        print('esc info', type(sys.exc_info()))
-        error_code.handle_error(error_code.AI_ERRORED, sys.exc_info(),
-                                'AI errored executing order "{}"'.format(
-                                    data.name))
-
-    send("finished", {
-        'orderIndex': data['index'],
-        'returned': returned
-    })
-
-
-def _auto_handle_invalid(data):
-    try:
-        _client.ai.invalid(data['message'])
-    except:
-        error_code.handle_error(error_code.AI_ERRORED, sys.exc_info(),
-                                'AI errored while handling invalid data.')
-
-
-def _auto_handle_fatal(data):
-    error_code.handle_error(
-        error_code.FATAL_EVENT,
-        message='Got a fatal event from the server: ' + data['message']
-    )
-
-
-def _auto_handle_over(data):
-    won = _client.ai.player.won
-    reason = _client.ai.player.reason_won \
-        if _client.ai.player.won \
-        else _client.ai.player.reason_lost
-
-    print('{}Game is Over. {} because {}{}'.format(
-        color.text('green'),
-        'I Won!' if won else 'I Lost :(',
-        reason,
-        color.reset()
-    ))
-
-    try:
-        _client.ai.end(won, reason)
-    except:
-        error_code.handle_error(error_code.AI_ERRORED, sys.exc_info(),
-                                'AI errored during end.')
-
-    if 'message' in data:
-        message = data['message'].replace('__HOSTNAME__', _client.hostname)
-        print(color.text('cyan') + message + color.reset())
-
-    disconnect()
-    os._exit(0)
+    _client.wait_for_events()
@@ -0,0 +1,239 @@
+# Cooperative pathfinding for the tiled games: plans the paths of many
+# friendly units together, so they don't plan to walk into each other.
+#
+# This is windowed hierarchical cooperative A* (WHCA*). Units are planned one
+# at a time in priority order with a space-time A* over (tile, step), and
+# every planned unit reserves the tiles it will be on at each step for the
+# units after it. Searches look a limited window of steps ahead, guided by the
+# true distance to their goal ignoring other units.
+#
+# Plans assume moves are made a step at a time: every unit's first move in
+# priority order, then every unit's second move, and so on. So a unit may
+# plan to step onto a tile a unit planned after it is standing on, once that
+# unit has had its first move to get out of the way, which its plan then
+# has to make.
+
+import heapq
+import time
+
+import numpy as np
+
+from joueur.distance_fields import distance_matrix
+from joueur.pathfinding import grid_neighbors
+
+
+class CooperativePlanner():
+    """Plans non colliding paths for a group of units.
+
+    Each turn, give it every unit's starting tile and goal, most important
+    first:
+
+        planner = CooperativePlanner(self.game, window=8, budget=0.05)
+        paths = planner.plan([(unit.tile, goal) for unit, goal in orders])
+        for step in range(moves):
+            for (unit, goal), path in zip(orders, paths):
+                if step < len(path) and path[step] is not unit.tile:
+                    unit.move(path[step])
+    """
+
+    def __init__(self, game, window=8, budget=0.05, passable=None):
+        """Creates a planner.
+
+        Args:
+            game (BaseGame): A game with tiles, map_width and map_height.
+            window (int): How many steps ahead each unit plans.
+            budget (float): The seconds plan() may take. Units not planned
+                in time are given empty paths and stay put, unless a unit
+                planned before them is counting on them moving.
+            passable (function): Takes a Tile, returns if units may go
+                through it, defaulting to Tile.is_pathable. The units' own
+                tiles are always passable, as they are tracked separately.
+        """
+        self.game = game
+        self.window = window
+        self.budget = budget
+        self.passable = passable
+
+        # statistics about the last plan()
+        self.planned = 0
+        self.expanded = 0
+        self.elapsed = 0.0
+
+    def plan(self, agents):
+        """Plans a path for every unit.
+
+        Args:
+            agents (list[tuple[Tile, Tile]]): The (start, goal) of every
+                unit, in priority order. A goal of None keeps the unit
+                where it is, out of the others' way.
+
+        Returns:
+            list[list[Tile]]: The tile each unit is on after each of its
+            steps (repeated when it waits), up to window steps. A path may
+            stop short of its goal when the goal is further than the window.
+        """
+        began = time.perf_counter()
+        game = self.game
+        width = game.map_width
+        tiles = game.tiles
+        neighbors = grid_neighbors(width, game.map_height)
+
+        starts = [start.x + start.y * width for start, _ in agents]
+        goals = [goal.x + goal.y * width if goal is not None else None
+                 for _, goal in agents]
+
+        if self.passable is None:
+            open_tiles = [bool(i) for i in game.pathable_mask()]
+        else:
+            open_tiles = [bool(self.passable(tile)) for tile in tiles]
+        for start in starts:
+            open_tiles[start] = True
+
+        # the true distance to every goal, ignoring other units, for all
+        # the goals in one search
+        distinct = sorted(set(goal for goal in goals if goal is not None))
+        distances = distance_matrix(width, game.map_height, distinct,
+                                    np.array(open_tiles, dtype=bool))
+        heuristics = dict(zip(distinct, distances.tolist()))
+
+        self.expanded = 0
+        # units that can't get out of the way of those before them, so are
+        # planned around as if they stay put
+        stuck = set()
+        while True:
+            paths = self._plan_in_order(starts, goals, neighbors, open_tiles,
+                                        heuristics, stuck, began)
+            if isinstance(paths, list):
+                break
+            stuck.add(paths)
+
+        self.elapsed = time.perf_counter() - began
+        return [[tiles[i] for i in path[1:]] for path in paths]
+
+    def _plan_in_order(self, starts, goals, neighbors, open_tiles,
+                       heuristics, stuck, began):
+        """Plans each unit in turn, around those planned before it.
+
+        Returns:
+            list[list[int]]|int: The tile of each unit at each step, or the
+            index of a unit that couldn't get out of the way of a unit
+            planned before it, which would then walk into it.
+        """
+        # (step, tile) -> True for every tile some planned unit is on then,
+        # and tile -> step for tiles planned units stop on for good
+        self._reserved = set()
+        self._parked = {}
+        # units yet to be planned are standing on their starts, for good if
+        # they aren't going anywhere, else until their first move
+        staying = [goal is None or goal == start or index in stuck
+                   for index, (start, goal) in enumerate(zip(starts, goals))]
+        waiting = {}
+        for start, stays in zip(starts, staying):
+            waiting.setdefault(start, [0, 0])[stays] += 1
+
+        self.planned = 0
+        paths = []
+        for index, (start, goal) in enumerate(zip(starts, goals)):
+            waiting[start][staying[index]] -= 1
+            if not any(waiting[start]):
+                del waiting[start]
+
+            # a unit others' plans have moving out of their way is planned
+            # however late it is
+            in_the_way = self._in_the_way(start)
+            out_of_time = time.perf_counter() - began > self.budget and \
+                not in_the_way
+            if goal is None or goal == start or out_of_time:
+                path = [start]
+            else:
+                path = self._search(start, goal, neighbors, open_tiles,
+                                    heuristics[goal], waiting)
+                self.planned += 1
+            if in_the_way and not self._can_park(path[-1], len(path) - 1):
+                return index
+            self._reserve(path)
+            paths.append(path)
+        return paths
+
+    def _free(self, tile, step, waiting):
+        """If a unit being planned may be on a tile at a step."""
+        counts = waiting.get(tile)
+        # one moving off it gets out of the way with its first move
+        if counts is not None and (counts[1] or step <= 1):
+            return False
+        parked = self._parked.get(tile)
+        if parked is not None and step >= parked:
+            return False
+        # units planned earlier move first in each step, so this unit must
+        # not be in the way of one moving in next step either
+        return (step, tile) not in self._reserved and \
+            (step + 1, tile) not in self._reserved
+
+    def _search(self, start, goal, neighbors, open_tiles, heuristic,
+                waiting):
+        """Space-time A* from start towards goal, avoiding reservations.
+
+        Returns:
+            list[int]: The tile at each step, starting with start.
+        """
+        window = self.window
+        inf = float("inf")
+        came_from = {(start, 0): None}
+        counter = 0
+        fringe = [(heuristic[start], counter, 0, start)]
+        best = None
+        best_key = None
+        while fringe:
+            _, _, step, tile = heapq.heappop(fringe)
+            self.expanded += 1
+            if tile == goal and self._can_park(goal, step):
+                best = (tile, step)
+                break
+            # the first state popped at the end of the window is the one
+            # that leaves the least distance to go after it
+            if step == window:
+                best = (tile, step)
+                break
+            # if every way forward is blocked, get as close as possible
+            key = (heuristic[tile], step)
+            if best_key is None or key < best_key:
+                best, best_key = (tile, step), key
+
+            for neighbor in neighbors[tile] + (tile,):
+                state = (neighbor, step + 1)
+                if state in came_from:
+                    continue
+                if neighbor != tile and neighbor != goal and \
+                        not open_tiles[neighbor]:
+                    continue
+                if heuristic[neighbor] == inf or \
+                        not self._free(neighbor, step + 1, waiting):
+                    continue
+                came_from[state] = (tile, step)
+                counter += 1
+                heapq.heappush(fringe, (
+                    step + 1 + heuristic[neighbor], counter, step + 1,
+                    neighbor))
+
+        path = []
+        state = best
+        while state is not None:
+            path.append(state[0])
+            state = came_from[state]
+        path.reverse()
+        return path
+
+    def _in_the_way(self, tile):
+        """If a unit planned earlier plans to be on a tile after step 0."""
+        return any((step, tile) in self._reserved
+                   for step in range(1, self.window + 2))
+
+    def _can_park(self, tile, step):
+        """If a unit can stop on a tile from a step onwards."""
+        return not any((later, tile) in self._reserved
+                       for later in range(step, self.window + 2))
+
+    def _reserve(self, path):
+        for step, tile in enumerate(path):
+            self._reserved.add((step, tile))
+        self._parked[path[-1]] = len(path) - 1
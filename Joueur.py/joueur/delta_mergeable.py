@@ -1,10 +1,16 @@
 class DeltaMergeable():
     """a game or game object that needs to be delta merged"""
 
+    # the client it was created for (see joueur.client.Client.setup), None
+    # for the default one
+    _client = None
+
     def __init__(self):
         pass
 
     def _run_on_server(self, function_name, **kwargs):
+        if self._client is not None:
+            return self._client.run_on_server(self, function_name, kwargs)
         import joueur.client # avoid circular imports (sphinx won't build docs otherwise)
         return joueur.client.run_on_server(self, function_name, kwargs)
 
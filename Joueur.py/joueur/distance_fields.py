@@ -0,0 +1,192 @@
+# Distance fields for the tiled games: how many steps every tile is from the
+# nearest of a set of source tiles, found for the whole map in one NumPy
+# multi-source breadth first search.
+#
+# Fields are cached per game and only thrown away when a delta changes a
+# Tile, so asking for the same field for every unit, or again next turn when
+# nothing relevant moved, costs a dictionary lookup.
+
+import numpy as np
+
+from joueur.pathfinding import grid_neighbors
+from joueur.utilities import camel_case_converter
+
+_neighbor_arrays = {}
+
+
+def neighbor_array(width, height):
+    """The neighbor table of a width x height map as a (tiles, 4) array,
+    padded with -1 where a tile is on the edge of the map.
+
+    Returns:
+        numpy.ndarray: The north, east, south and west neighbor indexes of
+        every tile.
+    """
+    key = (width, height)
+    if key not in _neighbor_arrays:
+        table = np.full((width * height, 4), -1, dtype=np.int32)
+        for i, neighbors in enumerate(grid_neighbors(width, height)):
+            table[i, :len(neighbors)] = neighbors
+        _neighbor_arrays[key] = table
+    return _neighbor_arrays[key]
+
+
+def multi_source_bfs(neighbors, sources, passable):
+    """Breadth first search out from every source at once.
+
+    Like find_path, tiles that are not passable can be reached (so the
+    distance to something blocking is how far away its neighbor is) but are
+    not walked through. Sources are always walked out of.
+
+    Args:
+        neighbors (numpy.ndarray): A (tiles, 4) table from neighbor_array().
+        sources (list[int]): The indexes of the source tiles.
+        passable (numpy.ndarray): A bool per tile, True if it can be walked
+            through.
+
+    Returns:
+        tuple[numpy.ndarray, numpy.ndarray]: The distance of each tile from
+        its nearest source (inf if it can't be reached), and the index of
+        that source (-1 if none).
+    """
+    count = len(neighbors)
+    distance = np.full(count, np.inf)
+    nearest = np.full(count, -1, dtype=np.int64)
+
+    frontier = np.unique(np.asarray(sources, dtype=np.int64))
+    distance[frontier] = 0
+    nearest[frontier] = frontier
+    steps = 0
+    while frontier.size:
+        steps += 1
+        reached = neighbors[frontier].ravel()
+        source = np.repeat(nearest[frontier], neighbors.shape[1])
+        new = reached >= 0
+        new[new] = np.isinf(distance[reached[new]])
+        reached, first = np.unique(reached[new], return_index=True)
+        distance[reached] = steps
+        nearest[reached] = source[new][first]
+        frontier = reached[passable[reached]]
+    return distance, nearest
+
+
+def distance_matrix(width, height, goals, passable):
+    """The distance from every tile to each of several goals, each goal
+    searched separately but all in the same vectorized steps.
+
+    Args:
+        width (int): The map width, in tiles.
+        height (int): The map height, in tiles.
+        goals (list[int]): The indexes of the goal tiles.
+        passable (numpy.ndarray): A bool per tile, True if it can be walked
+            through.
+
+    Returns:
+        numpy.ndarray: A (goals, tiles) array of distances, inf where the
+        goal can't be reached, with the same rules as multi_source_bfs().
+    """
+    goals = np.asarray(goals, dtype=np.int64)
+    if not len(goals):
+        return np.full((0, width * height), np.inf)
+    rows = np.arange(len(goals))
+    distance = np.full((len(goals), height, width), np.inf)
+    distance.reshape(len(goals), -1)[rows, goals] = 0
+    passable = np.asarray(passable).reshape(height, width)
+
+    walk = np.zeros((len(goals), height, width), dtype=bool)
+    walk.reshape(len(goals), -1)[rows, goals] = True
+    steps = 0
+    while True:
+        steps += 1
+        # spread one step north, south, west and east at once
+        reached = np.zeros_like(walk)
+        reached[:, :-1] |= walk[:, 1:]
+        reached[:, 1:] |= walk[:, :-1]
+        reached[:, :, :-1] |= walk[:, :, 1:]
+        reached[:, :, 1:] |= walk[:, :, :-1]
+        reached &= np.isinf(distance)
+        if not reached.any():
+            return distance.reshape(len(goals), -1)
+        distance[reached] = steps
+        walk = reached & passable
+
+
+class DistanceFields():
+    """Caches distance fields for a tiled game until its Tiles change.
+
+    This backs Game.distance_field and Game.nearest_sources, each game
+    making one the first time either is used.
+    """
+
+    def __init__(self, game, watch=None):
+        """Creates an empty cache that listens to the game's deltas.
+
+        Args:
+            game (BaseGame): A game with tiles, map_width and map_height.
+            watch (list[str]): The Tile attributes whose change throws the
+                cache away, None for any of them.
+        """
+        self.game = game
+        self.watch = set(watch) if watch is not None else None
+        self._fields = {}
+        self._open = {}
+        game.add_delta_listener(self._delta_merged)
+
+    def _delta_merged(self, delta):
+        if not self._fields and not self._open:
+            return
+        game_objects = self.game.game_objects
+        for id, changes in delta.get("gameObjects", {}).items():
+            obj = game_objects.get(id)
+            if obj is None or obj.game_object_name != "Tile" or \
+                    not isinstance(changes, dict):
+                continue
+            if self.watch is None or any(
+                    camel_case_converter(key) in self.watch
+                    for key in changes):
+                self._fields = {}
+                self._open = {}
+                return
+
+    def field(self, sources, passable=None):
+        """Gets (computing it if needed) the field for some sources.
+
+        Args:
+            sources (list[Tile]): The source tiles.
+            passable (function): Takes a Tile, returns if it can be walked
+                through, defaulting to Tile.is_pathable. It is part of the
+                cache key, so pass the same function each time, and it
+                should only depend on the Tiles' own attributes.
+
+        Returns:
+            tuple[numpy.ndarray, numpy.ndarray]: The read only distance and
+            nearest source index of every tile, by tile index.
+        """
+        game = self.game
+        width = game.map_width
+        indexes = tuple(sorted(set(tile.x + tile.y * width
+                                   for tile in sources)))
+        key = (indexes, passable)
+        if key not in self._fields:
+            distance, nearest = multi_source_bfs(
+                neighbor_array(width, game.map_height), indexes,
+                self._passable(passable))
+            distance.flags.writeable = False
+            nearest.flags.writeable = False
+            self._fields[key] = distance, nearest
+        return self._fields[key]
+
+    def _passable(self, passable):
+        """Which tiles can be walked through, shared by every field that
+        uses the same passable function.
+        """
+        if passable not in self._open:
+            tiles = self.game.tiles
+            if passable is None:
+                self._open[None] = np.frombuffer(
+                    bytes(self.game.pathable_mask()), dtype=np.uint8) > 0
+            else:
+                self._open[passable] = np.fromiter(
+                    (passable(tile) for tile in tiles), dtype=bool,
+                    count=len(tiles))
+        return self._open[passable]
@@ -21,7 +21,6 @@ for key, value in dict(locals()).items():
 
 # now import so they don't get put in _by_code
 
-import traceback
 import sys
 import joueur.ansi_color_coder as color
 import os
@@ -41,6 +40,7 @@ def handle_error(error_code, e=None, message=None):
     if e:
         sys.stderr.write("\n{}\n---\n".format(str(e)))
 
+        import traceback # only needed when erroring, so not worth importing at startup
         traceback.print_exc()
 
         sys.stderr.write("---")
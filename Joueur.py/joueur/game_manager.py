@@ -21,11 +21,16 @@ class GameManager():
 
         self._merge_delta(self.game, delta)
 
+        for listener in list(self.game._delta_listeners):
+            listener(delta)
+
     ## game objects can be refences in the delta states for cycles, they will all point to the game objects here.
     def _init_game_objects(self, delta_game_objects):
         for id, obj in delta_game_objects.items():
             if not id in self.game._game_objects: # then we need to create it
-                self.game._game_objects[id] = self._game_object_classes[obj['gameObjectName']]()
+                game_object = self._game_object_classes[obj['gameObjectName']]()
+                game_object._client = self.game._client
+                self.game._game_objects[id] = game_object
 
     ## Correctly apply a single change to a member of a list, dict, or object
     def _set_member(self, state, state_key, value):
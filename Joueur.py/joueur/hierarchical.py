@@ -0,0 +1,660 @@
+# Faster searches for big open tile maps, where even A* expands most of the
+# tiles between the start and the goal.
+#
+# jps() is Jump Point Search for 4-connected grids where every step costs the
+# same. It skips along straight runs of open tiles (with bytes searches, so
+# in C) and only stops where a path could turn, so it expands a handful of
+# tiles per corridor. It finds the same length paths as BFS. On cluttered
+# maps there are places to turn everywhere, and A* is quicker.
+#
+# ClusterGraph is HPA*: the map is cut into square clusters, the open tiles
+# on either side of each cluster border become entrances, and the distances
+# between the entrances of each cluster are found once. Queries search that
+# small graph, then fill in the tiles. Paths are near (not always exactly)
+# the shortest. When tiles open or close, only the clusters around them are
+# rebuilt.
+
+from collections import deque
+import heapq
+import time
+
+
+def jps(width, height, start, goal, passable, stats=None):
+    """Jump Point Search from start to goal on a 4-connected grid.
+
+    Args:
+        width (int): The map width, in tiles.
+        height (int): The map height, in tiles.
+        start (int): The index the path starts at.
+        goal (int): The index the path ends at, which need not be passable.
+        passable (bytearray): Truthy for each tile index that paths may go
+            through, like Game.pathable_mask().
+        stats (dict): If given, "expanded" is set to the number of jump
+            points expanded.
+
+    Returns:
+        list[int]: The indexes of the path, as with pathfinding.bfs().
+    """
+    if stats is not None:
+        stats["expanded"] = 0
+    if start == goal:
+        return []
+
+    goal_x, goal_y = goal % width, goal // width
+
+    # the map a byte per tile, the goal always open, so the runs below can
+    # be found with bytes searches rather than a step at a time
+    if isinstance(passable, (bytes, bytearray)):
+        grid = bytearray(passable)
+    else:
+        grid = bytearray(1 if p else 0 for p in passable)
+    grid[goal] = 1
+    columns = {}
+
+    def column(x):
+        if x not in columns:
+            columns[x] = bytes(grid[x::width])
+        return columns[x]
+
+    def jump_horizontal(x, y, dx):
+        """Runs from (x, y) along its row until a jump point (returning
+        its index) or a wall (returning None).
+        """
+        row = y * width
+        above = row - width if y > 0 else None
+        below = row + width if y < height - 1 else None
+        # a tile above or below that was blocked one step back is a place a
+        # shortest path may need to turn
+        if dx > 0:
+            wall = grid.find(b"\0", row + x + 1, row + width)
+            if wall < 0:
+                wall = row + width
+            point = wall
+            for side in (above, below):
+                if side is not None:
+                    turn = grid.find(b"\0\1", side + x, side + width)
+                    if turn >= 0:
+                        point = min(point, turn + 1 - side + row)
+            if goal_y == y and goal_x > x:
+                point = min(point, goal)
+            return point if point < wall else None
+        wall = grid.rfind(b"\0", row, row + x)
+        if wall < 0:
+            wall = row - 1
+        point = wall
+        for side in (above, below):
+            if side is not None:
+                turn = grid.rfind(b"\1\0", side, side + x + 1)
+                if turn >= 0:
+                    point = max(point, turn - side + row)
+        if goal_y == y and goal_x < x:
+            point = max(point, goal)
+        return point if point > wall else None
+
+    # vertical runs from different tiles down the same column pass the same
+    # tiles, so remember what every tile a run went through would find
+    found = {}
+
+    def jump_vertical(x, y, dy):
+        """Runs from (x, y) along its column, looking sideways at each
+        step, until a jump point (returning its index) or a wall.
+        """
+        tiles = column(x)
+        if dy > 0:
+            wall = tiles.find(b"\0", y + 1)
+            if wall < 0:
+                wall = height
+            stop = wall
+            for side in (x - 1, x + 1):
+                if 0 <= side < width:
+                    turn = column(side).find(b"\0\1", y)
+                    if turn >= 0:
+                        stop = min(stop, turn + 1)
+        else:
+            wall = tiles.rfind(b"\0", 0, y)
+            stop = wall
+            for side in (x - 1, x + 1):
+                if 0 <= side < width:
+                    turn = column(side).rfind(b"\1\0", 0, y + 1)
+                    if turn >= 0:
+                        stop = max(stop, turn)
+        if goal_x == x and (goal_y - y) * dy > 0:
+            stop = min(stop, goal_y) if dy > 0 else max(stop, goal_y)
+
+        passed = []
+        point = None
+        row = y
+        while True:
+            key = (x + row * width) * 2 + (dy > 0)
+            if key in found:
+                point = found[key]
+                break
+            passed.append(key)
+            row += dy
+            if row == stop:
+                if row != wall:
+                    point = x + row * width
+                break
+            if jump_horizontal(x, row, 1) is not None or \
+                    jump_horizontal(x, row, -1) is not None:
+                point = x + row * width
+                break
+        for key in passed:
+            found[key] = point
+        return point
+
+    def directions(x, y, parent):
+        """The directions worth searching from (x, y) given where it was
+        reached from.
+        """
+        if parent is None:
+            return ((1, 0), (-1, 0), (0, 1), (0, -1))
+        px, py = parent % width, parent // width
+        dx = (x > px) - (x < px)
+        dy = (y > py) - (y < py)
+        if dx:
+            return ((dx, 0), (0, 1), (0, -1))
+        return ((0, dy), (1, 0), (-1, 0))
+
+    def heuristic(x, y):
+        return abs(x - goal_x) + abs(y - goal_y)
+
+    start_x, start_y = start % width, start // width
+    came_from = {start: None}
+    best = {start: 0}
+    counter = 0
+    fringe = [(heuristic(start_x, start_y), counter, 0, start)]
+    while fringe:
+        _, _, so_far, current = heapq.heappop(fringe)
+        if current == goal:
+            break
+        if so_far > best[current]:
+            continue
+        if stats is not None:
+            stats["expanded"] += 1
+
+        x, y = current % width, current // width
+        for dx, dy in directions(x, y, came_from[current]):
+            if dx:
+                index = jump_horizontal(x, y, dx)
+            else:
+                index = jump_vertical(x, y, dy)
+            if index is None:
+                continue
+            jx, jy = index % width, index // width
+            total = so_far + abs(jx - x) + abs(jy - y)
+            if index not in best or total < best[index]:
+                best[index] = total
+                came_from[index] = current
+                counter += 1
+                heapq.heappush(fringe, (
+                    total + heuristic(jx, jy), counter, total, index))
+    else:
+        return []
+
+    # fill in the straight runs between the jump points
+    path = []
+    current = goal
+    while current != start:
+        parent = came_from[current]
+        step = 1 if current > parent else -1
+        if abs(current - parent) >= width and \
+                current % width == parent % width:
+            step *= width
+        while current != parent:
+            path.append(current)
+            current -= step
+    path.reverse()
+    return path
+
+
+def _local_search(width, source, cells, passable):
+    """Breadth first search from source that stays within a set of cells.
+
+    Returns:
+        tuple[dict, dict]: The distance to and the parent of every cell
+        reached.
+    """
+    distance = {source: 0}
+    parent = {source: None}
+    fringe = deque([source])
+    while fringe:
+        current = fringe.popleft()
+        if current != source and not passable[current]:
+            continue
+        x = current % width
+        for neighbor in (current - width, current + 1 if x < width - 1
+                         else -1, current + width, current - 1 if x > 0
+                         else -1):
+            if neighbor in cells and neighbor not in distance:
+                distance[neighbor] = distance[current] + 1
+                parent[neighbor] = current
+                fringe.append(neighbor)
+    return distance, parent
+
+
+class ClusterGraph():
+    """An HPA* abstraction of a tiled game's map, kept in sync with
+    Game.pathable_mask().
+
+    Build one per game and keep it, find_path(..., algorithm="hpa") does:
+
+        graph = ClusterGraph(self.game, cluster_size=10)
+        path = graph.find_path(unit.tile, goal)
+    """
+
+    def __init__(self, game, cluster_size=10):
+        """Cuts the map into clusters and finds their entrances.
+
+        Args:
+            game (BaseGame): A tiled game whose tiles have been sent.
+            cluster_size (int): The width and height of each cluster.
+        """
+        self.game = game
+        self.size = cluster_size
+        self.width = game.map_width
+        self.height = game.map_height
+        self.columns = -(-self.width // cluster_size)
+        self.rows = -(-self.height // cluster_size)
+
+        # statistics about the last query and repair
+        self.expanded = 0
+        self.seconds = 0.0
+        self.repaired = 0
+
+        self._mask = bytes(game.pathable_mask())
+        self._cells = [self._cluster_cells(c)
+                       for c in range(self.columns * self.rows)]
+        # (cluster, cluster) -> [(tile, tile)] entrances across their border
+        self._entrances = {}
+        # cluster -> {node: ({node: distance}, {tile: parent})}
+        self._links = {}
+        for cluster in range(self.columns * self.rows):
+            for other in self._neighbor_clusters(cluster):
+                if other > cluster:
+                    self._find_entrances(cluster, other)
+        for cluster in range(self.columns * self.rows):
+            self._link(cluster)
+
+    # -- building -----------------------------------------------------------
+
+    def _cluster_of(self, index):
+        return (index % self.width) // self.size + \
+            (index // self.width) // self.size * self.columns
+
+    def _cluster_cells(self, cluster):
+        left = (cluster % self.columns) * self.size
+        top = (cluster // self.columns) * self.size
+        return frozenset(
+            x + y * self.width
+            for y in range(top, min(top + self.size, self.height))
+            for x in range(left, min(left + self.size, self.width)))
+
+    def _neighbor_clusters(self, cluster):
+        cx, cy = cluster % self.columns, cluster // self.columns
+        if cy > 0:
+            yield cluster - self.columns
+        if cx < self.columns - 1:
+            yield cluster + 1
+        if cy < self.rows - 1:
+            yield cluster + self.columns
+        if cx > 0:
+            yield cluster - 1
+
+    def _find_entrances(self, first, second):
+        """Finds the entrances across the border of two clusters, one in
+        the middle of each open run, or one at each end of long runs.
+        """
+        first, second = min(first, second), max(first, second)
+        size, width = self.size, self.width
+        if first // self.columns == second // self.columns:
+            # side by side in a row of clusters, so the border is a column
+            x = (first % self.columns + 1) * size - 1
+            top = (first // self.columns) * size
+            pairs = [(x + y * width, x + 1 + y * width)
+                     for y in range(top, min(top + size, self.height))]
+        else:
+            y = (first // self.columns + 1) * size - 1
+            left = (first % self.columns) * size
+            pairs = [(x + y * width, x + (y + 1) * width)
+                     for x in range(left, min(left + size, self.width))]
+
+        entrances = []
+        run = []
+        for pair in pairs + [None]:
+            if pair is not None and self._mask[pair[0]] and \
+                    self._mask[pair[1]]:
+                run.append(pair)
+                continue
+            if len(run) >= 6:
+                entrances.extend((run[0], run[-1]))
+            elif run:
+                entrances.append(run[len(run) // 2])
+            run = []
+        self._entrances[(first, second)] = entrances
+
+    def _nodes(self, cluster):
+        nodes = {}
+        for other in self._neighbor_clusters(cluster):
+            key = (min(cluster, other), max(cluster, other))
+            for a, b in self._entrances[key]:
+                mine, theirs = (a, b) if cluster == key[0] else (b, a)
+                nodes.setdefault(mine, []).append(theirs)
+        return nodes
+
+    def _link(self, cluster):
+        """Finds the distances between the entrances of a cluster."""
+        nodes = self._nodes(cluster)
+        cells = self._cells[cluster]
+        links = {}
+        for node, across in nodes.items():
+            distance, parent = _local_search(self.width, node, cells,
+                                             self._mask)
+            edges = {other: distance[other] for other in nodes
+                     if other != node and other in distance}
+            links[node] = (edges, parent, across)
+        self._links[cluster] = links
+
+    def refresh(self):
+        """Rebuilds the clusters around tiles whose passability changed
+        since the graph was built or last refreshed.
+        """
+        mask = bytes(self.game.pathable_mask())
+        if mask == self._mask:
+            return
+        changed = set(self._cluster_of(i) for i, (old, new) in
+                      enumerate(zip(self._mask, mask)) if old != new)
+        self._mask = mask
+        relink = set(changed)
+        for cluster in changed:
+            for other in self._neighbor_clusters(cluster):
+                self._find_entrances(cluster, other)
+                relink.add(other)
+        for cluster in relink:
+            self._link(cluster)
+        self.repaired = len(relink)
+
+    # -- queries ------------------------------------------------------------
+
+    def find_path(self, start, goal):
+        """Finds a path between two Tiles through the cluster graph.
+
+        Args:
+            start (Tile): The starting Tile.
+            goal (Tile): The goal Tile, which need not be pathable.
+
+        Returns:
+            list[Tile]: The path, as with pathfinding.find_path().
+        """
+        width = self.width
+        tiles = self.game.tiles
+        path = self.search(start.x + start.y * width, goal.x + goal.y * width)
+        return [tiles[i] for i in path]
+
+    def search(self, start, goal):
+        """Finds a path between two tile indexes.
+
+        Returns:
+            list[int]: The indexes of the path, as with pathfinding.bfs().
+        """
+        began = time.perf_counter()
+        self.refresh()
+        self.expanded = 0
+        path = self._search(start, goal) if start != goal else []
+        self.seconds = time.perf_counter() - began
+        return path
+
+    def _adjacent(self, index):
+        """The indexes of the tiles next to one, in bounds."""
+        x, y = index % self.width, index // self.width
+        if y > 0:
+            yield index - self.width
+        if x < self.width - 1:
+            yield index + 1
+        if y < self.height - 1:
+            yield index + self.width
+        if x > 0:
+            yield index - 1
+
+    def _ends(self, index):
+        """Local searches from a tile within its cluster, and from each of
+        its open neighbors in other clusters within theirs, as a tile on a
+        cluster border that isn't pathable itself (a unit's own tile, or a
+        goal like a port) may only be reached from the next cluster.
+
+        Returns:
+            list[tuple[int, dict, dict, int]]: The root, distances, parents
+            and cluster of each search, the tile's own first.
+        """
+        cluster = self._cluster_of(index)
+        ends = [(index,) + _local_search(self.width, index,
+                                         self._cells[cluster], self._mask) +
+                (cluster,)]
+        for neighbor in self._adjacent(index):
+            other = self._cluster_of(neighbor)
+            if other != cluster and self._mask[neighbor]:
+                ends.append((neighbor,) + _local_search(
+                    self.width, neighbor, self._cells[other], self._mask) +
+                    (other,))
+        self.expanded += sum(len(end[1]) for end in ends)
+        return ends
+
+    def _search(self, start, goal):
+        width = self.width
+        if goal in self._adjacent(start):
+            return [goal]
+        # the start and goal are temporary nodes, linked to the nodes of
+        # their clusters and those of the clusters across any border they're
+        # on, a step away
+        start_ends = self._ends(start)
+        goal_ends = self._ends(goal)
+
+        goal_x, goal_y = goal % width, goal // width
+
+        def heuristic(index):
+            return abs(index % width - goal_x) + abs(index // width - goal_y)
+
+        # the best complete path found so far, as (length, last node), the
+        # last node None for a path through no nodes, by direct
+        finish = (float("inf"), None)
+        direct = None
+        for root, distance, parents, _ in start_ends:
+            for end, _, _, _ in goal_ends:
+                if end in distance:
+                    length = (root != start) + distance[end] + (end != goal)
+                    if length < finish[0]:
+                        finish = (length, None)
+                        direct = (root, parents, end)
+
+        # how far each node the goal's searches reached is from the goal
+        exits = {}
+        for root, distance, parents, cluster in goal_ends:
+            for node in self._links[cluster]:
+                if node in distance:
+                    length = (root != goal) + distance[node]
+                    if node not in exits or length < exits[node][0]:
+                        exits[node] = (length, root, parents)
+
+        came_from = {}
+        best = {}
+        # the start's search each node was first reached by
+        entries = {}
+        for root, distance, parents, cluster in start_ends:
+            for node in self._links[cluster]:
+                if node in distance:
+                    length = (root != start) + distance[node]
+                    if node not in best or length < best[node]:
+                        best[node] = length
+                        came_from[node] = None
+                        entries[node] = (root, parents)
+        fringe = []
+        counter = 0
+        for node, length in best.items():
+            counter += 1
+            heapq.heappush(fringe, (length + heuristic(node), counter,
+                                    length, node))
+        while fringe:
+            estimate, _, so_far, node = heapq.heappop(fringe)
+            if estimate >= finish[0]:
+                break
+            if so_far > best[node]:
+                continue
+            self.expanded += 1
+            if node in exits and so_far + exits[node][0] < finish[0]:
+                finish = (so_far + exits[node][0], node)
+
+            edges, _, across = self._links[self._cluster_of(node)][node]
+            steps = [(other, cost) for other, cost in edges.items()]
+            steps.extend((other, 1) for other in across)
+            for other, cost in steps:
+                total = so_far + cost
+                if other not in best or total < best[other]:
+                    best[other] = total
+                    came_from[other] = node
+                    counter += 1
+                    heapq.heappush(fringe, (total + heuristic(other),
+                                            counter, total, other))
+
+        length, last = finish
+        if length == float("inf"):
+            return []
+        if last is None:
+            root, parents, end = direct
+            path = [root] if root != start else []
+            path.extend(self._trace(parents, end))
+            if end != goal:
+                path.append(goal)
+            return path
+
+        # the nodes visited, then the tiles between each pair of them
+        nodes = [last]
+        while came_from[nodes[-1]] is not None:
+            nodes.append(came_from[nodes[-1]])
+        nodes.reverse()
+
+        root, parents = entries[nodes[0]]
+        path = [root] if root != start else []
+        path.extend(self._trace(parents, nodes[0]))
+        for node, after in zip(nodes, nodes[1:]):
+            if self._cluster_of(node) != self._cluster_of(after):
+                path.append(after)
+            else:
+                _, parents, _ = self._links[self._cluster_of(node)][node]
+                path.extend(self._trace(parents, after))
+        # the search into the goal leads back to its root from the last node
+        _, root, parents = exits[last]
+        current = parents[last]
+        while current is not None:
+            path.append(current)
+            current = parents[current]
+        if root != goal:
+            path.append(goal)
+        return path
+
+    def _trace(self, parents, end):
+        """The tiles after the root of a local search up to end."""
+        path = []
+        while parents[end] is not None:
+            path.append(end)
+            end = parents[end]
+        path.reverse()
+        return path
+
+
+def _make_map(game_name, width, height, walls, seed):
+    """pathfinding._make_map's map, with the pathable mask and cluster graph
+    a real tiled game has.
+    """
+    import joueur.pathfinding
+
+    game = joueur.pathfinding._make_map(game_name, width, height, walls, seed)
+    mask = bytearray(1 if tile.is_pathable() else 0 for tile in game.tiles)
+    game.pathable_mask = lambda: mask
+    graph = ClusterGraph(game)
+    game.cluster_graph = lambda: graph
+    return game
+
+
+def benchmark(game, queries=200, seed=0):
+    """Times the flat and hierarchical searches over the same random start
+    and goal pairs.
+
+    Args:
+        game (BaseGame): A tiled game with pathable_mask and cluster_graph.
+        queries (int): How many paths to find with each algorithm.
+        seed (int): Seeds the choice of start and goal tiles, any tile
+            for goals and half of the starts, open tiles for the rest.
+
+    Returns:
+        dict[str, tuple[float, float, float]]: The mean seconds per query,
+        nodes expanded per query, and how much longer than the shortest
+        the paths were (1.0 for always the shortest) of each algorithm.
+    """
+    import random
+    import joueur.pathfinding
+
+    rng = random.Random(seed)
+    mask = game.pathable_mask()
+    open_tiles = [tile for i, tile in enumerate(game.tiles) if mask[i]]
+    # goals, and starts, are as often not pathable themselves (units,
+    # structures), which can only be reached from one side
+    pairs = [(rng.choice(open_tiles if i % 2 else game.tiles),
+              rng.choice(game.tiles)) for i in range(queries)]
+
+    results = {}
+    shortest = None
+    for algorithm in ("bfs", "astar", "jps", "hpa"):
+        seconds = expanded = steps = 0
+        lengths = []
+        for start, goal in pairs:
+            stats = {}
+            path = joueur.pathfinding.find_path(game, start, goal,
+                                                algorithm=algorithm,
+                                                stats=stats)
+            seconds += stats["seconds"]
+            expanded += stats["expanded"]
+            lengths.append(len(path))
+        if shortest is None:
+            shortest = lengths
+        elif algorithm != "hpa" and lengths != shortest:
+            raise AssertionError(
+                "{} found paths of different lengths".format(algorithm))
+        found = [(length, best) for length, best in zip(lengths, shortest)
+                 if best]
+        if any(not length for length, _ in found):
+            raise AssertionError("{} missed a path".format(algorithm))
+        steps = sum(length for length, _ in found) / max(
+            1, sum(best for _, best in found))
+        results[algorithm] = (seconds / queries, expanded / queries, steps)
+    return results
+
+
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(
+        description="Benchmarks Jump Point Search and HPA* against the flat "
+        "searches on a tiled game's map.")
+    parser.add_argument("game", help="the tiled game whose Tile class to "
+                        "benchmark with, e.g. pirates")
+    parser.add_argument("--size", action="append", default=[],
+                        help="a WIDTHxHEIGHT map size to try")
+    parser.add_argument("--walls", type=float, default=0.2,
+                        help="the fraction of tiles that are not pathable")
+    parser.add_argument("--queries", type=int, default=200,
+                        help="the paths to find per algorithm")
+    args = parser.parse_args()
+
+    sizes = [tuple(int(n) for n in size.split("x")) for size in args.size]
+    for width, height in sizes or [(40, 40), (100, 100)]:
+        began = time.perf_counter()
+        game = _make_map(args.game, width, height, args.walls, 0)
+        built = time.perf_counter() - began
+        print("{} {}x{} (cluster graph built in {:.1f} ms)".format(
+            args.game, width, height, built * 1e3))
+        results = benchmark(game, args.queries)
+        for algorithm, (seconds, expanded, steps) in results.items():
+            print("    {:<6} {:8.3f} ms/query {:8.0f} expanded "
+                  "{:6.3f}x steps".format(algorithm, seconds * 1e3,
+                                          expanded, steps))
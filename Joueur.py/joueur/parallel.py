@@ -0,0 +1,393 @@
+# Parallel evaluation for search heavy AIs: a pool of worker processes, so
+# work uses more than the one core Python threads get, reading the game
+# state from shared memory instead of having it pickled to them each time.
+#
+# The pool is started once, before the game (in BaseAI.prepare, during the
+# lobby), so no turn pays for starting processes. Each turn the AI publishes
+# the state as named NumPy arrays, then has the workers evaluate candidates
+# (moves, rollouts, ...) against it, taking whatever results are in by the
+# deadline:
+#
+#     def score(arrays, move):  # at module level, so workers can find it
+#         board = Board().load_state(arrays["board"])
+#         ...
+#
+#     def prepare(self):
+#         self.pool = WorkerPool(score).start()
+#     ...
+#     self.pool.publish(state_arrays(self.game, board=self.board))
+#     scores = self.pool.evaluate(moves, deadline=self.clock.deadline)
+#
+# state_arrays() gives the compact forms the games already have: the bitboard
+# state() of a chess or checkers Board, the board_arrays() of the tiled
+# games, the Simulator columns of stardash.
+#
+#     python -m joueur.parallel      # checkers root moves, serial vs pool
+
+import json
+import multiprocessing
+import os
+import struct
+import threading
+import time
+
+import numpy as np
+
+try:
+    from multiprocessing import shared_memory
+except ImportError as e:
+    raise ImportError("joueur.parallel needs Python 3.8 or newer, for "
+                      "multiprocessing.shared_memory.") from e
+
+# sequence number, version and header length, before the header
+_PREFIX = struct.Struct("<QQQ")
+_ALIGNMENT = 64
+
+
+class SharedState():
+    """Named NumPy arrays in a block of shared memory, republished as the
+    game changes and read from any process.
+
+    Publishing is guarded by a sequence number that is odd while the arrays
+    are being written, so a reader never gets half of two states: it reads
+    again if the number changed while it copied.
+    """
+
+    def __init__(self, size=1 << 22, name=None):
+        """Creates a block of shared memory, or attaches to one.
+
+        Args:
+            size (int): The bytes to create, when creating.
+            name (str): The name of a block to attach to instead.
+        """
+        self.owner = name is None
+        if self.owner:
+            self.memory = shared_memory.SharedMemory(create=True, size=size)
+            _PREFIX.pack_into(self.memory.buf, 0, 0, 0, 0)
+        else:
+            self.memory = shared_memory.SharedMemory(name=name)
+        self.version = 0
+
+    @property
+    def name(self):
+        """The name other processes attach with."""
+        return self.memory.name
+
+    def publish(self, arrays):
+        """Writes a new state, replacing the last.
+
+        Args:
+            arrays (dict[str, numpy.ndarray]): The state.
+
+        Returns:
+            int: The state's version, counting up from 1.
+        """
+        arrays = {name: np.ascontiguousarray(array)
+                  for name, array in arrays.items()}
+        self.version += 1
+        layout = []
+        header = b""
+        for _ in range(2):
+            # the data starts after the header, whose length depends on the
+            # offsets, so lay out twice
+            offset = _align(_PREFIX.size + len(header))
+            layout = []
+            for name, array in arrays.items():
+                layout.append((name, array.dtype.str, array.shape, offset))
+                offset = _align(offset + array.nbytes)
+            header = json.dumps(layout).encode("utf-8")
+        if offset > self.memory.size:
+            raise ValueError("The state is {} bytes, but only {} are "
+                             "shared.".format(offset, self.memory.size))
+
+        buffer = self.memory.buf
+        sequence = _PREFIX.unpack_from(buffer, 0)[0]
+        _PREFIX.pack_into(buffer, 0, sequence + 1, self.version,
+                          len(header))
+        buffer[_PREFIX.size:_PREFIX.size + len(header)] = header
+        for (name, dtype, shape, offset) in layout:
+            array = arrays[name]
+            buffer[offset:offset + array.nbytes] = array.reshape(-1).view(
+                np.uint8).tobytes()
+        _PREFIX.pack_into(buffer, 0, sequence + 2, self.version,
+                          len(header))
+        return self.version
+
+    def read(self):
+        """Copies out the current state.
+
+        Returns:
+            tuple[int, dict[str, numpy.ndarray]]: The version, 0 if nothing
+            has been published, and the arrays.
+        """
+        buffer = self.memory.buf
+        while True:
+            sequence, version, length = _PREFIX.unpack_from(buffer, 0)
+            if sequence & 1:
+                time.sleep(0)
+                continue
+            if not length:
+                return 0, {}
+            header = json.loads(bytes(
+                buffer[_PREFIX.size:_PREFIX.size + length]).decode("utf-8"))
+            arrays = {}
+            for name, dtype, shape, offset in header:
+                dtype = np.dtype(dtype)
+                count = int(np.prod(shape)) if shape else 1
+                arrays[name] = np.frombuffer(
+                    buffer, dtype, count, offset).reshape(shape).copy()
+            if _PREFIX.unpack_from(buffer, 0)[0] == sequence:
+                return version, arrays
+
+    def published(self):
+        """The version of the current state, without reading it."""
+        return _PREFIX.unpack_from(self.memory.buf, 0)[1]
+
+    def close(self):
+        """Detaches, and frees the memory if this created it."""
+        self.memory.close()
+        if self.owner:
+            self.memory.unlink()
+
+
+def _align(offset):
+    return (offset + _ALIGNMENT - 1) // _ALIGNMENT * _ALIGNMENT
+
+
+# in each worker process: the state attached to, the function evaluating
+# candidates, and the last state read
+_worker = {}
+
+
+def _attach(name, function):
+    _worker["state"] = SharedState(name=name)
+    _worker["function"] = function
+    _worker["read"] = (0, {})
+
+
+def _ready(_):
+    return os.getpid()
+
+
+def _evaluate(version, index, candidate):
+    if _worker["state"].published() != version:
+        # a newer state has been published, so this is left over from an
+        # earlier evaluate that has given up on it
+        return index, False, None
+    if _worker["read"][0] != version:
+        _worker["read"] = _worker["state"].read()
+    current, arrays = _worker["read"]
+    if current != version:
+        return index, False, None
+    return index, True, _worker["function"](arrays, candidate)
+
+
+class WorkerPool():
+    """Persistent worker processes evaluating candidates against the latest
+    published state.
+
+    Attributes:
+        last (dict): Telemetry of the last evaluate: candidates submitted,
+            results in by the deadline and seconds taken.
+    """
+
+    def __init__(self, function, processes=None, state_bytes=1 << 22):
+        """Creates a pool, which does nothing until started.
+
+        Args:
+            function (function): Called in the workers with the published
+                arrays and a candidate, returns its result. It must be
+                defined at module level so the workers can import it.
+            processes (int): How many workers, defaults to one less than
+                the cores there are.
+            state_bytes (int): The shared memory for the state.
+        """
+        self.function = function
+        self.processes = processes or max(1, (os.cpu_count() or 2) - 1)
+        self.state_bytes = state_bytes
+        self.state = None
+        self.last = {}
+        self._pool = None
+
+    def start(self):
+        """Starts the workers and waits until every one is up, so the cost
+        of starting them is paid now.
+
+        Returns:
+            WorkerPool: This, for chaining.
+        """
+        if self._pool is None:
+            self.state = SharedState(self.state_bytes)
+            self._pool = multiprocessing.Pool(
+                self.processes, initializer=_attach,
+                initargs=(self.state.name, self.function))
+            self._pool.map(_ready, range(self.processes), chunksize=1)
+        return self
+
+    def publish(self, arrays):
+        """Publishes the state the next candidates are evaluated against,
+        see SharedState.publish.
+        """
+        self.start()
+        return self.state.publish(arrays)
+
+    def evaluate(self, candidates, deadline=None):
+        """Evaluates candidates in parallel against the last published state.
+
+        Args:
+            candidates (list): What to pass the function, each pickled.
+            deadline (float): A time.perf_counter() to stop waiting at, e.g.
+                Clock.deadline, None to wait for every result.
+
+        Returns:
+            dict[int, object]: The result of each candidate done by the
+            deadline, by its index in candidates. The rest are dropped, and
+            skipped by the workers once a new state is published.
+        """
+        self.start()
+        began = time.perf_counter()
+        results = {}
+        errors = []
+        done = threading.Condition()
+
+        def finished(returned):
+            with done:
+                index, current, result = returned
+                if current:
+                    results[index] = result
+                done.notify()
+
+        def failed(error):
+            with done:
+                errors.append(error)
+                done.notify()
+
+        version = self.state.version
+        for index, candidate in enumerate(candidates):
+            self._pool.apply_async(_evaluate, (version, index, candidate),
+                                   callback=finished, error_callback=failed)
+        with done:
+            while len(results) + len(errors) < len(candidates):
+                wait = None if deadline is None else \
+                    deadline - time.perf_counter()
+                if wait is not None and wait <= 0:
+                    break
+                done.wait(wait)
+            taken = dict(results)
+            if errors:
+                raise errors[0]
+
+        self.last = {
+            "candidates": len(candidates),
+            "results": len(taken),
+            "seconds": time.perf_counter() - began,
+        }
+        return taken
+
+    def close(self):
+        """Stops the workers and frees the shared state."""
+        if self._pool is not None:
+            self._pool.terminate()
+            self._pool.join()
+            self._pool = None
+            self.state.close()
+            self.state = None
+
+
+def state_arrays(game, board=None):
+    """The compact arrays of a game's state, for publishing.
+
+    Args:
+        game (BaseGame): The game.
+        board: A chess or checkers Board synced to the game, whose bitboard
+            state() is used, as "board".
+
+    Returns:
+        dict[str, numpy.ndarray]: The arrays.
+    """
+    if board is not None:
+        return {"board": np.array(board.state(), dtype=np.uint64)}
+    if hasattr(game, "board_arrays"):
+        return dict(game.board_arrays().fields)
+    if type(game).__module__ == "games.stardash.game":
+        from games.stardash.simulator import Simulator
+        return {name: value for name, value in vars(Simulator(game)).items()
+                if isinstance(value, np.ndarray)}
+    raise ValueError("No compact form of {} is known, publish its arrays "
+                     "instead.".format(type(game).__module__))
+
+
+def _checkers_score(arrays, move):
+    """Scores a checkers move with a fixed depth search, for benchmark()."""
+    from games.checkers.bitboard import Board
+    from games.checkers.search import Searcher
+
+    board = Board().load_state(arrays["board"])
+    board.push(move)
+    searcher = Searcher()
+    searcher.search(board, depth=arrays["depth"][0])
+    return -searcher.last["score"]
+
+
+def benchmark(depth=7, processes=None):
+    """Scores each checkers move of a middlegame with a search, first one
+    by one, then with a WorkerPool, reporting both times.
+
+    Returns:
+        dict: The "serial" and "parallel" seconds, "startup" seconds of the
+        pool and whether the scores matched.
+    """
+    import random
+
+    from games.checkers.bitboard import Board
+
+    board = Board()
+    randomizer = random.Random(5)
+    # a few moves in, somewhere with moves to choose between
+    moves, plies = board.legal_moves(), 0
+    while plies < 8 or len(moves) < 6:
+        board.push(randomizer.choice(moves))
+        moves, plies = board.legal_moves(), plies + 1
+    arrays = {"board": np.array(board.state(), dtype=np.uint64),
+              "depth": np.array([depth])}
+
+    began = time.perf_counter()
+    serial = [_checkers_score(arrays, move) for move in moves]
+    serial_seconds = time.perf_counter() - began
+
+    began = time.perf_counter()
+    pool = WorkerPool(_checkers_score, processes).start()
+    startup = time.perf_counter() - began
+    try:
+        began = time.perf_counter()
+        pool.publish(arrays)
+        parallel = pool.evaluate(moves)
+        parallel_seconds = time.perf_counter() - began
+    finally:
+        pool.close()
+    return {
+        "moves": len(moves),
+        "processes": pool.processes,
+        "serial": serial_seconds,
+        "parallel": parallel_seconds,
+        "startup": startup,
+        "matched": [parallel.get(i) for i in range(len(moves))] == serial,
+    }
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description="Times scoring checkers moves serially and in a pool.")
+    parser.add_argument("--depth", type=int, default=7,
+                        help="how deep to search each move")
+    parser.add_argument("--processes", type=int, default=None,
+                        help="how many workers, defaults to cores - 1")
+    args = parser.parse_args()
+
+    timings = benchmark(args.depth, args.processes)
+    print("{moves} moves, {processes} workers: serial {serial:.2f}s, "
+          "pool {parallel:.2f}s (started in {startup:.2f}s), scores "
+          "{}".format("matched" if timings["matched"] else "DIFFERED",
+                      **timings))
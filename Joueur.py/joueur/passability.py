@@ -0,0 +1,157 @@
+# Passability masks for the tiled games: Tile.is_pathable() of every tile,
+# by tile index, kept up to date from the deltas.
+#
+# Searches look passability up many times per tile, and usually on tiles
+# that have not changed since the last search. The mask re-asks a Tile only
+# after a delta has changed it, and a lookup is then a single bytearray index.
+
+_DELTA_CONSTANTS = {"DELTA_REMOVED": "&RM", "DELTA_LIST_LENGTH": "&LEN"}
+
+
+class PathableMask():
+    """A bytearray of Tile.is_pathable() by tile index (x + y * map_width),
+    1 where the Tile is pathable.
+
+    This backs Game.pathable_mask, which the path finding helpers, distance
+    fields, board arrays and cooperative planner use when they are not given
+    their own passable function.
+    """
+
+    def __init__(self, game):
+        """Creates the mask for a game whose tiles have been sent.
+
+        Args:
+            game (BaseGame): A game with tiles, map_width and map_height.
+        """
+        self.game = game
+        self.mask = bytearray(len(game.tiles))
+        self._dirty = set(range(len(game.tiles)))
+        game.add_delta_listener(self._delta_merged)
+
+    def _delta_merged(self, delta):
+        game_objects = self.game.game_objects
+        width = self.game.map_width
+        for id in delta.get("gameObjects", {}):
+            obj = game_objects.get(id)
+            if obj is not None and obj.game_object_name == "Tile":
+                self._dirty.add(obj.x + obj.y * width)
+
+    def refresh(self):
+        """Re-asks every Tile changed since the last refresh.
+
+        Returns:
+            bytearray: The mask.
+        """
+        if self._dirty:
+            tiles = self.game.tiles
+            mask = self.mask
+            for i in self._dirty:
+                mask[i] = 1 if tiles[i].is_pathable() else 0
+            self._dirty = set()
+        return self.mask
+
+
+def _make_game(game_name, width, height):
+    """Builds a game of the given name with an empty width x height map, by
+    merging a start delta like the server would send.
+    """
+    import importlib
+    from joueur.game_manager import GameManager
+
+    game = importlib.import_module("games.{}.game".format(game_name)).Game()
+    manager = GameManager(game)
+    manager.set_constants(_DELTA_CONSTANTS)
+
+    def reference(x, y):
+        if 0 <= x < width and 0 <= y < height:
+            return {"id": str(x + y * width)}
+        return None
+
+    game_objects = {}
+    tiles = {"&LEN": width * height}
+    for y in range(height):
+        for x in range(width):
+            i = x + y * width
+            game_objects[str(i)] = {
+                "id": str(i),
+                "gameObjectName": "Tile",
+                "x": x,
+                "y": y,
+                "tileNorth": reference(x, y - 1),
+                "tileEast": reference(x + 1, y),
+                "tileSouth": reference(x, y + 1),
+                "tileWest": reference(x - 1, y),
+            }
+            tiles[str(i)] = {"id": str(i)}
+    manager.apply_delta_state({
+        "gameObjects": game_objects,
+        "tiles": tiles,
+        "mapWidth": width,
+        "mapHeight": height,
+    })
+    return game
+
+
+def benchmark(game, repeat=20):
+    """Times passability and neighbor checks the old and the new way.
+
+    Args:
+        game (BaseGame): A tiled game whose tiles have been sent.
+        repeat (int): How many passes over the whole map to time.
+
+    Returns:
+        dict[str, float]: Seconds per check for each way.
+    """
+    import time
+    import joueur.pathfinding
+
+    tiles = game.tiles
+    mask = game.pathable_mask()
+    pairs = [(tile, other) for tile in tiles
+             for other in (tiles[0], tiles[-1], tile.tile_east)]
+
+    def old_has_neighbor(tile, other):
+        return bool(other and other in tile.get_neighbors())
+
+    checks = {
+        "is_pathable()": lambda: [tile.is_pathable() for tile in tiles],
+        "pathable_mask()": lambda: [mask[i] for i in range(len(tiles))],
+        "has_neighbor() before": lambda: [
+            old_has_neighbor(tile, other) for tile, other in pairs],
+        "has_neighbor()": lambda: [
+            tile.has_neighbor(other) for tile, other in pairs],
+        "find_path() asking tiles": lambda: [
+            joueur.pathfinding.find_path(
+                game, tiles[0], tiles[-1],
+                passable=lambda tile: tile.is_pathable())],
+        "find_path()": lambda: [
+            joueur.pathfinding.find_path(game, tiles[0], tiles[-1])],
+    }
+    times = {}
+    for name, check in checks.items():
+        began = time.perf_counter()
+        for _ in range(repeat):
+            count = len(check())
+        times[name] = (time.perf_counter() - began) / (repeat * count)
+    return times
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description="Micro benchmarks Tile.is_pathable and has_neighbor "
+        "against the passability mask.")
+    parser.add_argument("games", nargs="*", default=[
+        "pirates", "saloon", "catastrophe", "newtonian", "stumped"],
+        help="the tiled games to benchmark")
+    parser.add_argument("--size", default="40x40",
+                        help="the WIDTHxHEIGHT of the map")
+    args = parser.parse_args()
+
+    width, height = (int(n) for n in args.size.split("x"))
+    for game_name in args.games:
+        times = benchmark(_make_game(game_name, width, height))
+        print(game_name)
+        for name, seconds in times.items():
+            print("    {:<26} {:10.3f} us".format(name, seconds * 1e6))
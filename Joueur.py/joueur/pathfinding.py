@@ -0,0 +1,465 @@
+# Pathfinding for the tiled games (Pirates, Saloon, Catastrophe, Newtonian,
+# Stumped), shared so each game's find_path does not have to roll its own.
+#
+# Everything works on integer tile indexes (x + y * map_width, the same order
+# as game.tiles) and neighbor tables of those indexes, so the inner loops
+# never touch Tile objects. Passability and costs are callbacks on an index,
+# and are only asked for tiles the search actually reaches.
+
+from array import array
+from collections import deque
+import heapq
+import time
+
+from joueur.hierarchical import jps
+
+_grids = {}
+
+
+def grid_neighbors(width, height):
+    """Builds (once per map size) the neighbor table of a width x height
+    grid of tiles.
+
+    Args:
+        width (int): The map width, in tiles.
+        height (int): The map height, in tiles.
+
+    Returns:
+        list[tuple[int]]: For each tile index, the indexes of its north, east,
+        south and west neighbors that are on the map, in that order (the
+        order Tile.get_neighbors uses).
+    """
+    key = (width, height)
+    if key not in _grids:
+        table = []
+        for y in range(height):
+            for x in range(width):
+                i = x + y * width
+                neighbors = []
+                if y > 0:
+                    neighbors.append(i - width)
+                if x < width - 1:
+                    neighbors.append(i + 1)
+                if y < height - 1:
+                    neighbors.append(i + width)
+                if x > 0:
+                    neighbors.append(i - 1)
+                table.append(tuple(neighbors))
+        _grids[key] = table
+    return _grids[key]
+
+
+_adjacencies = {}
+
+
+def grid_adjacency(width, height):
+    """Builds (once per map size) the compact CSR form of grid_neighbors():
+    the neighbors of tile i are neighbors[offsets[i]:offsets[i + 1]].
+
+    Args:
+        width (int): The map width, in tiles.
+        height (int): The map height, in tiles.
+
+    Returns:
+        tuple[array.array, array.array]: The offsets and neighbors, both
+        arrays of C ints.
+    """
+    key = (width, height)
+    if key not in _adjacencies:
+        offsets = array("i", [0])
+        neighbors = array("i")
+        for tile_neighbors in grid_neighbors(width, height):
+            neighbors.extend(tile_neighbors)
+            offsets.append(len(neighbors))
+        _adjacencies[key] = offsets, neighbors
+    return _adjacencies[key]
+
+
+def _trace(came_from, start, goal):
+    """Follows came_from back from the goal to build the path."""
+    path = []
+    current = goal
+    while current != start:
+        path.append(current)
+        current = came_from[current]
+    path.reverse()
+    return path
+
+
+def bfs(neighbors, start, goal, passable, stats=None):
+    """Breadth first search for a shortest path, by number of steps.
+
+    Args:
+        neighbors (list[tuple[int]]): The neighbor table of the map.
+        start (int): The index the path starts at.
+        goal (int): The index the path ends at. It does not need to be
+            passable, so paths can lead up to something to attack.
+        passable (function): Takes an index, returns if paths may go through
+            that tile.
+        stats (dict): If given, "expanded" is set to the number of tiles
+            whose neighbors were looked at.
+
+    Returns:
+        list[int]: The indexes of the path, the first being next to the start
+        and the last being the goal, or an empty list if there is no path.
+    """
+    if start == goal:
+        return []
+
+    came_from = {start: start}
+    fringe = deque([start])
+    expanded = 0
+    while fringe:
+        inspect = fringe.popleft()
+        expanded += 1
+        for neighbor in neighbors[inspect]:
+            if neighbor in came_from:
+                continue
+            if neighbor == goal:
+                came_from[goal] = inspect
+                if stats is not None:
+                    stats["expanded"] = expanded
+                return _trace(came_from, start, goal)
+            came_from[neighbor] = inspect
+            if passable(neighbor):
+                fringe.append(neighbor)
+    if stats is not None:
+        stats["expanded"] = expanded
+    return []
+
+
+def _best_first(neighbors, start, goal, passable, cost, heuristic,
+                stats=None):
+    """The search shared by dijkstra and astar."""
+    if stats is not None:
+        stats["expanded"] = 0
+    if start == goal:
+        return []
+
+    came_from = {start: start}
+    best = {start: 0}
+    blocked = set()
+    counter = 0
+    fringe = [(heuristic(start), counter, 0, start)]
+    while fringe:
+        _, _, so_far, inspect = heapq.heappop(fringe)
+        if inspect == goal:
+            return _trace(came_from, start, goal)
+        if so_far > best[inspect]:
+            # a cheaper way here was already expanded
+            continue
+        if stats is not None:
+            stats["expanded"] += 1
+        for neighbor in neighbors[inspect]:
+            if neighbor in blocked:
+                continue
+            if neighbor != goal and not passable(neighbor):
+                blocked.add(neighbor)
+                continue
+            step = cost(neighbor) if cost else 1
+            if step is None:
+                blocked.add(neighbor)
+                continue
+            total = so_far + step
+            if neighbor not in best or total < best[neighbor]:
+                best[neighbor] = total
+                came_from[neighbor] = inspect
+                counter += 1
+                heapq.heappush(fringe, (
+                    total + heuristic(neighbor), counter, total, neighbor))
+    return []
+
+
+def dijkstra(neighbors, start, goal, passable, cost=None, stats=None):
+    """Finds the cheapest path, where entering each tile has a cost.
+
+    Args:
+        neighbors (list[tuple[int]]): The neighbor table of the map.
+        start (int): The index the path starts at.
+        goal (int): The index the path ends at, which need not be passable.
+        passable (function): Takes an index, returns if paths may go through
+            that tile.
+        cost (function): Takes an index, returns the (non negative) cost of
+            stepping onto that tile, or None if it can't be. Defaults to 1
+            for every tile.
+        stats (dict): If given, "expanded" is set as with bfs().
+
+    Returns:
+        list[int]: The indexes of the path, as with bfs().
+    """
+    return _best_first(neighbors, start, goal, passable, cost,
+                       lambda index: 0, stats)
+
+
+def astar(neighbors, start, goal, passable, width, cost=None, min_cost=1,
+          stats=None):
+    """Finds the cheapest path like dijkstra(), guided by the Manhattan
+    distance to the goal so far fewer tiles are expanded.
+
+    Args:
+        neighbors (list[tuple[int]]): The neighbor table of the map.
+        start (int): The index the path starts at.
+        goal (int): The index the path ends at, which need not be passable.
+        passable (function): Takes an index, returns if paths may go through
+            that tile.
+        width (int): The map width, to turn indexes back into (x, y).
+        cost (function): Takes an index, returns the cost of stepping onto
+            that tile, or None if it can't be. Defaults to 1 for every tile.
+        min_cost (float): The cheapest any step can be. The heuristic is
+            scaled by it so the path found is still the cheapest.
+        stats (dict): If given, "expanded" is set as with bfs().
+
+    Returns:
+        list[int]: The indexes of the path, as with bfs().
+    """
+    goal_x = goal % width
+    goal_y = goal // width
+
+    def manhattan(index):
+        return min_cost * (abs(index % width - goal_x) +
+                           abs(index // width - goal_y))
+
+    return _best_first(neighbors, start, goal, passable, cost, manhattan,
+                       stats)
+
+
+def find_path(game, start, goal, passable=None, cost=None,
+              algorithm="bfs", stats=None):
+    """Finds a path between two Tiles of a tiled game.
+
+    This is what each tiled game AI's find_path uses.
+
+    Args:
+        game (BaseGame): A game with tiles, map_width and map_height.
+        start (Tile): The starting Tile.
+        goal (Tile): The goal Tile.
+        passable (function): Takes a Tile, returns if paths may go through
+            it. Defaults to Tile.is_pathable.
+        cost (function): Takes a Tile, returns the cost of stepping onto it
+            (or None if it can't be). Only used by "dijkstra" and "astar",
+            "jps" and "hpa" refusing one.
+        algorithm (str): "bfs", "astar", "dijkstra", "jps" (Jump Point
+            Search, as short as "bfs" but far fewer tiles expanded on open
+            maps) or "hpa" (through Game.cluster_graph, near shortest, for
+            many searches on big maps). "hpa" only uses Tile.is_pathable.
+        stats (dict): If given, "expanded" is set to the number of nodes
+            the search expanded and "seconds" to the time it took.
+
+    Returns:
+        list[Tile]: The path, the first element being a valid adjacent Tile
+        to the start, and the last element being the goal. Empty if there
+        is no path.
+    """
+    began = time.perf_counter()
+    if cost is not None and algorithm in ("jps", "hpa"):
+        raise ValueError("The '{}' algorithm can't use a cost".format(
+            algorithm))
+    if stats is not None:
+        stats["expanded"] = 0
+        stats["seconds"] = 0.0
+    if start == goal:
+        return []
+
+    if algorithm == "hpa":
+        if passable is not None:
+            raise ValueError("The 'hpa' algorithm only uses the pathable "
+                             "mask, not a passable function")
+        graph = game.cluster_graph()
+        path = graph.find_path(start, goal)
+        if stats is not None:
+            stats["expanded"] = graph.expanded
+            stats["seconds"] = time.perf_counter() - began
+        return path
+
+    width = game.map_width
+    tiles = game.tiles
+    neighbors = grid_neighbors(width, game.map_height)
+    start_index = start.x + start.y * width
+    goal_index = goal.x + goal.y * width
+
+    if passable is None and hasattr(game, "pathable_mask"):
+        passable_index = game.pathable_mask().__getitem__
+    elif passable is None:
+        def passable_index(index):
+            return tiles[index].is_pathable()
+    else:
+        def passable_index(index):
+            return passable(tiles[index])
+
+    cost_index = None
+    if cost is not None:
+        def cost_index(index):
+            return cost(tiles[index])
+
+    if algorithm == "bfs":
+        path = bfs(neighbors, start_index, goal_index, passable_index, stats)
+    elif algorithm == "dijkstra":
+        path = dijkstra(neighbors, start_index, goal_index, passable_index,
+                        cost_index, stats)
+    elif algorithm == "astar":
+        path = astar(neighbors, start_index, goal_index, passable_index,
+                     width, cost_index, stats=stats)
+    elif algorithm == "jps":
+        if passable is None and hasattr(game, "pathable_mask"):
+            mask = game.pathable_mask()
+        else:
+            mask = [passable_index(index) for index in range(len(tiles))]
+        path = jps(width, game.map_height, start_index, goal_index, mask,
+                   stats)
+    else:
+        raise ValueError("Unknown path finding algorithm '{}'".format(
+            algorithm))
+
+    if stats is not None:
+        stats["seconds"] = time.perf_counter() - began
+    return [tiles[index] for index in path]
+
+
+def _tile_find_path(start, goal):
+    """The breadth first search each tiled game AI used to ship with, kept
+    to benchmark against.
+    """
+    if start == goal:
+        return []
+    fringe = [start]
+    came_from = {}
+    while len(fringe) > 0:
+        inspect = fringe.pop(0)
+        for neighbor in inspect.get_neighbors():
+            if neighbor == goal:
+                path = [goal]
+                while inspect != start:
+                    path.insert(0, inspect)
+                    inspect = came_from[inspect.id]
+                return path
+            if neighbor and neighbor.id not in came_from and (
+                neighbor.is_pathable()
+            ):
+                fringe.append(neighbor)
+                came_from[neighbor.id] = inspect
+    return []
+
+
+def _make_map(game_name, width, height, walls, seed):
+    """Builds a game with a width x height map of the game's own Tile class,
+    a random fraction of it walled off.
+    """
+    import importlib
+    import random
+
+    Tile = importlib.import_module("games.{}.tile".format(game_name)).Tile
+    blocked = random.Random(seed).random
+
+    class BenchmarkTile(Tile):
+        def is_pathable(self):
+            return not self._wall
+
+    tiles = []
+    for y in range(height):
+        for x in range(width):
+            tile = BenchmarkTile()
+            tile._id = str(len(tiles))
+            tile._x = x
+            tile._y = y
+            tile._wall = blocked() < walls
+            tiles.append(tile)
+    for tile in tiles:
+        x, y = tile.x, tile.y
+        at = lambda x, y: tiles[x + y * width] \
+            if 0 <= x < width and 0 <= y < height else None
+        tile._tile_north = at(x, y - 1)
+        tile._tile_east = at(x + 1, y)
+        tile._tile_south = at(x, y + 1)
+        tile._tile_west = at(x - 1, y)
+
+    class BenchmarkGame():
+        pass
+
+    game = BenchmarkGame()
+    game.tiles = tiles
+    game.map_width = width
+    game.map_height = height
+    return game
+
+
+def benchmark(game, queries=200, seed=0):
+    """Times each algorithm over the same random start and goal pairs.
+
+    Args:
+        game (BaseGame): A game with tiles, map_width and map_height.
+        queries (int): How many paths to find with each algorithm.
+        seed (int): Seeds the choice of start and goal tiles.
+
+    Returns:
+        dict[str, float]: Paths found per second by each algorithm, and by
+        the search AIs used before ("legacy").
+    """
+    import random
+    import time
+
+    rng = random.Random(seed)
+    open_tiles = [tile for tile in game.tiles if tile.is_pathable()]
+    pairs = [(rng.choice(open_tiles), rng.choice(open_tiles))
+             for _ in range(queries)]
+
+    searches = {
+        "legacy": lambda start, goal: _tile_find_path(start, goal),
+    }
+    for algorithm in ("bfs", "astar", "dijkstra"):
+        searches[algorithm] = (lambda algorithm: lambda start, goal:
+                               find_path(game, start, goal,
+                                         algorithm=algorithm))(algorithm)
+
+    rates = {}
+    lengths = None
+    for name, search in searches.items():
+        began = time.perf_counter()
+        found = [len(search(start, goal)) for start, goal in pairs]
+        rates[name] = queries / (time.perf_counter() - began)
+        if lengths is None:
+            lengths = found
+        elif found != lengths:
+            raise AssertionError(
+                "{} found paths of different lengths".format(name))
+    return rates
+
+
+def _gamelog_size(path):
+    """The (width, height) of the map a recorded (optionally gzipped)
+    gamelog was played on.
+    """
+    import gzip
+    import json
+
+    with (gzip.open if path.endswith(".gz") else open)(path, "rt") as f:
+        game = json.load(f)["deltas"][0]["game"]
+    return game["mapWidth"], game["mapHeight"]
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description="Benchmarks path finding on a tiled game's map.")
+    parser.add_argument("game", help="the tiled game whose Tile class to "
+                        "benchmark with, e.g. pirates")
+    parser.add_argument("--gamelog", action="append", default=[],
+                        help="a gamelog to take a map size from, so the "
+                        "game's largest maps can be measured")
+    parser.add_argument("--size", action="append", default=[],
+                        help="a WIDTHxHEIGHT map size to try")
+    parser.add_argument("--walls", type=float, default=0.2,
+                        help="the fraction of tiles that are not pathable")
+    parser.add_argument("--queries", type=int, default=200,
+                        help="the paths to find per algorithm")
+    args = parser.parse_args()
+
+    sizes = [_gamelog_size(path) for path in args.gamelog] + [
+        tuple(int(n) for n in size.split("x")) for size in args.size]
+    for width, height in sizes or [(40, 40)]:
+        rates = benchmark(_make_map(args.game, width, height, args.walls, 0),
+                          args.queries)
+        print("{} {}x{}: {}".format(args.game, width, height, ", ".join(
+            "{} {:.0f}/s ({:.1f}x)".format(name, rate,
+                                           rate / rates["legacy"])
+            for name, rate in rates.items())))
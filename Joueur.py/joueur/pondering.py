@@ -0,0 +1,67 @@
+# Pondering: thinking on the opponent's time. An AI that overrides
+# BaseAI.ponder(should_stop) has it called on a worker thread whenever the
+# client is idle waiting for the server, e.g. during the opponent's turn.
+#
+# Pondering never overlaps with the game changing: before the client handles
+# anything from the server (merging a delta, running an order, ...) it
+# signals the thread to stop and waits for it to finish, and only starts it
+# again once idle. So ponder can read the game freely, but must check
+# should_stop() often, as the client, and so the AI's turn, waits on it:
+#
+#     def ponder(self, should_stop):
+#         for depth in range(1, 64):
+#             if should_stop():
+#                 break
+#             self.expected[depth] = self.search(depth, should_stop)
+#
+# ponder must not call game object functions (they talk to the server), and
+# whatever it returns is kept as self.pondered for run_turn.
+
+import sys
+import threading
+
+import joueur.error_code as error_code
+
+
+class Ponderer():
+    """Runs an AI's ponder on a worker thread between events."""
+
+    @staticmethod
+    def wanted(ai):
+        """If an AI overrides ponder."""
+        from joueur.base_ai import BaseAI  # avoid circular imports
+        return type(ai).ponder is not BaseAI.ponder
+
+    def __init__(self, ai):
+        self.ai = ai
+        self._thread = None
+        self._stop = threading.Event()
+
+    def start(self):
+        """Starts pondering, unless already doing so."""
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run,
+                                        name="ponder", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Asks ponder to stop and waits until it has.
+
+        Returns:
+            bool: True if it was pondering.
+        """
+        if self._thread is None:
+            return False
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+        return True
+
+    def _run(self):
+        try:
+            self.ai._pondered = self.ai.ponder(self._stop.is_set)
+        except:
+            error_code.handle_error(error_code.AI_ERRORED, sys.exc_info()[0],
+                                    'AI errored while pondering.')
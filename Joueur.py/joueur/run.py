@@ -1,6 +1,9 @@
 import importlib.util
 import joueur.client
+import os
 import sys
+import threading
+import time
 import joueur.error_code as error_code
 from joueur.game_manager import GameManager
 from joueur.utilities import camel_case_converter
@@ -8,16 +11,26 @@ import joueur.ansi_color_coder as color
 
 
 def run(args):
+    started_at = time.perf_counter()
     split_server = args.server.split(":")
     args.server = split_server[0]
     args.port = int((len(split_server) == 2 and split_server[1])) or args.port
 
+    # import the game the alias most likely is while the server works out
+    # which it really is, as the AI's imports can take a while
+    guessed_str = "games." + camel_case_converter(args.game)
+    guessing = threading.Thread(target=_import_ahead, args=(guessed_str,),
+                                name="import", daemon=True)
+    guessing.start()
+
     joueur.client.connect(args.server, args.port, args.print_io)
 
     joueur.client.send("alias", args.game)
     game_name = joueur.client.wait_for_event("named")
 
     module_str = "games." + camel_case_converter(game_name)
+    if module_str == guessed_str:
+        guessing.join()
 
     spec = importlib.util.find_spec(module_str)
     if spec is None:
@@ -65,23 +78,45 @@ def run(args):
     })
 
     lobby_data = joueur.client.wait_for_event("lobbied")
+    ai.startup['to_lobby'] = time.perf_counter() - started_at
 
-    print('{}In Lobby for game "{}" in session "{}".{}'.format(
+    print('{}In Lobby for game "{}" in session "{}" after {:.3f}s.{}'.format(
             color.text("cyan"),
             lobby_data['gameName'],
             lobby_data['gameSession'],
+            ai.startup['to_lobby'],
             color.reset()
         )
     )
 
     manager.set_constants(lobby_data['constants'])
 
+    # prepare while waiting for the other players
+    lobbied_at = time.perf_counter()
+    preparing = threading.Thread(target=_prepare, args=(ai,),
+                                 name="prepare", daemon=True)
+    preparing.start()
+
     start_data = joueur.client.wait_for_event("start")
 
+    ai.startup['lobby'] = time.perf_counter() - lobbied_at
+    preparing.join()
+
     print(color.text("green") + "Game is starting." + color.reset())
 
     ai.set_player(game.get_game_object(start_data['playerID']))
     try:
+        began = time.perf_counter()
+        ai.prepare_game()
+        ai.startup['prepare_game'] = time.perf_counter() - began
+        print('{}Prepared in {:.3f}s while {:.3f}s in the lobby, then for the '
+              'game in {:.3f}s.{}'.format(
+                  color.text("cyan"),
+                  ai.startup['prepare'],
+                  ai.startup['lobby'],
+                  ai.startup['prepare_game'],
+                  color.reset()
+              ))
         ai.start()
         ai.game_updated()
     except:
@@ -92,3 +127,32 @@ def run(args):
         )
 
     joueur.client.play()
+
+    # the game is over; exit without waiting on any threads the AI left
+    # running
+    os._exit(0)
+
+
+def _prepare(ai):
+    began = time.perf_counter()
+    try:
+        ai.prepare()
+    except:
+        error_code.handle_error(
+            error_code.AI_ERRORED,
+            sys.exc_info()[0],
+            'AI errored while preparing in the lobby'
+        )
+    ai.startup['prepare'] = time.perf_counter() - began
+
+
+def _import_ahead(module_str):
+    # only a guess, so any failure is left for the real import to report
+    try:
+        if importlib.util.find_spec(module_str) is None:
+            return
+        module = importlib.import_module(module_str)
+        for name in module.AI.preload:
+            importlib.import_module(name)
+    except Exception:
+        pass
@@ -0,0 +1,282 @@
+# A swarm of clients in one process, for load testing game servers: each is
+# its own Client, game, AI and GameManager, all driven from one event loop
+# (a selector over their sockets), so thousands can play at once without a
+# process, or a thread, each.
+#
+# Clients are seated in sessions of players, in order, so a swarm of 2n
+# clients plays n games of two. An AI being given an order runs it to the
+# end, waiting on its own socket for the results of what it runs on the
+# server, so the AIs should be quick (the default, empty, ones are); the
+# rest of the swarm waits meanwhile. AIs don't ponder, and an AI erroring
+# still ends the process, as with one client. The server hanging up on a
+# client, or its socket erroring, only fails that client, counted in the
+# stats.
+#
+#     python -m joueur.swarm Saloon -s localhost:3000 --clients 1000
+#
+# prints how much memory each client took and the messages sent and
+# received a second.
+
+import contextlib
+import importlib
+import os
+import selectors
+import sys
+import time
+
+import joueur.error_code as error_code
+from joueur.client import Client
+from joueur.game_manager import GameManager
+from joueur.utilities import camel_case_converter
+
+
+class _SwarmClient(Client):
+    """A Client whose socket failing, or the server hanging up on it, raises
+    an OSError for the swarm to fail it by, rather than ending the process.
+    """
+
+    def _read_failed(self, error):
+        raise error
+
+    def receive(self):
+        sent = Client.receive(self)
+        if not sent:
+            raise ConnectionResetError("The server hung up.")
+        return sent
+
+
+class Swarm():
+    """Many clients playing in one process.
+
+    Attributes:
+        clients (list[Client]): Every client, in the order seated.
+        failed (dict[Client, str]): Why each client that failed did, e.g.
+            the server hanging up on it.
+        stats (dict): Telemetry of the last run: clients "started",
+            "finished" and "failed", the "failures" by why, "seconds"
+            taken, events "sent" and "received", and
+            the process's "resident" bytes before connecting and once every
+            client had started.
+    """
+
+    def __init__(self, game_alias, hostname="localhost", port=3000,
+                 clients=2, players=2, ai_settings="", game_settings="",
+                 session=None):
+        """Creates a swarm, which connects nothing until run.
+
+        Args:
+            game_alias (str): The game to play, e.g. "Saloon".
+            hostname (str): The game server.
+            port (int): Its port.
+            clients (int): How many clients.
+            players (int): The players a game, to seat in each session.
+            ai_settings (str): The --aiSettings of every AI.
+            game_settings (str): The --gameSettings of every game.
+            session (str): What to start session names with, defaults to one
+                unique to this process.
+        """
+        self.game_alias = game_alias
+        self.hostname = hostname
+        self.port = int(port)
+        self.count = clients
+        self.players = players
+        self.ai_settings = ai_settings
+        self.game_settings = game_settings
+        self.session = session or "swarm-{}-{}".format(os.getpid(),
+                                                       int(time.time()))
+        self.clients = []
+        self.failed = {}
+        self.stats = {}
+        # each client's handshake, a generator yielding the event it waits on
+        self._joining = {}
+        self._waiting = {}
+
+    def run(self, timeout=None):
+        """Connects every client and plays until every game is over.
+
+        Args:
+            timeout (float): Seconds to give up after, None to wait forever.
+
+        Returns:
+            dict: The stats.
+        """
+        selector = selectors.DefaultSelector()
+        self.stats = {"clients": self.count, "started": 0, "finished": 0,
+                      "resident_before": _resident_bytes()}
+        began = time.perf_counter()
+
+        for number in range(self.count):
+            client = _SwarmClient()
+            client.connect(self.hostname, self.port)
+            self.clients.append(client)
+            joining = self._join(client, number)
+            self._joining[client] = joining
+            self._waiting[client] = next(joining)
+            selector.register(client.socket, selectors.EVENT_READ, client)
+
+        playing = self.count
+        while playing:
+            if timeout is not None and \
+                    time.perf_counter() - began > timeout:
+                break
+            for key, _ in selector.select(1.0):
+                client = key.data
+                try:
+                    client.receive()
+                    self._handle(client)
+                except OSError as e:
+                    # e.g. the server hanging up, even during an order
+                    self.failed[client] = "{}: {}".format(
+                        type(e).__name__, e)
+                    client.disconnect()
+                if client.over is not None or client in self.failed:
+                    selector.unregister(key.fileobj)
+                    playing -= 1
+        selector.close()
+
+        failures = {}
+        for reason in self.failed.values():
+            failures[reason] = failures.get(reason, 0) + 1
+        self.stats.update({
+            "seconds": time.perf_counter() - began,
+            "finished": sum(client.over is not None
+                            for client in self.clients),
+            "failed": len(self.failed),
+            "failures": failures,
+            "sent": sum(client.sent for client in self.clients),
+            "received": sum(client.received for client in self.clients),
+        })
+        return self.stats
+
+    def _handle(self, client):
+        # handles what a client has received, as its wait_for_event would
+        while client.over is None:
+            event, data = client.next_event()
+            if event is None:
+                return
+            joining = self._joining.get(client)
+            if joining and event == self._waiting[client]:
+                try:
+                    self._waiting[client] = joining.send(data)
+                except StopIteration:
+                    del self._joining[client]
+                    self._started()
+            else:
+                client._auto_handle(event, data)
+
+    def _started(self):
+        self.stats["started"] += 1
+        if self.stats["started"] == self.count:
+            self.stats["resident_started"] = _resident_bytes()
+
+    def _join(self, client, number):
+        # what joueur.run does for one client, up to the game starting
+        client.send("alias", self.game_alias)
+        game_name = yield "named"
+
+        module = importlib.import_module(
+            "games." + camel_case_converter(game_name))
+        game = module.Game()
+        try:
+            ai = module.AI(game)
+        except:
+            error_code.handle_error(error_code.AI_ERRORED, sys.exc_info()[1],
+                                    'Could not initialize the AI class.')
+        manager = GameManager(game)
+        client.setup(game, ai, manager)
+        ai.set_settings(self.ai_settings)
+
+        client.send("play", {
+            'gameName': game_name,
+            'password': None,
+            'requestedSession': "{}-{}".format(self.session,
+                                               number // self.players),
+            'clientType': "Python",
+            'playerName': "{} {}".format(ai.get_name(), number),
+            'playerIndex': number % self.players,
+            'gameSettings': self.game_settings
+        })
+        lobby_data = yield "lobbied"
+        manager.set_constants(lobby_data['constants'])
+
+        start_data = yield "start"
+        ai.set_player(game.get_game_object(start_data['playerID']))
+        try:
+            ai.prepare()
+            ai.prepare_game()
+            ai.start()
+            ai.game_updated()
+        except:
+            error_code.handle_error(error_code.AI_ERRORED, sys.exc_info()[1],
+                                    'AI errored during game initialization')
+
+
+def _resident_bytes():
+    """The process's resident memory, in bytes, or its peak where the
+    current isn't known.
+    """
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # bytes on macOS, kilobytes elsewhere
+        return peak if sys.platform == "darwin" else peak * 1024
+
+
+def benchmark(game_alias, hostname="localhost", port=3000, clients=100,
+              players=2, ai_settings="", timeout=None, quiet=True):
+    """Plays a swarm, measuring memory a client and messages a second.
+
+    Returns:
+        dict: The swarm's stats, with the "bytes_per_client" and
+        "messages_per_second".
+    """
+    # the game's modules are loaded once for every client, so not counted
+    with contextlib.suppress(ImportError):
+        importlib.import_module("games." + camel_case_converter(game_alias))
+
+    swarm = Swarm(game_alias, hostname, port, clients, players, ai_settings)
+    with open(os.devnull, "w") as devnull, \
+            contextlib.redirect_stdout(devnull if quiet else sys.stdout):
+        stats = swarm.run(timeout)
+    grown = stats.get("resident_started", _resident_bytes()) - \
+        stats["resident_before"]
+    stats["bytes_per_client"] = grown / clients
+    stats["messages_per_second"] = (stats["sent"] + stats["received"]) / \
+        stats["seconds"]
+    return stats
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description="Plays many clients in one process against a server.")
+    parser.add_argument("game", help="the game, e.g. Saloon")
+    parser.add_argument("-s", "--server", default="localhost:3000",
+                        help="the game server, host:port")
+    parser.add_argument("--clients", type=int, default=100,
+                        help="how many clients")
+    parser.add_argument("--players", type=int, default=2,
+                        help="the players in each game")
+    parser.add_argument("--aiSettings", dest="ai_settings", default="",
+                        help="the settings of every AI")
+    parser.add_argument("--timeout", type=float, default=None,
+                        help="seconds to give up after")
+    parser.add_argument("--verbose", action="store_true",
+                        help="print what the clients and AIs print")
+    args = parser.parse_args()
+
+    hostname, _, port = args.server.partition(":")
+    stats = benchmark(args.game, hostname, int(port or 3000), args.clients,
+                      args.players, args.ai_settings, args.timeout,
+                      not args.verbose)
+    print("{started} of {clients} clients started, {finished} finished "
+          "and {failed} failed in "
+          "{seconds:.1f}s: {bytes_per_client:.0f} bytes a client, "
+          "{messages_per_second:.0f} messages a second ({sent} sent, "
+          "{received} received)".format(**stats))
+    for reason, count in stats["failures"].items():
+        print("{} failed: {}".format(count, reason))
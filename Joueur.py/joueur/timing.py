@@ -0,0 +1,203 @@
+# Time management: how long the AI can think this turn, given the
+# Player.time_remaining the server says it has left, the turns left to play
+# it over, any Game.time_added_per_turn and the time lost sending commands
+# to the server.
+#
+# Every AI has a Clock as self.clock once it has a player. The client starts
+# it each time it is given an order (e.g. runTurn), so the order knows its
+# deadline:
+#
+#     def run_turn(self):
+#         best = self.clock.anytime(self.deepening_search(), calls=3)
+#         ...
+#         if self.clock.expired():
+#             return True
+#
+# time_remaining is only updated by the server between commands, so the
+# clock notes the local time each delta that changes it arrives and counts
+# down from there.
+
+import math
+import time
+
+import joueur.client
+
+
+class Clock():
+    """Tracks a Player's time and hands out per order deadlines.
+
+    Attributes:
+        history (list[tuple[int, float, float]]): The current_turn, local
+            time (time.perf_counter()) and time_remaining (in ns) each time
+            a delta changed the player's time_remaining.
+        deadline (float): When the current order should be finished by, as
+            a time.perf_counter(), None until the first order.
+        started (float): When the current order started, likewise.
+        orders (list[dict]): The timing of every order finished, see
+            finish().
+    """
+
+    def __init__(self, game, player, reserve=0.05, most=0.25,
+                 expected_turns=200, minimum_turns_left=1,
+                 margin_round_trips=2):
+        """Creates a clock for a player.
+
+        Args:
+            game (BaseGame): The game.
+            player (BaseGameObject): The Player whose time to track.
+            reserve (float): The fraction of the time remaining never
+                budgeted, for the unexpected.
+            most (float): The largest fraction of the time remaining one
+                turn may have.
+            expected_turns (int): How many turns of the player's a game
+                without a max_turns is assumed to last.
+            minimum_turns_left (int): Never budget for fewer turns left than
+                this in such a game, however long it has gone.
+            margin_round_trips (int): How many measured round trips to the
+                server each deadline leaves for sending the results.
+        """
+        self.game = game
+        self.player = player
+        self.reserve = reserve
+        self.most = most
+        self.expected_turns = expected_turns
+        self.minimum_turns_left = minimum_turns_left
+        self.margin_round_trips = margin_round_trips
+        self.history = []
+        self.deadline = None
+        self.started = None
+        self.orders = []
+
+        self._record()
+        game.add_delta_listener(self._delta_merged)
+
+    def _delta_merged(self, delta):
+        changes = delta.get("gameObjects", {}).get(self.player.id)
+        if isinstance(changes, dict) and "timeRemaining" in changes:
+            self._record()
+
+    def _record(self):
+        self.history.append((self._current_turn(), time.perf_counter(),
+                             self.player.time_remaining))
+
+    def _current_turn(self):
+        # chess has no turn counter, but a history of the moves made
+        if hasattr(self.game, "current_turn"):
+            return self.game.current_turn
+        return len(getattr(self.game, "history", ()))
+
+    def time_remaining(self):
+        """The player's time remaining in seconds, counted down locally
+        since the server last sent it if an order is under way.
+        """
+        _, when, remaining = self.history[-1]
+        seconds = remaining / 1e9
+        if self.started is not None and self.started >= when:
+            seconds -= time.perf_counter() - self.started
+        return max(0.0, seconds)
+
+    def turns_left(self):
+        """How many more turns the player will take, this one included,
+        from Game.current_turn and Game.max_turns (every player taking a
+        turn in turn). Games without them are assumed to last
+        expected_turns, with at least minimum_turns_left left.
+        """
+        players = max(1, len(self.game.players))
+        max_turns = getattr(self.game, "max_turns", None)
+        if not max_turns:
+            own = self._current_turn() // players
+            return max(1, self.minimum_turns_left,
+                       self.expected_turns - own)
+        return max(1, math.ceil(
+            (max_turns - self._current_turn()) / players))
+
+    def round_trip(self):
+        """The measured time a command to the server takes, in seconds."""
+        if self.game._client is not None:
+            return self.game._client.round_trip_time()
+        return joueur.client.round_trip_time()
+
+    def budget(self):
+        """The seconds this turn may take: an even share of the time left
+        over the turns left, plus the time each turn adds back.
+        """
+        remaining = self.time_remaining()
+        added = getattr(self.game, "time_added_per_turn", 0) / 1e9
+        share = remaining * (1 - self.reserve) / self.turns_left() + added
+        return max(0.0, min(share, remaining * self.most))
+
+    def start(self):
+        """Starts the clock for an order, setting its deadline. The client
+        calls this before each order.
+
+        Returns:
+            float: The deadline.
+        """
+        self.started = time.perf_counter()
+        margin = self.margin_round_trips * self.round_trip()
+        self.deadline = self.started + max(0.0, self.budget() - margin)
+        return self.deadline
+
+    def finish(self, order):
+        """Notes that an order is done. The client calls this after each
+        order.
+
+        Args:
+            order (str): The order's name, e.g. "runTurn".
+
+        Returns:
+            dict: Its "order", "turn", "seconds" taken, the "budget" it was
+            given and the player's "time_remaining" (in ns) when it started.
+        """
+        timing = {
+            "order": order,
+            "turn": self._current_turn(),
+            "seconds": time.perf_counter() - self.started,
+            "budget": self.deadline - self.started,
+            "time_remaining": self.history[-1][2],
+        }
+        self.orders.append(timing)
+        return timing
+
+    def left(self):
+        """Seconds until the deadline, never negative."""
+        if self.deadline is None:
+            return 0.0
+        return max(0.0, self.deadline - time.perf_counter())
+
+    def expired(self):
+        """If the deadline has passed."""
+        return self.deadline is not None and \
+            time.perf_counter() >= self.deadline
+
+    def anytime(self, results, calls=0, growth=1.0):
+        """Takes answers from an iterator of better and better answers
+        (e.g. a search one depth deeper each time) until the next would
+        not be in before the deadline.
+
+        Each answer is assumed to take growth times as long as the one
+        before, so iterative deepening wants a growth of 3 to 5. The
+        iterator is never interrupted, so each step should be short or
+        check expired() itself.
+
+        Args:
+            results (iterator): The answers.
+            calls (int): How many commands will be sent to the server with
+                the answer, whose round trips are taken off the time.
+            growth (float): How much longer each answer takes than the last.
+
+        Returns:
+            The last answer taken, None if there were none.
+        """
+        if self.deadline is None:
+            self.start()
+        stop = self.deadline - calls * self.round_trip()
+        best = None
+        last = time.perf_counter()
+        for result in results:
+            best = result
+            now = time.perf_counter()
+            if now + (now - last) * growth >= stop:
+                break
+            last = now
+        return best
@@ -0,0 +1,367 @@
+# Tournaments between variants of an AI: the same client with different
+# --aiSettings, or different client directories altogether, played against
+# each other on one or more game servers, many matches at once.
+#
+# Each match is two clients started as separate processes, joining a session
+# of their own on a server (servers are taken in turn, so several local
+# Cerveau instances share the load). Who won, and why, is read from what
+# the clients print when the game is over, and each client writes the
+# timing of every order it was given (see JOUEUR_TELEMETRY in
+# joueur.client) for the results.
+#
+#     python -m joueur.tournament Checkers base deep=depth=9 \
+#         other=@../other-client -s localhost:3000 -s localhost:3001 \
+#         --format swiss --rounds 5 --parallel 32 --output results
+#
+# Variants are NAME, NAME=AI_SETTINGS, or either followed by @DIRECTORY for
+# a client other than this one. results/ gets standings.csv, matches.csv,
+# and the telemetry and log of every client.
+
+import csv
+import itertools
+import json
+import os
+import re
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# what a client prints when the game is over, see client._auto_handle_over
+_OVER = re.compile(r"Game is Over\. (I Won!|I Lost :\() because (.*)")
+_COLORS = re.compile(r"\x1b\[[0-9;]*m")
+
+
+class Variant():
+    """An AI to enter: a client directory and the --aiSettings to run it
+    with.
+    """
+
+    def __init__(self, name, ai_settings=None, directory=_ROOT):
+        self.name = name
+        self.ai_settings = ai_settings
+        self.directory = directory
+
+    @staticmethod
+    def parse(text):
+        """A Variant from NAME[=AI_SETTINGS][@DIRECTORY]."""
+        text, _, directory = text.partition("@")
+        name, _, ai_settings = text.partition("=")
+        return Variant(name, ai_settings or None,
+                       os.path.abspath(directory) if directory else _ROOT)
+
+    def command(self, game_name, server, session, index):
+        """The command line of this variant's client for a match."""
+        command = [sys.executable, "-u",
+                   os.path.join(self.directory, "main.py"), game_name,
+                   "-s", server, "-r", session, "-i", str(index),
+                   "-n", self.name]
+        if self.ai_settings:
+            command += ["--aiSettings", self.ai_settings]
+        return command
+
+
+class Match():
+    """One game between two variants, and how it went.
+
+    Attributes:
+        winner (int): The index (0 or 1) of the side that won, None if the
+            clients didn't say, as when one crashed or timed out.
+        reasons (list[str]): Why each side won or lost, as it printed.
+        seconds (float): How long the match took.
+        telemetry (list[str]): The telemetry file of each side.
+        logs (list[str]): The file of what each side printed.
+    """
+
+    def __init__(self, number, variants, round=0):
+        self.number = number
+        self.variants = variants
+        self.round = round
+        self.winner = None
+        self.reasons = ["", ""]
+        self.seconds = 0.0
+        self.telemetry = ["", ""]
+        self.logs = ["", ""]
+
+    def play(self, game_name, server, output, timeout):
+        """Runs both clients to the end of the game.
+
+        Returns:
+            Match: This, for chaining.
+        """
+        session = "tournament-{}-{}-{}".format(os.getpid(), self.number,
+                                              int(time.time()))
+        began = time.perf_counter()
+        clients = []
+        for index, variant in enumerate(self.variants):
+            name = "{}-{}-{}".format(self.number, index, variant.name)
+            # absolute, as the client runs in its own directory
+            self.telemetry[index] = os.path.join(
+                os.path.abspath(output), "telemetry", name + ".jsonl")
+            self.logs[index] = os.path.join(output, "logs", name + ".log")
+            environment = dict(os.environ,
+                               JOUEUR_TELEMETRY=self.telemetry[index])
+            # to files, not pipes, as a client blocked writing to a full
+            # pipe no one is reading would stall the game
+            with open(self.logs[index], "w") as log:
+                clients.append(subprocess.Popen(
+                    variant.command(game_name, server, session, index),
+                    cwd=variant.directory, env=environment,
+                    stdout=log, stderr=subprocess.STDOUT))
+
+        results = [None, None]
+        for index, client in enumerate(clients):
+            try:
+                client.wait(
+                    timeout=max(1.0, timeout - (time.perf_counter() - began)))
+            except subprocess.TimeoutExpired:
+                client.kill()
+                client.wait()
+                self.reasons[index] = "timed out"
+                continue
+            with open(self.logs[index], errors="replace") as log:
+                printed = _COLORS.sub("", log.read())
+            found = _OVER.search(printed)
+            if found:
+                results[index] = found.group(1) == "I Won!"
+                self.reasons[index] = found.group(2).strip()
+            else:
+                lines = printed.strip().splitlines()
+                self.reasons[index] = "exited {}: {}".format(
+                    client.returncode, lines[-1] if lines else "")
+        self.seconds = time.perf_counter() - began
+
+        if results[0] is not None and results[0] != results[1]:
+            self.winner = 0 if results[0] else 1
+        elif results[0] is None and results[1] is not None:
+            self.winner = 1 if results[1] else None
+        elif results[1] is None and results[0] is not None:
+            self.winner = 0 if results[0] else None
+        return self
+
+
+def round_robin(variants, games=2):
+    """Every pair of variants, games times, swapping sides each time.
+
+    Returns:
+        list[list[tuple[Variant, Variant]]]: The pairings, as one round.
+    """
+    pairs = []
+    for a, b in itertools.combinations(variants, 2):
+        for game in range(games):
+            pairs.append((a, b) if game % 2 == 0 else (b, a))
+    return [pairs]
+
+
+def swiss_pairs(variants, scores, played, byes):
+    """Pairs variants with others on (about) the same score that they have
+    played the least, for a round of a Swiss tournament. With an odd number
+    the lowest scoring of those with the fewest byes sits out, scoring a
+    point.
+
+    Args:
+        variants (list[Variant]): The variants.
+        scores (dict[str, float]): The score of each, by name, updated for
+            the bye.
+        played (dict[tuple[str, str], int]): The games between each pair of
+            names, either way around.
+        byes (dict[str, int]): The byes each has had, by name, updated.
+
+    Returns:
+        list[tuple[Variant, Variant]]: The pairs, the higher scoring variant
+        of each first.
+    """
+    waiting = sorted(variants, key=lambda variant: -scores[variant.name])
+    if len(waiting) % 2:
+        sitting_out = min(reversed(waiting),
+                          key=lambda variant: byes.get(variant.name, 0))
+        waiting.remove(sitting_out)
+        byes[sitting_out.name] = byes.get(sitting_out.name, 0) + 1
+        scores[sitting_out.name] += 1
+    pairs = []
+    while waiting:
+        first = waiting.pop(0)
+        opponent = min(waiting, key=lambda other: (
+            played.get(_pair_key(first, other), 0),
+            abs(scores[first.name] - scores[other.name])))
+        waiting.remove(opponent)
+        pairs.append((first, opponent))
+    return pairs
+
+
+def _pair_key(a, b):
+    return tuple(sorted((a.name, b.name)))
+
+
+class Tournament():
+    """Plays a tournament and keeps the results.
+
+    Attributes:
+        matches (list[Match]): Every match played.
+        scores (dict[str, float]): Each variant's score, a point a win and
+            half a draw (or a match no one won).
+    """
+
+    def __init__(self, game_name, variants, servers, output="tournament",
+                 parallel=None, timeout=600.0):
+        self.game_name = game_name
+        self.variants = variants
+        self.servers = servers
+        self.output = output
+        self.parallel = parallel or max(1, (os.cpu_count() or 2) // 2)
+        self.timeout = timeout
+        self.matches = []
+        self.scores = {variant.name: 0.0 for variant in variants}
+        self._played = {}
+        self._byes = {}
+        for folder in ("telemetry", "logs"):
+            os.makedirs(os.path.join(output, folder), exist_ok=True)
+
+    def run_round(self, pairs, round=0):
+        """Plays some pairings, up to parallel matches at a time.
+
+        Returns:
+            list[Match]: The matches.
+        """
+        matches = []
+        for a, b in pairs:
+            matches.append(Match(len(self.matches) + len(matches), (a, b),
+                                 round))
+        with ThreadPoolExecutor(self.parallel) as executor:
+            list(executor.map(
+                lambda match: match.play(
+                    self.game_name,
+                    self.servers[match.number % len(self.servers)],
+                    self.output, self.timeout),
+                matches))
+        for match in matches:
+            names = [variant.name for variant in match.variants]
+            if match.winner is None:
+                for name in names:
+                    self.scores[name] += 0.5
+            else:
+                self.scores[names[match.winner]] += 1
+            key = _pair_key(*match.variants)
+            self._played[key] = self._played.get(key, 0) + 1
+        self.matches.extend(matches)
+        return matches
+
+    def round_robin(self, games=2):
+        """Plays every pair of variants games times."""
+        for pairs in round_robin(self.variants, games):
+            self.run_round(pairs)
+
+    def swiss(self, rounds):
+        """Plays rounds of a Swiss tournament."""
+        for round in range(rounds):
+            self.run_round(swiss_pairs(self.variants, self.scores,
+                                       self._played, self._byes), round)
+
+    def standings(self):
+        """Each variant's results, best first.
+
+        Returns:
+            list[dict]: The "name", "score", "played", "won", "lost" and
+            "undecided" counts, and "mean_order_seconds" from its clients'
+            telemetry.
+        """
+        rows = {variant.name: {"name": variant.name,
+                               "score": self.scores[variant.name],
+                               "played": 0, "won": 0, "lost": 0,
+                               "undecided": 0,
+                               "byes": self._byes.get(variant.name, 0),
+                               "_seconds": []}
+                for variant in self.variants}
+        for match in self.matches:
+            for index, variant in enumerate(match.variants):
+                row = rows[variant.name]
+                row["played"] += 1
+                if match.winner is None:
+                    row["undecided"] += 1
+                elif match.winner == index:
+                    row["won"] += 1
+                else:
+                    row["lost"] += 1
+                row["_seconds"].extend(_order_seconds(
+                    match.telemetry[index]))
+        for row in rows.values():
+            seconds = row.pop("_seconds")
+            row["mean_order_seconds"] = sum(seconds) / len(seconds) \
+                if seconds else 0.0
+        return sorted(rows.values(), key=lambda row: -row["score"])
+
+    def write(self):
+        """Writes standings.csv and matches.csv to the output directory.
+
+        Returns:
+            list[dict]: The standings.
+        """
+        standings = self.standings()
+        with open(os.path.join(self.output, "standings.csv"), "w",
+                  newline="") as file:
+            writer = csv.DictWriter(file, list(standings[0]))
+            writer.writeheader()
+            writer.writerows(standings)
+        with open(os.path.join(self.output, "matches.csv"), "w",
+                  newline="") as file:
+            writer = csv.writer(file)
+            writer.writerow(["match", "round", "first", "second", "winner",
+                             "first_reason", "second_reason", "seconds"])
+            for match in self.matches:
+                writer.writerow([
+                    match.number, match.round, match.variants[0].name,
+                    match.variants[1].name,
+                    "" if match.winner is None else
+                    match.variants[match.winner].name,
+                    match.reasons[0], match.reasons[1],
+                    "{:.1f}".format(match.seconds)])
+        return standings
+
+
+def _order_seconds(path):
+    """The seconds of every order in a client's telemetry file."""
+    if not os.path.exists(path):
+        return []
+    with open(path) as file:
+        return [json.loads(line)["seconds"] for line in file if line.strip()]
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description="Plays a tournament between variants of an AI.")
+    parser.add_argument("game", help="the game, e.g. Checkers")
+    parser.add_argument("variants", nargs="+",
+                        help="NAME[=AI_SETTINGS][@DIRECTORY] of each AI")
+    parser.add_argument("-s", "--server", action="append", dest="servers",
+                        help="a game server to play on, host:port; give "
+                        "several to spread the matches over them")
+    parser.add_argument("--format", choices=["round-robin", "swiss"],
+                        default="round-robin")
+    parser.add_argument("--games", type=int, default=2,
+                        help="round-robin: games between each pair")
+    parser.add_argument("--rounds", type=int, default=5,
+                        help="swiss: how many rounds")
+    parser.add_argument("--parallel", type=int, default=None,
+                        help="matches at once, defaults to half the cores")
+    parser.add_argument("--timeout", type=float, default=600.0,
+                        help="seconds before a match is given up on")
+    parser.add_argument("--output", default="tournament",
+                        help="the directory to write the results to")
+    args = parser.parse_args()
+
+    tournament = Tournament(
+        args.game, [Variant.parse(text) for text in args.variants],
+        args.servers or ["localhost:3000"], args.output, args.parallel,
+        args.timeout)
+    if args.format == "swiss":
+        tournament.swiss(args.rounds)
+    else:
+        tournament.round_robin(args.games)
+    for row in tournament.write():
+        print("{name:20} {score:5.1f} points, {won} won, {lost} lost, "
+              "{undecided} undecided, {mean_order_seconds:.3f}s an "
+              "order".format(**row))
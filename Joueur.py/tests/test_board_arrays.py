@@ -0,0 +1,56 @@
+import unittest
+
+from games.stumped.game import Game
+from joueur.game_manager import GameManager
+
+
+def _reference(id):
+    return {"id": id}
+
+
+class TestBoardArrays(unittest.TestCase):
+    def setUp(self):
+        self.game = Game()
+        self.manager = GameManager(self.game)
+        self.manager.set_constants({"DELTA_REMOVED": "&RM",
+                                    "DELTA_LIST_LENGTH": "&LEN"})
+        objects = {
+            "0": {"gameObjectName": "Player", "id": "0"},
+            "1": {"gameObjectName": "Player", "id": "1"},
+            "4": {"gameObjectName": "Beaver", "id": "4",
+                  "owner": _reference("0"), "tile": _reference("5")},
+        }
+        for x in range(3):
+            objects[str(5 + x)] = {"gameObjectName": "Tile", "id": str(5 + x),
+                                   "x": x, "y": 0, "type": "land"}
+        objects["5"]["beaver"] = _reference("4")
+        self.manager.apply_delta_state({
+            "mapWidth": 3,
+            "mapHeight": 1,
+            "players": {"&LEN": 2, "0": _reference("0"),
+                        "1": _reference("1")},
+            "tiles": {"&LEN": 3, "0": _reference("5"), "1": _reference("6"),
+                      "2": _reference("7")},
+            "gameObjects": objects,
+        })
+
+    def test_unit_changing_owner(self):
+        self.assertEqual(self.game.board_arrays().unit.tolist(),
+                         [[0, -1, -1]])
+        self.manager.apply_delta_state({"gameObjects": {
+            "4": {"owner": _reference("1")}}})
+        self.assertEqual(self.game.board_arrays().unit.tolist(),
+                         [[1, -1, -1]])
+
+    def test_unit_moving(self):
+        self.game.board_arrays()
+        self.manager.apply_delta_state({"gameObjects": {
+            "4": {"tile": _reference("7")},
+            "5": {"beaver": None},
+            "7": {"beaver": _reference("4")}}})
+        self.assertEqual(self.game.board_arrays().unit.tolist(),
+                         [[-1, -1, 0]])
+
+
+if __name__ == '__main__':
+    unittest.main()
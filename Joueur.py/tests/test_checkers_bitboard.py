@@ -0,0 +1,36 @@
+import random
+import unittest
+
+from games.checkers.bitboard import PERFT_COUNTS, Board, check_random_games
+
+
+class TestMoveGeneration(unittest.TestCase):
+    def test_perft(self):
+        board = Board()
+        for depth, expected in enumerate(PERFT_COUNTS[:7], 1):
+            with self.subTest(depth=depth):
+                self.assertEqual(board.perft(depth), expected)
+        self.assertEqual(board.checkers(), Board().checkers())
+
+    def test_random_games_against_a_plain_generator(self):
+        # with and without forced jumps, alternately
+        self.assertTrue(check_random_games(games=60, verbose=False))
+
+    def test_pop_takes_back_push(self):
+        randomizer = random.Random(0)
+        board = Board()
+        played = []
+        for _ in range(60):
+            moves = board.legal_moves()
+            if not moves:
+                break
+            played.append((sorted(board.checkers()), board.turn))
+            board.push(randomizer.choice(moves))
+        while played:
+            board.pop()
+            self.assertEqual((sorted(board.checkers()), board.turn),
+                             played.pop())
+
+
+if __name__ == '__main__':
+    unittest.main()
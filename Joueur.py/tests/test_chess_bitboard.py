@@ -0,0 +1,23 @@
+import unittest
+
+from games.chess.bitboard import PERFT_SUITE, START_FEN, Board
+
+
+class TestPerft(unittest.TestCase):
+    def test_perft_suite(self):
+        for fen, counts in PERFT_SUITE:
+            board = Board(fen)
+            for depth, expected in enumerate(counts, 1):
+                with self.subTest(fen=fen, depth=depth):
+                    self.assertEqual(board.perft(depth), expected)
+            # perft takes back every move it makes
+            self.assertEqual(board.fen(), Board(fen).fen())
+
+    def test_fen_round_trip(self):
+        for fen, _ in PERFT_SUITE:
+            self.assertEqual(Board(fen).fen(), fen)
+        self.assertEqual(Board().fen(), START_FEN)
+
+
+if __name__ == '__main__':
+    unittest.main()
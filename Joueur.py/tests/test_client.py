@@ -0,0 +1,104 @@
+import json
+import socket
+import unittest
+
+from joueur.client import Client, EOT_CHAR
+
+
+class _Player():
+    won = False
+    reason_won = ""
+    reason_lost = "Timed out"
+
+
+class _AI():
+    """Runs one thing on the server each order, keeping what came back."""
+
+    clock = None
+    player = _Player()
+
+    def __init__(self, client):
+        self.client = client
+        self.ran = []
+        self.ended = None
+
+    def _do_order(self, order, arguments):
+        self.ran.append(self.client.run_on_server(None, 'log', {}))
+        self.ran.append(self.client.run_on_server(None, 'log', {}))
+        return True
+
+    def end(self, won, reason):
+        self.ended = (won, reason)
+
+
+def _events(*events):
+    return ''.join(json.dumps({'event': event, 'data': data}) + EOT_CHAR
+                   for event, data in events).encode('utf-8')
+
+
+def _sent(server):
+    server.settimeout(0.1)
+    received = b''
+    try:
+        while True:
+            data = server.recv(4096)
+            if not data:
+                break
+            received += data
+    except socket.timeout:
+        pass
+    return [json.loads(event)['event']
+            for event in received.decode('utf-8').split(EOT_CHAR) if event]
+
+
+class TestClient(unittest.TestCase):
+    def setUp(self):
+        self.client = Client()
+        self.client.socket, self.server = socket.socketpair()
+        self.client.socket.settimeout(1.0)
+        self.ai = _AI(self.client)
+        self.client.ai = self.ai
+
+    def tearDown(self):
+        self.server.close()
+
+    def test_play_until_over(self):
+        self.server.sendall(_events(
+            ('order', {'name': 'runTurn', 'index': 0, 'args': []}),
+            ('ran', 'first'),
+            ('ran', 'second'),
+            ('over', {}),
+        ))
+        self.client.play()
+
+        self.assertEqual(self.ai.ran, ['first', 'second'])
+        self.assertEqual(self.client.over, {})
+        self.assertEqual(_sent(self.server), ['run', 'run', 'finished'])
+
+    def test_over_during_order(self):
+        # e.g. the player timed out, so the server ended the game instead of
+        # running what the AI asked
+        self.server.sendall(_events(
+            ('order', {'name': 'runTurn', 'index': 0, 'args': []}),
+            ('over', {}),
+        ))
+        self.client.play()
+
+        self.assertEqual(self.ai.ran, [None, None])
+        self.assertEqual(self.ai.ended, (False, 'Timed out'))
+        self.assertEqual(self.client.over, {})
+        # nothing is sent once the game is over
+        self.assertEqual(_sent(self.server), ['run'])
+
+    def test_events_in_order(self):
+        self.server.sendall(_events(('a', 1), ('b', 2)))
+        self.client.receive()
+        self.server.sendall(_events(('c', 3)))
+        self.client.receive()
+
+        self.assertEqual([self.client.next_event() for _ in range(4)],
+                         [('a', 1), ('b', 2), ('c', 3), (None, None)])
+
+
+if __name__ == '__main__':
+    unittest.main()
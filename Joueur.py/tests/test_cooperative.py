@@ -0,0 +1,95 @@
+import random
+import unittest
+
+from joueur.cooperative import CooperativePlanner
+
+
+class _Tile():
+    def __init__(self, x, y, wall):
+        self.x = x
+        self.y = y
+        self.wall = wall
+
+
+class _Game():
+    """A map from rows of text, "#" a wall."""
+
+    def __init__(self, *rows):
+        self.map_width = len(rows[0])
+        self.map_height = len(rows)
+        self.tiles = [_Tile(x, y, character == "#")
+                      for y, row in enumerate(rows)
+                      for x, character in enumerate(row)]
+
+    def tile(self, x, y=0):
+        return self.tiles[x + y * self.map_width]
+
+
+def _planner(game, **options):
+    return CooperativePlanner(game, passable=lambda tile: not tile.wall,
+                              **options)
+
+
+def _assert_no_collisions(test, agents, paths):
+    # moves are made a step at a time, every unit's in priority order
+    on = [start for start, _ in agents]
+    for step in range(max(len(path) for path in paths)):
+        for unit, path in enumerate(paths):
+            if step < len(path):
+                on[unit] = path[step]
+                test.assertEqual(on.count(on[unit]), 1, "step {}".format(
+                    step))
+
+
+class TestCooperativePlanner(unittest.TestCase):
+    def test_nothing_to_plan(self):
+        game = _Game("....")
+        planner = _planner(game)
+        self.assertEqual(planner.plan([]), [])
+        self.assertEqual(planner.plan([(game.tile(0), None),
+                                       (game.tile(2), None)]), [[], []])
+
+    def test_follows_a_unit_moving_out_of_the_way(self):
+        game = _Game("..........")
+        agents = [(game.tile(4), game.tile(5)), (game.tile(5), game.tile(9))]
+        paths = _planner(game).plan(agents)
+
+        self.assertIs(paths[0][-1], game.tile(5))
+        self.assertIs(paths[1][-1], game.tile(9))
+        _assert_no_collisions(self, agents, paths)
+
+    def test_goes_around_a_unit_staying_put(self):
+        game = _Game("....",
+                     "....")
+        agents = [(game.tile(0), game.tile(3)), (game.tile(1), None)]
+        paths = _planner(game).plan(agents)
+
+        self.assertIs(paths[0][-1], game.tile(3))
+        self.assertNotIn(game.tile(1), paths[0])
+        self.assertEqual(paths[1], [])
+
+    def test_crossing_in_a_crowd(self):
+        game = _Game("......",
+                     ".#..#.",
+                     "......")
+        agents = [(game.tile(x, 0), game.tile(5 - x, 2)) for x in range(6)]
+        paths = _planner(game, window=16).plan(agents)
+
+        _assert_no_collisions(self, agents, paths)
+
+    def test_random_crowds_never_collide(self):
+        randomizer = random.Random(3)
+        for _ in range(50):
+            rows = ["".join("#" if randomizer.random() < 0.2 else "."
+                            for _ in range(8)) for _ in range(6)]
+            game = _Game(*rows)
+            open_tiles = [tile for tile in game.tiles if not tile.wall]
+            starts = randomizer.sample(open_tiles, 8)
+            agents = [(start, randomizer.choice(open_tiles + [None]))
+                      for start in starts]
+            paths = _planner(game, budget=1.0).plan(agents)
+            _assert_no_collisions(self, agents, paths)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,67 @@
+import random
+import unittest
+
+from joueur.hierarchical import _make_map
+import joueur.pathfinding
+
+
+def _walk(test, start, goal, path):
+    """Checks a path steps tile to tile from start, through pathable tiles,
+    to goal.
+    """
+    test.assertIs(path[-1], goal)
+    previous = start
+    for tile in path:
+        test.assertEqual(abs(tile.x - previous.x) + abs(tile.y - previous.y),
+                         1)
+        test.assertTrue(tile is goal or tile.is_pathable())
+        previous = tile
+
+
+class TestClusterGraph(unittest.TestCase):
+    def test_goal_on_a_cluster_border(self):
+        game = _make_map("pirates", 30, 30, 0.0, 0)
+        wall = game.tiles[19 + 10 * 30]
+        wall._wall = True
+        game.pathable_mask()[19 + 10 * 30] = 0
+        start = game.tiles[19 + 9 * 30]
+
+        path = joueur.pathfinding.find_path(game, start, wall,
+                                            algorithm="hpa")
+        self.assertEqual(path, [wall])
+        path = joueur.pathfinding.find_path(game, game.tiles[0], wall,
+                                            algorithm="hpa")
+        self.assertEqual(len(path), 19 + 10)
+        _walk(self, game.tiles[0], wall, path)
+
+    def test_maps_one_cluster_wide(self):
+        # clusters stacked in one column are numbered one after the other,
+        # but are above one another, not side by side
+        for width, height in ((1, 11), (2, 11), (10, 20), (5, 30), (9, 25)):
+            game = _make_map("pirates", width, height, 0.0, 0)
+            start, goal = game.tiles[0], game.tiles[-1]
+            path = joueur.pathfinding.find_path(game, start, goal,
+                                                algorithm="hpa")
+            self.assertEqual(len(path), width - 1 + height - 1)
+            _walk(self, start, goal, path)
+
+    def test_finds_every_path_breadth_first_search_does(self):
+        for seed in range(30):
+            game = _make_map("pirates", 30, 25, 0.45 * seed / 29, seed)
+            randomizer = random.Random(seed)
+            for _ in range(30):
+                start = randomizer.choice(game.tiles)
+                goal = randomizer.choice(game.tiles)
+                shortest = joueur.pathfinding.find_path(
+                    game, start, goal, algorithm="bfs")
+                path = joueur.pathfinding.find_path(
+                    game, start, goal, algorithm="hpa")
+                self.assertEqual(bool(path), bool(shortest),
+                                 "seed {}".format(seed))
+                if path:
+                    self.assertGreaterEqual(len(path), len(shortest))
+                    _walk(self, start, goal, path)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,55 @@
+import unittest
+
+import numpy as np
+
+from joueur.parallel import SharedState, WorkerPool
+
+
+def _total(arrays, scale):
+    # at module level, so the workers can find it
+    return int(arrays["values"].sum()) * scale
+
+
+class TestSharedState(unittest.TestCase):
+    def setUp(self):
+        self.state = SharedState(1 << 12)
+        self.addCleanup(self.state.close)
+
+    def test_publish_and_read(self):
+        self.assertEqual(self.state.read(), (0, {}))
+        board = np.arange(12, dtype=np.int64).reshape(3, 4)
+        flags = np.array([True, False])
+        self.assertEqual(self.state.publish({"board": board,
+                                             "flags": flags}), 1)
+
+        attached = SharedState(name=self.state.name)
+        self.addCleanup(attached.close)
+        version, arrays = attached.read()
+        self.assertEqual(version, 1)
+        np.testing.assert_array_equal(arrays["board"], board)
+        np.testing.assert_array_equal(arrays["flags"], flags)
+        self.assertEqual(arrays["board"].dtype, board.dtype)
+
+        self.state.publish({"board": board * 2})
+        version, arrays = attached.read()
+        self.assertEqual((version, list(arrays)), (2, ["board"]))
+        np.testing.assert_array_equal(arrays["board"], board * 2)
+        self.assertEqual(attached.published(), 2)
+
+    def test_too_big(self):
+        with self.assertRaises(ValueError):
+            self.state.publish({"board": np.zeros(1 << 12)})
+
+
+class TestWorkerPool(unittest.TestCase):
+    def test_evaluate(self):
+        pool = WorkerPool(_total, processes=2).start()
+        self.addCleanup(pool.close)
+        pool.publish({"values": np.array([1, 2, 3])})
+        self.assertEqual(pool.evaluate([1, 2, 3]), {0: 6, 1: 12, 2: 18})
+        pool.publish({"values": np.array([10])})
+        self.assertEqual(pool.evaluate([1]), {0: 10})
+
+
+if __name__ == '__main__':
+    unittest.main()
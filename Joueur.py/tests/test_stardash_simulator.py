@@ -0,0 +1,97 @@
+import unittest
+
+from games.stardash.simulator import validate
+
+_JOBS = ("corvette", "missileboat", "martyr", "transport", "miner")
+
+
+def _reference(id):
+    return {"id": id}
+
+
+def _gamelog(dasher_lands_at=(300, 500)):
+    """A recorded game of one turn: a corvette moving, another dashing, and
+    an asteroid a quarter orbit around the sun.
+    """
+    objects = {
+        "0": {"gameObjectName": "Player", "id": "0",
+              "homeBase": _reference("10"), "money": 0},
+        "1": {"gameObjectName": "Player", "id": "1",
+              "homeBase": _reference("11"), "money": 0},
+        "10": {"gameObjectName": "Body", "id": "10", "bodyType": "planet",
+               "x": 50, "y": 50, "radius": 20, "owner": _reference("0")},
+        "11": {"gameObjectName": "Body", "id": "11", "bodyType": "planet",
+               "x": 950, "y": 550, "radius": 20, "owner": _reference("1")},
+        "12": {"gameObjectName": "Body", "id": "12", "bodyType": "sun",
+               "x": 500, "y": 300, "radius": 50},
+        "13": {"gameObjectName": "Body", "id": "13", "bodyType": "asteroid",
+               "materialType": "genarium", "x": 600, "y": 300, "radius": 10,
+               "amount": 100},
+        "30": {"gameObjectName": "Unit", "id": "30", "owner": _reference("0"),
+               "job": _reference("20"), "x": 100, "y": 100, "moves": 50,
+               "energy": 100, "dashX": -1000, "dashY": -1000},
+        "31": {"gameObjectName": "Unit", "id": "31", "owner": _reference("0"),
+               "job": _reference("20"), "x": 100, "y": 500, "moves": 50,
+               "energy": 100, "dashX": -1000, "dashY": -1000},
+    }
+    for i, title in enumerate(_JOBS):
+        objects[str(20 + i)] = {"gameObjectName": "Job", "id": str(20 + i),
+                                "title": title, "moves": 50, "energy": 100,
+                                "range": 50, "carryLimit": 50}
+    start = {
+        "sizeX": 1000, "sizeY": 600, "turnsToOrbit": 4, "dashCost": 5,
+        "dashDistance": 100, "shipRadius": 10, "projectileRadius": 5,
+        "projectileSpeed": 100, "miningSpeed": 10, "currentTurn": 0,
+        "currentPlayer": _reference("0"),
+        "players": {"&LEN": 2, "0": _reference("0"), "1": _reference("1")},
+        "bodies": {"&LEN": 4, "0": _reference("10"), "1": _reference("11"),
+                   "2": _reference("12"), "3": _reference("13")},
+        "jobs": dict({"&LEN": len(_JOBS)},
+                     **{str(i): _reference(str(20 + i))
+                        for i in range(len(_JOBS))}),
+        "units": {"&LEN": 2, "0": _reference("30"), "1": _reference("31")},
+        "projectiles": {"&LEN": 0},
+        "gameObjects": objects,
+    }
+
+    def ran(unit, function_name, **args):
+        return {"type": "ran", "game": {}, "data": {"run": {
+            "caller": _reference(unit), "functionName": function_name,
+            "args": args}}}
+
+    return {
+        "constants": {"DELTA_REMOVED": "&RM", "DELTA_LIST_LENGTH": "&LEN"},
+        "deltas": [
+            {"type": "start", "game": start},
+            ran("30", "move", x=130, y=140),
+            ran("31", "dash", x=300, y=500),
+            {"type": "finished", "game": {
+                "currentTurn": 1, "currentPlayer": _reference("1"),
+                "gameObjects": {
+                    "13": {"x": 500, "y": 200},
+                    "30": {"x": 130, "y": 140},
+                    "31": {"x": dasher_lands_at[0],
+                           "y": dasher_lands_at[1], "energy": 90},
+                }}},
+        ],
+    }
+
+
+class TestValidate(unittest.TestCase):
+    def test_predicts_a_recorded_turn(self):
+        result = validate(_gamelog())
+        self.assertEqual(len(result["turns"]), 1)
+        turn = result["turns"][0]
+        self.assertEqual(turn["turn"], 1)
+        self.assertAlmostEqual(turn["asteroids"], 0.0)
+        self.assertAlmostEqual(turn["units"], 0.0)
+        self.assertEqual(result["accuracy"], 1.0)
+
+    def test_reports_turns_it_mispredicts(self):
+        result = validate(_gamelog(dasher_lands_at=(300, 530)))
+        self.assertAlmostEqual(result["turns"][0]["units"], 30.0)
+        self.assertEqual(result["accuracy"], 0.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,40 @@
+import unittest
+from types import SimpleNamespace
+
+from games.stardash.threats import ThreatMap
+
+
+def _game():
+    sun = SimpleNamespace(x=5000, y=5000, radius=10)
+    corvette = SimpleNamespace(title="corvette", range=100)
+    missileboat = SimpleNamespace(title="missileboat", range=1000)
+    mine, theirs = SimpleNamespace(), SimpleNamespace()
+    target = SimpleNamespace(id="1", x=0, y=0, owner=mine, job=corvette)
+    units = [
+        target,
+        SimpleNamespace(id="2", x=0, y=0, owner=mine, job=corvette),
+        SimpleNamespace(id="3", x=0, y=0, owner=mine, job=missileboat),
+    ]
+    # further than a corvette reaches, but not a missileboat's range
+    missile = SimpleNamespace(x=150, y=0, fuel=1000, target=target,
+                              owner=theirs)
+    return SimpleNamespace(
+        projectile_speed=50, projectile_radius=5, ship_radius=5,
+        bodies=[None, None, sun], projectiles=[missile], units=units,
+        current_player=mine, jobs=[corvette, missileboat]), missile
+
+
+class TestShootdownTargets(unittest.TestCase):
+    def test_reach_is_the_corvettes_range_for_both_jobs(self):
+        game, missile = _game()
+        threats = ThreatMap(game)
+        for unit in game.units[1:]:
+            self.assertEqual(threats.shootdown_targets(unit), [])
+        missile.x = 90
+        threats.update()
+        for unit in game.units[1:]:
+            self.assertEqual(threats.shootdown_targets(unit), [missile])
+
+
+if __name__ == '__main__':
+    unittest.main()
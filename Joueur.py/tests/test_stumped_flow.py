@@ -0,0 +1,43 @@
+import unittest
+
+from games.stumped.flow import (AGAINST_FLOW_COST, MOVE_COST,
+                                WITH_FLOW_COST, FlowRouter, flow_cost)
+
+
+class _Tile():
+    def __init__(self, x, flow_direction=""):
+        self.x = x
+        self.y = 0
+        self.flow_direction = flow_direction
+
+
+class TestFlowCost(unittest.TestCase):
+    # steps are all East, from x to x + 1
+
+    def test_with_the_flow_of_the_tile_left(self):
+        self.assertEqual(flow_cost(_Tile(0, "East"), _Tile(1)),
+                         WITH_FLOW_COST)
+        self.assertEqual(flow_cost(_Tile(0, "East"), _Tile(1, "West")),
+                         WITH_FLOW_COST)
+
+    def test_into_oncoming_flow(self):
+        # from Land, or still water, into water flowing back
+        self.assertEqual(flow_cost(_Tile(0), _Tile(1, "West")),
+                         AGAINST_FLOW_COST)
+        self.assertEqual(flow_cost(_Tile(0, "North"), _Tile(1, "West")),
+                         AGAINST_FLOW_COST)
+
+    def test_against_the_flow_of_the_tile_left_only(self):
+        # the Tile left's flow only ever makes steps cheaper
+        self.assertEqual(flow_cost(_Tile(0, "West"), _Tile(1)), MOVE_COST)
+        self.assertEqual(flow_cost(_Tile(0, "West"), _Tile(1, "North")),
+                         MOVE_COST)
+
+    def test_path_cost(self):
+        tiles = [_Tile(0), _Tile(1, "West"), _Tile(2, "East"), _Tile(3)]
+        self.assertEqual(FlowRouter(None).path_cost(tiles[0], tiles[1:]),
+                         AGAINST_FLOW_COST + MOVE_COST + WITH_FLOW_COST)
+
+
+if __name__ == '__main__':
+    unittest.main()
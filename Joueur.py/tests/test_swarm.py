@@ -0,0 +1,108 @@
+import contextlib
+import json
+import os
+import socket
+import threading
+import unittest
+
+from joueur.client import EOT_CHAR
+from joueur.swarm import Swarm
+
+
+def _send(connection, event, data):
+    connection.sendall((json.dumps({'event': event, 'data': data}) +
+                        EOT_CHAR).encode('utf-8'))
+
+
+class _Server():
+    """Plays 2 player games of Saloon with 2 empty turns, except that it
+    hangs up on the players of a session ending in "-1" once lobbied.
+    """
+
+    def __init__(self):
+        self.listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.listener.bind(('localhost', 0))
+        self.listener.listen(16)
+        self.port = self.listener.getsockname()[1]
+        self.sessions = {}
+        self.lock = threading.Lock()
+        threading.Thread(target=self._accept, daemon=True).start()
+
+    def _accept(self):
+        while True:
+            try:
+                connection, _ = self.listener.accept()
+            except OSError:
+                return
+            threading.Thread(target=self._serve, args=(connection,),
+                             daemon=True).start()
+
+    def _serve(self, connection):
+        events = self._events(connection)
+        next(events)  # alias
+        _send(connection, 'named', 'Saloon')
+        play = next(events)['data']
+        session = play['requestedSession']
+        _send(connection, 'lobbied', {
+            'gameName': 'Saloon', 'gameSession': session,
+            'constants': {'DELTA_REMOVED': '&RM', 'DELTA_LIST_LENGTH': '&LEN'}
+        })
+        if session.endswith('-1'):
+            connection.close()
+            return
+
+        with self.lock:
+            seated = self.sessions.setdefault(session, [])
+            seated.append((play['playerIndex'], connection, events))
+            if len(seated) < 2:
+                return
+        seated.sort(key=lambda player: player[0])
+        players = {str(i): {
+            'id': str(i), 'gameObjectName': 'Player', 'won': i == 0,
+            'lost': i == 1, 'reasonWon': 'won', 'reasonLost': 'lost',
+            'timeRemaining': 10 ** 10} for i in range(2)}
+        for index, connection, _ in seated:
+            _send(connection, 'delta', {
+                'gameObjects': players, 'currentTurn': 0, 'maxTurns': 2,
+                'players': {'0': {'id': '0'}, '1': {'id': '1'}, '&LEN': 2}})
+            _send(connection, 'start', {'playerID': str(index)})
+        for turn in range(2):
+            _, connection, events = seated[turn % 2]
+            _send(connection, 'order',
+                  {'name': 'runTurn', 'index': turn, 'args': []})
+            assert next(events)['event'] == 'finished'
+        for _, connection, _ in seated:
+            _send(connection, 'over', {})
+            connection.close()
+
+    def _events(self, connection):
+        buffer = ''
+        while True:
+            while EOT_CHAR not in buffer:
+                buffer += connection.recv(4096).decode('utf-8')
+            event, buffer = buffer.split(EOT_CHAR, 1)
+            yield json.loads(event)
+
+
+class TestSwarm(unittest.TestCase):
+    def test_hang_ups_fail_only_their_clients(self):
+        server = _Server()
+        swarm = Swarm('Saloon', 'localhost', server.port, clients=4,
+                      session='test')
+        with open(os.devnull, 'w') as devnull, \
+                contextlib.redirect_stdout(devnull):
+            stats = swarm.run(timeout=30)
+        server.listener.close()
+
+        self.assertEqual(stats['started'], 2)
+        self.assertEqual(stats['finished'], 2)
+        self.assertEqual(stats['failed'], 2)
+        self.assertEqual(list(stats['failures']),
+                         ['ConnectionResetError: The server hung up.'])
+        # alias, play and a finished from each player, alias and play from
+        # those hung up on
+        self.assertEqual(stats['sent'], 10)
+
+
+if __name__ == '__main__':
+    unittest.main()